@@ -83,41 +83,64 @@ def main():
     # -------------------------------------------------------------------------------------
 
     # -------------------------------------------------------------------------------------
-    # Iterate over time(S)
-    for time_step in time_range:
-
-        # -------------------------------------------------------------------------------------
-        # Info time
-        logging.info(' ---> TIME STEP: ' + str(time_step) + ' ... ')
-        # -------------------------------------------------------------------------------------
-
-        # -------------------------------------------------------------------------------------
-        # Get datasets information
-        driver_data = DriverData(time_step,
-                                 dams_collection=dams_collections,
-                                 src_dict=data_settings['data']['dynamic']['source'],
-                                 ancillary_dict=data_settings['data']['dynamic']['ancillary'],
-                                 dst_dict=data_settings['data']['dynamic']['destination'],
-                                 time_dict=data_settings['time'],
-                                 variable_dict=data_settings['variable'],
-                                 template_dict=data_settings['template'],
-                                 info_dict=data_settings['info'],
-                                 flag_updating_ancillary=data_settings['flags']['update_dynamic_data_ancillary'],
-                                 flag_updating_destination=data_settings['flags']['update_dynamic_data_destination'],
-                                 flag_cleaning_tmp=data_settings['flags']['clean_tmp_file'])
-        # Download datasets
-        driver_data.download_data()
-        # Organize and save datasets
-        driver_data.organize_data()
-
-        # Clean temporary file(s)
-        driver_data.clean_tmp()
-        # -------------------------------------------------------------------------------------
-
-        # -------------------------------------------------------------------------------------
-        # Info time
-        logging.info(' ---> TIME STEP: ' + str(time_step) + ' ... DONE')
-        # -------------------------------------------------------------------------------------
+    # Define time run mode (step: one driver for each time step; range: one driver for all the time steps)
+    time_run_mode = data_settings['time'].get('time_run_mode', 'step')
+    if time_run_mode == 'range':
+        time_run_steps, time_run_range = [max(time_range)], time_range
+    elif time_run_mode == 'step':
+        time_run_steps, time_run_range = time_range, None
+    else:
+        logging.error(' ===> Time run mode "' + str(time_run_mode) + '" is not supported')
+        raise NotImplementedError('Case not implemented yet')
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Iterate over time(S) (database connection(s) are shared and closed at the end)
+    db_pool = None
+    try:
+        for time_step in time_run_steps:
+
+            # -------------------------------------------------------------------------------------
+            # Info time
+            logging.info(' ---> TIME STEP: ' + str(time_step) + ' ... ')
+            # -------------------------------------------------------------------------------------
+
+            # -------------------------------------------------------------------------------------
+            # Get datasets information
+            driver_data = DriverData(time_step,
+                                     dams_collection=dams_collections,
+                                     src_dict=data_settings['data']['dynamic']['source'],
+                                     ancillary_dict=data_settings['data']['dynamic']['ancillary'],
+                                     dst_dict=data_settings['data']['dynamic']['destination'],
+                                     time_dict=data_settings['time'],
+                                     variable_dict=data_settings['variable'],
+                                     template_dict=data_settings['template'],
+                                     info_dict=data_settings['info'],
+                                     flag_updating_ancillary=data_settings['flags']['update_dynamic_data_ancillary'],
+                                     flag_updating_destination=data_settings['flags'][
+                                         'update_dynamic_data_destination'],
+                                     flag_cleaning_tmp=data_settings['flags']['clean_tmp_file'],
+                                     db_pool=db_pool, time_run_range=time_run_range)
+            # Database connection pool (reused by the next time step(s))
+            db_pool = driver_data.db_pool
+
+            # Download datasets
+            driver_data.download_data()
+            # Organize and save datasets
+            driver_data.organize_data()
+
+            # Clean temporary file(s)
+            driver_data.clean_tmp()
+            # -------------------------------------------------------------------------------------
+
+            # -------------------------------------------------------------------------------------
+            # Info time
+            logging.info(' ---> TIME STEP: ' + str(time_step) + ' ... DONE')
+            # -------------------------------------------------------------------------------------
+    finally:
+        # Close database connection(s)
+        if db_pool is not None:
+            db_pool.close()
 
     # -------------------------------------------------------------------------------------
 
@@ -7,12 +7,15 @@ import pandas as pd
 
 from copy import deepcopy
 
-from ground_network.mysql.lib_utils_io import write_file_csv, write_obj, read_obj, write_file_json, \
+from ground_network.mysql.lib_utils_io import write_file_csv, write_file_json, \
     json2dump_dams  # Matteo: add of functions "write_file_json, json2dump_dams"
-from ground_network.mysql.lib_utils_system import fill_tags2string, make_folder, get_root_path, list_folder
+from ground_network.mysql.lib_utils_io import write_obj_columns, read_obj_columns
+from ground_network.mysql.lib_utils_system import compile_tags2string, make_folder, get_root_path, list_folder
 
-from ground_network.mysql.lib_utils_db_dams import define_db_settings, get_db_credential, \
-    parse_query_time, get_data_dams, organize_data_dams, order_data
+from ground_network.mysql.lib_utils_db_dams import DBConnectionPool, define_db_settings, get_db_credential, \
+    parse_query_time, get_data_dams, get_data_dams_chunks, organize_data_dams, order_data
+from ground_network.mysql.lib_utils_columns import transpose_data_rows
+from ground_network.mysql.lib_utils_download import run_download_tasks
 
 
 # -------------------------------------------------------------------------------------
@@ -24,9 +27,11 @@ class DriverData:
 
     def __init__(self, time_step, dams_collection=None, src_dict=None, ancillary_dict=None, dst_dict=None,
                  time_dict=None, variable_dict=None, template_dict=None, info_dict=None,
-                 flag_updating_ancillary=True, flag_updating_destination=True, flag_cleaning_tmp=True):
+                 flag_updating_ancillary=True, flag_updating_destination=True, flag_cleaning_tmp=True,
+                 db_pool=None, time_run_range=None):
 
         self.time_step = time_step
+        self.time_run_range = time_run_range
         self.dams_collection = dams_collection
 
         self.src_dict = src_dict
@@ -49,6 +54,18 @@ class DriverData:
 
         self.db_info = self.collect_db_settings(self.src_dict)
         self.db_settings = define_db_settings(self.db_info)
+        # Database fetch size (if defined, rows are streamed in batches to the ancillary file(s))
+        self.db_fetch_size = self.db_info.get('server_fetch_size', None)
+        # Database download worker(s) (time step(s) and variable(s) downloaded concurrently)
+        self.db_download_workers = self.db_info.get('server_download_workers', 1)
+        self.db_download_key = self.db_info['server_name']
+
+        # Database connection pool (shared over the time step(s) if passed by the caller)
+        if db_pool is None:
+            db_pool = DBConnectionPool(
+                self.db_settings, pool_size=max(self.db_info.get('server_pool_size', 1), self.db_download_workers),
+                validate_interval=self.db_info.get('server_pool_validate', 60))
+        self.db_pool = db_pool
 
         self.folder_name_anc_dset_raw = self.ancillary_dict[self.tag_folder_name]
         self.file_name_anc_dset_raw = self.ancillary_dict[self.tag_file_name]
@@ -152,6 +169,13 @@ class DriverData:
 
         time_range = pd.date_range(end=time_end, periods=time_period, freq=time_frequency)
 
+        # Extend the time range over all the time run step(s) (one driver for the whole run)
+        if self.time_run_range is not None:
+            time_run_start = min(self.time_run_range).floor(time_rounding)
+            time_run_end = max(self.time_run_range).floor(time_rounding)
+            time_start = pd.date_range(end=time_run_start, periods=time_period, freq=time_frequency)[0]
+            time_range = pd.date_range(start=time_start, end=max(time_end, time_run_end), freq=time_frequency)
+
         if time_reverse:
             time_range = time_range[::-1]
 
@@ -165,6 +189,9 @@ class DriverData:
 
         domain_name = self.domain_name
 
+        folder_name_tmpl = compile_tags2string(folder_name_raw, self.template_dict)
+        file_name_tmpl = compile_tags2string(file_name_raw, self.template_dict)
+
         file_name_obj = {}
         for variable_step in self.variable_list:
             variable_tag = self.variable_dict[variable_step]['tag']
@@ -179,10 +206,8 @@ class DriverData:
                         'ancillary_datetime': datetime_step, 'ancillary_sub_path_time': datetime_step,
                         'destination_datetime': datetime_step, 'destination_sub_path_time': datetime_step}
 
-                    folder_name_def = fill_tags2string(
-                        folder_name_raw, self.template_dict, template_values_step)
-                    file_name_def = fill_tags2string(
-                        file_name_raw, self.template_dict, template_values_step)
+                    folder_name_def = folder_name_tmpl(template_values_step)
+                    file_name_def = file_name_tmpl(template_values_step)
                     file_path_def = os.path.join(folder_name_def, file_name_def)
 
                     file_name_list.append(file_path_def)
@@ -193,6 +218,40 @@ class DriverData:
 
     # -------------------------------------------------------------------------------------
 
+    # -------------------------------------------------------------------------------------
+    # Method to download the dataset of a time step (ancillary file is written only for not empty datasets)
+    def download_step(self, var_tag, var_type, time_step, file_path_anc_step):
+
+        time_from, time_to = parse_query_time(time_step, time_mode=var_type)
+
+        if self.db_fetch_size:
+
+            folder_name_anc_step, file_name_anc_step = os.path.split(file_path_anc_step)
+            make_folder(folder_name_anc_step)
+
+            var_chunks = write_obj_columns(
+                file_path_anc_step,
+                get_data_dams_chunks(var_tag, time_from, time_to, self.db_settings,
+                                     db_fetch_size=self.db_fetch_size, db_pool=self.db_pool))
+            if var_chunks == 0:
+                os.remove(file_path_anc_step)
+                return False
+            return True
+
+        var_data = get_data_dams(var_tag, time_from, time_to, self.db_settings, db_pool=self.db_pool)
+
+        if var_data:
+
+            folder_name_anc_step, file_name_anc_step = os.path.split(file_path_anc_step)
+            make_folder(folder_name_anc_step)
+
+            write_obj_columns(file_path_anc_step, [transpose_data_rows(var_data)])
+            return True
+
+        return False
+
+    # -------------------------------------------------------------------------------------
+
     # -------------------------------------------------------------------------------------
     # Method to download datasets
     def download_data(self):
@@ -207,6 +266,7 @@ class DriverData:
         flag_upd_anc = self.flag_updating_ancillary
         flag_upd_dst = self.flag_updating_destination
 
+        download_tasks = []
         for var_name, var_fields in var_dict.items():
 
             logging.info(' -----> Variable ' + var_name + ' ... ')
@@ -237,15 +297,15 @@ class DriverData:
 
                         if (not os.path.exists(file_path_anc_step)) and (not os.path.exists(file_path_dst_step)):
 
-                            time_from, time_to = parse_query_time(time_step, time_mode=var_type)
-                            var_data = get_data_dams(var_tag, time_from, time_to, self.db_settings)
+                            if self.db_download_workers > 1:
+                                download_tasks.append(((var_name, str(time_step)), self.db_download_key,
+                                                       self.download_step,
+                                                       (var_tag, var_type, time_step, file_path_anc_step)))
+                                logging.info(' ------> Time Step ' + str(time_step) + ' ... QUEUED. '
+                                             'Data will be downloaded by the concurrent downloader.')
+                                continue
 
-                            if var_data:
-
-                                folder_name_anc_step, file_name_anc_step = os.path.split(file_path_anc_step)
-                                make_folder(folder_name_anc_step)
-
-                                write_obj(file_path_anc_step, var_data)
+                            if self.download_step(var_tag, var_type, time_step, file_path_anc_step):
                                 logging.info(' ------> Time Step ' + str(time_step) + ' ... DONE')
                             else:
                                 logging.info(' ------> Time Step ' + str(time_step) +
@@ -272,6 +332,19 @@ class DriverData:
 
                 logging.info(' -----> Variable ' + var_name + ' ... SKIPPED. Variable tag is null.')
 
+        # Download the queued (variable, time step) dataset(s) concurrently (file(s) are written by each task)
+        if download_tasks:
+            logging.info(' -----> Queued datasets ... ')
+            download_results = run_download_tasks(
+                download_tasks, download_limits={self.db_download_key: self.db_download_workers})
+            for ((var_name, time_key), _, _, _), download_result in zip(download_tasks, download_results):
+                if download_result:
+                    logging.info(' ------> Variable ' + var_name + ' -- Time ' + time_key + ' ... DONE')
+                else:
+                    logging.info(' ------> Variable ' + var_name + ' -- Time ' + time_key +
+                                 ' ... SKIPPED. Database request received an empty datasets')
+            logging.info(' -----> Queued datasets ... DONE')
+
         logging.info(' ----> Download datasets ... DONE')
 
     # -------------------------------------------------------------------------------------
@@ -322,7 +395,7 @@ class DriverData:
 
                     if (os.path.exists(file_path_anc_step)) and (not os.path.exists(file_path_dst_csv_step)):
 
-                        var_data = read_obj(file_path_anc_step)
+                        var_data = read_obj_columns(file_path_anc_step)
 
                         if var_data.__len__() > 0:
 
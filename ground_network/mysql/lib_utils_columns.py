@@ -0,0 +1,163 @@
+# -------------------------------------------------------------------------------------
+# Libraries
+import logging
+import datetime
+import decimal
+import numbers
+
+import numpy as np
+import pandas as pd
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to convert a column to the expected type
+def convert_data_column(column_values, column_type):
+
+    if column_type in [int, np.integer]:
+        column_data = np.asarray(column_values, dtype=np.int64)
+    elif column_type in [float, np.floating]:
+        column_data = np.asarray(column_values, dtype=np.float64)
+    elif column_type == bool:
+        column_data = np.asarray(column_values, dtype=bool)
+    elif isinstance(column_values, np.ndarray) and column_values.dtype != object:
+        # typed column (from the columnar cache; numeric and datetime arrays are used as they are)
+        column_data = column_values
+        if column_type == pd.Timestamp:
+            column_data = pd.to_datetime(column_data).values
+    else:
+        # object column (built without per-element shape inference)
+        column_data = np.fromiter(column_values, dtype=object, count=len(column_values))
+        if column_type == pd.Timestamp:
+            column_data = pd.to_datetime(column_data).values
+        else:
+            # soft type inference (as for the dataframe constructor)
+            column_data = pd.Series(column_data, copy=False).infer_objects().values
+
+    return column_data
+
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to encode a column into a typed array (column kind, column values, mask of null values)
+def encode_data_column(column_values):
+
+    # object array (conversion(s) to the typed array are done by numpy/pandas casting)
+    column_values = np.fromiter(column_values, dtype=object, count=len(column_values))
+    column_nulls = np.asarray([column_value is None for column_value in column_values], dtype=bool)
+    column_types = set([type(column_value) for column_value in column_values[~column_nulls]])
+
+    if column_types and all(issubclass(column_type, (bool, np.bool_)) for column_type in column_types) \
+            and not column_nulls.any():
+        return 'bool', column_values.astype(bool), None
+    elif column_types and all(issubclass(column_type, numbers.Integral) for column_type in column_types) \
+            and not column_nulls.any():
+        return 'int', column_values.astype(np.int64), None
+    elif column_types and all(issubclass(column_type, (numbers.Real, decimal.Decimal))
+                              for column_type in column_types):
+        column_values[column_nulls] = np.nan
+        return 'float', column_values.astype(np.float64), None
+    elif column_types and all(issubclass(column_type, datetime.datetime) for column_type in column_types) \
+            and all(column_value.tzinfo is None for column_value in column_values[~column_nulls]):
+        return 'datetime', pd.to_datetime(column_values).values, None
+    elif all(issubclass(column_type, str) for column_type in column_types):
+        column_values[column_nulls] = ''
+        column_data = column_values.astype(str) if column_values.size > 0 else np.asarray([], dtype='<U1')
+        return 'str', column_data, column_nulls if column_nulls.any() else None
+
+    # mixed or unknown type(s) (values are kept as python objects)
+    return 'object', list(column_values), None
+
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to decode a typed array into a column (strings and null values are restored as python objects)
+def decode_data_column(column_kind, column_values, column_mask=None):
+
+    if column_kind == 'str':
+        column_values = column_values.astype(object)
+        if column_mask is not None:
+            column_values[column_mask] = None
+
+    return column_values
+
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to scale and filter a data column by valid range
+def filter_data_column(column_data, data_scale_factor=1, data_valid_range=None):
+
+    if data_valid_range is None:
+        data_valid_range = [None, None]
+
+    column_data = column_data / data_scale_factor
+
+    data_valid_min = data_valid_range[0]
+    data_valid_max = data_valid_range[1]
+
+    if data_valid_min is not None:
+        column_data[column_data < data_valid_min] = np.nan
+    if data_valid_max is not None:
+        column_data[column_data > data_valid_max] = np.nan
+
+    return column_data
+
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to transpose database rows into columns ({column_id: values})
+def transpose_data_rows(data_rows):
+    return {column_id: list(column_values) for column_id, column_values in enumerate(zip(*data_rows))}
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to merge columnar chunks (row lists of the previous ancillary files are transposed)
+def merge_data_chunks(data_chunks):
+
+    data_columns = {}
+    for data_chunk in data_chunks:
+        if not isinstance(data_chunk, dict):
+            data_chunk = transpose_data_rows(data_chunk)
+        for column_id, column_values in data_chunk.items():
+            data_columns.setdefault(column_id, []).extend(column_values)
+
+    # no row(s) are returned as an empty list (as the fetched datasets)
+    if not data_columns:
+        return []
+
+    return data_columns
+
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to organize database rows into typed columns (rows are transposed in one pass)
+def organize_data_columns(data_collection, columns_list, columns_type, columns_id):
+
+    if len(columns_list) != len(columns_type):
+        logging.error(' ===> Columns list names and columns types must have the same length')
+        raise ValueError('Bad definition of columns')
+
+    columns_list_select = [columns_list[i] for i in columns_id]
+    columns_type_select = [columns_type[i] for i in columns_id]
+
+    # transpose rows into columns (pyodbc and mysql rows are sequences; columnar chunks are used as they are)
+    if isinstance(data_collection, dict):
+        data_columns = data_collection
+    else:
+        data_columns = transpose_data_rows(data_collection)
+    if not data_columns:
+        data_columns = {column_id: () for column_id in columns_id}
+
+    data_workspace = {}
+    for column_id, column_name, column_type in zip(columns_id, columns_list_select, columns_type_select):
+        data_workspace[column_name] = convert_data_column(data_columns[column_id], column_type)
+
+    return data_workspace, columns_list_select
+
+# -------------------------------------------------------------------------------------
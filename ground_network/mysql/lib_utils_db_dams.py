@@ -1,15 +1,153 @@
 # -------------------------------------------------------------------------------------
 # Libraries
 import logging
-import mysql.connector as pymysql
 import datetime
 import csv
 import netrc
+import threading
+import time
 
-import numpy as np
 import pandas as pd
 
-from copy import deepcopy
+from contextlib import contextmanager
+
+from ground_network.mysql.lib_utils_columns import organize_data_columns, filter_data_column, transpose_data_rows
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to import the database driver (the driver is imported at the first connection)
+def import_db_driver():
+    try:
+        import mysql.connector as pymysql
+    except ImportError:
+        logging.error(' ===> Library mysql.connector is not available')
+        raise ImportError('Library "mysql.connector" is needed to connect to the database')
+    return pymysql
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Class to manage a pool of database connection(s) (reused over time steps and variables)
+class DBConnectionPool:
+
+    def __init__(self, db_settings, db_connect=None, pool_size=1,
+                 validate_query='SELECT 1', validate_interval=60):
+
+        self.db_settings = db_settings
+        self.db_connect = db_connect
+        self.pool_size = max(int(pool_size), 1)
+        self.validate_query = validate_query
+        self.validate_interval = validate_interval
+
+        self.db_idle = []
+        self.db_lock = threading.Lock()
+        self.db_semaphore = threading.BoundedSemaphore(self.pool_size)
+
+    # Method to open a new connection
+    def open_connection(self):
+        if self.db_connect is not None:
+            return self.db_connect(self.db_settings)
+        return import_db_driver().connect(**self.db_settings)
+
+    # Method to validate an idle connection (stale handles are closed and replaced)
+    def validate_connection(self, db_connection):
+        try:
+            db_cursor = db_connection.cursor()
+            db_cursor.execute(self.validate_query)
+            db_cursor.fetchall()
+            db_cursor.close()
+            return True
+        except Exception as exc:
+            logging.warning(' ===> Database connection is not valid [' + str(exc) + ']. Reconnect')
+            return False
+
+    # Method to close a connection (errors are ignored)
+    @staticmethod
+    def close_connection(db_connection):
+        try:
+            db_connection.close()
+        except Exception:
+            pass
+
+    # Method to acquire a connection
+    def acquire(self):
+
+        self.db_semaphore.acquire()
+        try:
+            db_connection, db_time = None, None
+            with self.db_lock:
+                if self.db_idle:
+                    db_connection, db_time = self.db_idle.pop()
+
+            if db_connection is not None:
+                if (self.validate_interval is not None) and (time.time() - db_time >= self.validate_interval):
+                    if not self.validate_connection(db_connection):
+                        self.close_connection(db_connection)
+                        db_connection = None
+
+            if db_connection is None:
+                db_connection = self.open_connection()
+
+        except Exception:
+            self.db_semaphore.release()
+            raise
+
+        return db_connection
+
+    # Method to release a connection (broken connection(s) are discarded)
+    def release(self, db_connection, db_discard=False):
+        try:
+            if db_discard:
+                self.close_connection(db_connection)
+            else:
+                with self.db_lock:
+                    self.db_idle.append((db_connection, time.time()))
+        finally:
+            self.db_semaphore.release()
+
+    # Method to get a connection in a context (commit at the end, discard on error)
+    @contextmanager
+    def connection(self):
+        db_connection = self.acquire()
+        try:
+            yield db_connection
+            db_connection.commit()
+        except BaseException:
+            self.release(db_connection, db_discard=True)
+            raise
+        else:
+            self.release(db_connection)
+
+    # Method to close all the idle connection(s)
+    def close(self):
+        with self.db_lock:
+            db_idle, self.db_idle = self.db_idle, []
+        for db_connection, _ in db_idle:
+            self.close_connection(db_connection)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to open a database connection (from the pool if defined; otherwise a connection closed at the end)
+@contextmanager
+def open_db_connection(db_obj_settings, db_pool=None):
+    if db_pool is not None:
+        with db_pool.connection() as db_connection:
+            yield db_connection
+    else:
+        db_connection = DBConnectionPool(db_obj_settings).open_connection()
+        try:
+            yield db_connection
+            db_connection.commit()
+        finally:
+            DBConnectionPool.close_connection(db_connection)
 # -------------------------------------------------------------------------------------
 
 
@@ -44,7 +182,7 @@ def organize_data_dams(
     if columns_list_data is None:
         columns_list_data = ['id', 'name', 'time', 'data']
     if columns_type_data is None:
-        columns_type_data = [np.int, str, datetime.datetime, np.float]
+        columns_type_data = [int, str, datetime.datetime, float]
     if columns_id_data is None:
         columns_id_data = [0, 1, 2, 3]
 
@@ -64,49 +202,13 @@ def organize_data_dams(
         logging.error(' ===> Column name data tag is not in columns list names')
         raise ValueError('Bad definition of column tag')
 
-    data_workspace = {}
-    for data_array_row in data_collection:
-
-        columns_list_select = [columns_list_data[i] for i in columns_id_data]
-        columns_type_select = [columns_type_data[i] for i in columns_id_data]
-
-        data_list_row = list(data_array_row)
-        data_list_select = [data_list_row[i] for i in columns_id_data]
-
-        for column_name, column_value in zip(columns_list_select, data_list_select):
-
-            if column_name not in list(data_workspace.keys()):
-                data_workspace[column_name] = [column_value]
-            else:
-                column_tmp = data_workspace[column_name]
-                column_tmp.append(column_value)
-                data_workspace[column_name] = column_tmp
-
-    for column_name, column_type in zip(columns_list_select, columns_type_select):
-        data_tmp = data_workspace[column_name]
-
-        if np.int == column_type:
-            data_tmp = np.asarray(data_tmp, dtype=np.int)
-        elif np.float == column_type:
-            data_tmp = np.asarray(data_tmp, dtype=np.float)
-        elif pd.Timestamp == column_type:
-            data_tmp = pd.to_datetime(data_tmp)
-        elif bool == column_type:
-            data_tmp = np.asarray(data_tmp, dtype=bool)
-
-        if column_name == column_value_data:
-
-            data_tmp = data_tmp / data_scale_factor
-
-            data_valid_min = data_valid_range[0]
-            data_valid_max = data_valid_range[1]
-
-            if data_valid_min is not None:
-                data_tmp[data_tmp < data_valid_min] = np.nan
-            if data_valid_max is not None:
-                data_tmp[data_tmp > data_valid_max] = np.nan
-
-        data_workspace[column_name] = data_tmp
+    # organize rows into typed columns
+    data_workspace, columns_list_select = organize_data_columns(
+        data_collection, columns_list_data, columns_type_data, columns_id_data)
+    if column_value_data in data_workspace:
+        data_workspace[column_value_data] = filter_data_column(
+            data_workspace[column_value_data],
+            data_scale_factor=data_scale_factor, data_valid_range=data_valid_range)
 
     data_df = pd.DataFrame(data_workspace, columns=columns_list_select)
 
@@ -135,27 +237,53 @@ def organize_data_dams(
 
 # -------------------------------------------------------------------------------------
 # Method to get dams dataset
-def get_data_dams(var_name, time_from, time_to, db_obj_settings):
+def get_data_dams(var_name, time_from, time_to, db_obj_settings, db_pool=None):
 
     # Define DB query
     db_query_data = define_query_dams_data(var_name=var_name, time_from=time_from, time_to=time_to)
 
-    # Open DB connection
-    db_connection = pymysql.connect(**db_obj_settings)
+    # Open DB connection (reused from the pool if defined)
+    with open_db_connection(db_obj_settings, db_pool) as db_connection:
+
+        db_cursor = db_connection.cursor()
+        db_cursor.execute(db_query_data)
+        db_dataset = db_cursor.fetchall()
+        db_cursor.close()
 
-    db_cursor = db_connection.cursor()
-    db_cursor.execute("SELECT VERSION()")
-    db_rows = db_cursor.fetchone()
+    return db_dataset
 
-    db_cursor.execute(db_query_data)
-    db_dataset = db_cursor.fetchall()
-    db_len = len(db_dataset)
+# -------------------------------------------------------------------------------------
 
-    db_cursor.close()
-    # Close DB connection
-    db_connection.commit()
 
-    return db_dataset
+# -------------------------------------------------------------------------------------
+# Method to fetch rows in batches (peak memory bounded by the fetch size)
+def fetch_data_batches(db_cursor, db_fetch_size=5000):
+    while True:
+        db_batch = db_cursor.fetchmany(db_fetch_size)
+        if not db_batch:
+            break
+        yield db_batch
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to get dams dataset in columnar chunks (rows fetched in batches)
+def get_data_dams_chunks(var_name, time_from, time_to, db_obj_settings, db_fetch_size=5000, db_pool=None):
+
+    # Define DB query
+    db_query_data = define_query_dams_data(var_name=var_name, time_from=time_from, time_to=time_to)
+
+    # Open DB connection (reused from the pool if defined)
+    with open_db_connection(db_obj_settings, db_pool) as db_connection:
+
+        db_cursor = db_connection.cursor()
+        db_cursor.execute(db_query_data)
+
+        # Fetch rows in batches
+        for db_batch in fetch_data_batches(db_cursor, db_fetch_size):
+            yield transpose_data_rows(db_batch)
+
+        db_cursor.close()
 
 # -------------------------------------------------------------------------------------
 
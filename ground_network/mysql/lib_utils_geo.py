@@ -2,10 +2,9 @@
 # Libraries
 import logging
 import numpy as np
-import geopandas as gpd
 import pandas as pd
-import rasterio
 
+# geographical libraries (geopandas and rasterio) are imported only when a file is read
 logging.getLogger('rasterio').setLevel(logging.WARNING)
 # -------------------------------------------------------------------------------------
 
@@ -21,6 +20,7 @@ def read_data_shapefile_dam(file_name, columns_name_expected=None, columns_name_
     if columns_name_tag is None:
         columns_name_tag = columns_name_expected
 
+    import geopandas as gpd
     file_dframe_raw = gpd.read_file(file_name)
     file_rows = file_dframe_raw.shape[0]
 
@@ -64,6 +64,7 @@ def read_data_shapefile_dam(file_name, columns_name_expected=None, columns_name_
 # Method to read ascii data raster
 def read_data_raster_land(file_name):
 
+    import rasterio
     dset = rasterio.open(file_name)
     bounds = dset.bounds
     res = dset.res
@@ -1,10 +1,11 @@
 # -------------------------------------------------------------------------------------
 # Libraries
+import logging
 import os
 import re
 
-from copy import deepcopy
 from datetime import datetime
+from functools import lru_cache
 # -------------------------------------------------------------------------------------
 
 
@@ -50,42 +51,70 @@ def make_folder(path_folder):
 
 
 # -------------------------------------------------------------------------------------
-# Method to add time in a unfilled string (path or filename)
-def fill_tags2string(string_raw, tags_format=None, tags_filling=None):
-
-    apply_tags = False
-    if string_raw is not None:
-        for tag in list(tags_format.keys()):
-            if tag in string_raw:
-                apply_tags = True
-                break
-
-    if apply_tags:
-
-        tags_format_tmp = deepcopy(tags_format)
-        for tag_key, tag_value in tags_format.items():
-            tag_key_tmp = '{' + tag_key + '}'
-            if tag_value is not None:
-                if tag_key_tmp in string_raw:
-                    string_filled = string_raw.replace(tag_key_tmp, tag_value)
-                    string_raw = string_filled
+# Class to fill a string template (tags are parsed once and the template is filled by calling the object)
+class StringTemplate:
+
+    def __init__(self, string_raw, tags_format=None):
+
+        self.string_raw = string_raw
+
+        self.apply_tags = False
+        if string_raw is not None:
+            for tag in list(tags_format.keys()):
+                if tag in string_raw:
+                    self.apply_tags = True
+                    break
+
+        # Tags format(s) are applied to the string (the filling step(s) are saved in the tags order)
+        self.string_filled, self.tags_step = None, []
+        if self.apply_tags:
+            for tag_key, tag_value in tags_format.items():
+                tag_key_tmp = '{' + tag_key + '}'
+                if tag_value is not None:
+                    if tag_key_tmp in string_raw:
+                        self.string_filled = string_raw = string_raw.replace(tag_key_tmp, tag_value)
+                        self.tags_step.append((tag_key, tag_value))
                 else:
-                    tags_format_tmp.pop(tag_key, None)
+                    self.tags_step.append((tag_key, tag_value))
+        self.tags_name = [tag_key for tag_key, _ in self.tags_step]
+
+    # Method to fill the template (filled string(s) are cached by tags values)
+    def __call__(self, tags_filling=None):
+
+        if not self.apply_tags:
+            return self.string_raw
 
-        dim_max = 1
-        for tags_filling_values_tmp in tags_filling.values():
-            if isinstance(tags_filling_values_tmp, list):
-                dim_tmp = tags_filling_values_tmp.__len__()
-                if dim_tmp > dim_max:
-                    dim_max = dim_tmp
+        dim_max = max([len(tags_filling_values_tmp) for tags_filling_values_tmp in tags_filling.values()
+                       if isinstance(tags_filling_values_tmp, list)] + [1])
+
+        tags_key = (dim_max, tuple(
+            (tag_key, define_tag_key(tags_filling[tag_key]))
+            for tag_key in self.tags_name if tag_key in tags_filling))
+        try:
+            hash(tags_key)
+        except TypeError:
+            # Unhashable value(s) are filled without cache
+            return self.fill_template(tags_filling, dim_max)
+
+        string_filled_out = fill_string_template(self, tags_key)
+
+        if isinstance(string_filled_out, tuple):
+            return list(string_filled_out)
+        return string_filled_out
 
-        string_filled_list = [string_filled] * dim_max
+    # Method to fill the template with tags values
+    def fill_template(self, tags_filling, dim_max=1):
+
+        if self.string_filled is None:
+            logging.error(' ===> String "' + self.string_raw + '" has no tag(s) to fill')
+            raise ValueError('String template is not defined by the tags format')
 
         string_filled_def = []
-        for string_id, string_filled_step in enumerate(string_filled_list):
-            for tag_format_name, tag_format_value in list(tags_format_tmp.items()):
+        for string_id in range(dim_max):
+            string_filled_step = self.string_filled
+            for tag_format_name, tag_format_value in self.tags_step:
 
-                if tag_format_name in list(tags_filling.keys()):
+                if tag_format_name in tags_filling:
                     tag_filling_value = tags_filling[tag_format_name]
 
                     if isinstance(tag_filling_value, list):
@@ -103,16 +132,68 @@ def fill_tags2string(string_raw, tags_format=None, tags_filling=None):
 
                         string_filled_step = string_filled_step.replace(tag_format_value, tag_filling_step)
 
-            string_filled_def.append(string_filled_step)
+            string_filled_def.append(string_filled_step.replace('//', '/'))
 
         if dim_max == 1:
-            string_filled_out = string_filled_def[0].replace('//', '/')
-        else:
-            string_filled_out = []
-            for string_filled_tmp in string_filled_def:
-                string_filled_out.append(string_filled_tmp.replace('//', '/'))
+            return string_filled_def[0]
+        return string_filled_def
 
-        return string_filled_out
-    else:
-        return string_raw
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to define the cache key of a tag value (types and time zones are kept to avoid 1 == 1.0 hits)
+def define_tag_key(tag_value):
+    if isinstance(tag_value, list):
+        return list, tuple(define_tag_key(tag_step) for tag_step in tag_value), None
+    if isinstance(tag_value, datetime):
+        return type(tag_value), tag_value, tag_value.tzinfo
+    return type(tag_value), tag_value, None
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to fill a string template by cache key (multiple strings are returned as tuple)
+@lru_cache(maxsize=4096)
+def fill_string_template(string_template, tags_key):
+
+    dim_max, tags_values = tags_key
+
+    tags_filling = {}
+    for tag_key, (tag_type, tag_value, _) in tags_values:
+        if tag_type is list:
+            tag_value = [tag_step for _, tag_step, _ in tag_value]
+        tags_filling[tag_key] = tag_value
+
+    string_filled_out = string_template.fill_template(tags_filling, dim_max)
+    if isinstance(string_filled_out, list):
+        return tuple(string_filled_out)
+    return string_filled_out
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to compile a string template (templates are cached by string and tags format)
+def compile_tags2string(string_raw, tags_format=None):
+    tags_format_key = tuple(tags_format.items()) if tags_format is not None else None
+    try:
+        hash(tags_format_key)
+    except TypeError:
+        return StringTemplate(string_raw, tags_format)
+    return compile_string_template(string_raw, tags_format_key)
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to compile a string template by cache key
+@lru_cache(maxsize=256)
+def compile_string_template(string_raw, tags_format_key):
+    return StringTemplate(string_raw, dict(tags_format_key) if tags_format_key is not None else None)
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to add time in a unfilled string (path or filename)
+def fill_tags2string(string_raw, tags_format=None, tags_filling=None):
+    return compile_tags2string(string_raw, tags_format)(tags_filling)
 # -------------------------------------------------------------------------------------
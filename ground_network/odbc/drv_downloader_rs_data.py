@@ -7,11 +7,13 @@ import pandas as pd
 
 from copy import deepcopy
 
-from ground_network.odbc.lib_utils_io import write_file_csv, write_obj, read_obj
-from ground_network.odbc.lib_utils_system import fill_tags2string, make_folder, get_root_path, list_folder
+from ground_network.odbc.lib_utils_io import write_file_csv, write_obj_columns, read_obj_columns
+from ground_network.odbc.lib_utils_system import compile_tags2string, make_folder, get_root_path, list_folder
 
-from ground_network.odbc.lib_utils_db_sirmip import define_db_settings, get_db_credential, \
-    parse_query_time, get_data_rs, organize_data_rs, order_data
+from ground_network.odbc.lib_utils_db_sirmip import DBConnectionPool, define_db_settings, get_db_credential, \
+    parse_query_time, get_data_rs, get_data_rs_chunks, organize_data_rs, order_data
+from ground_network.odbc.lib_utils_columns import transpose_data_rows
+from ground_network.odbc.lib_utils_download import run_download_tasks
 # -------------------------------------------------------------------------------------
 
 
@@ -21,7 +23,8 @@ class DriverData:
 
     def __init__(self, time_step, sections_collection=None, src_dict=None, ancillary_dict=None, dst_dict=None,
                  time_dict=None, variable_dict=None, template_dict=None, info_dict=None,
-                 flag_updating_ancillary=True, flag_updating_destination=True, flag_cleaning_tmp=True):
+                 flag_updating_ancillary=True, flag_updating_destination=True, flag_cleaning_tmp=True,
+                 db_pool=None):
 
         self.time_step = time_step
         self.sections_collection = sections_collection
@@ -45,6 +48,21 @@ class DriverData:
 
         self.db_info = self.collect_db_settings(self.src_dict)
         self.db_settings = define_db_settings(self.db_info)
+        # Database fetch size (if defined, rows are streamed by sensor to the ancillary file(s))
+        self.db_fetch_size = self.db_info.get('server_fetch_size', None)
+
+        # Database query worker(s) (sensor queries executed concurrently over the pool connection(s))
+        self.db_workers = self.db_info.get('server_query_workers', 1)
+        # Database download worker(s) (time step(s) and variable(s) downloaded concurrently)
+        self.db_download_workers = self.db_info.get('server_download_workers', 1)
+        self.db_download_key = self.db_info['server_name']
+        # Database connection pool (shared over the time step(s) if passed by the caller)
+        if db_pool is None:
+            db_pool = DBConnectionPool(
+                self.db_settings,
+                pool_size=max(self.db_info.get('server_pool_size', 1), self.db_workers, self.db_download_workers),
+                validate_interval=self.db_info.get('server_pool_validate', 60))
+        self.db_pool = db_pool
 
         self.folder_name_anc_dset_raw = self.ancillary_dict[self.tag_folder_name]
         self.file_name_anc_dset_raw = self.ancillary_dict[self.tag_file_name]
@@ -132,6 +150,9 @@ class DriverData:
 
         domain_name = self.domain_name
 
+        folder_name_tmpl = compile_tags2string(folder_name_raw, self.template_dict)
+        file_name_tmpl = compile_tags2string(file_name_raw, self.template_dict)
+
         file_name_obj = {}
         for variable_step in self.variable_list:
             variable_tag = self.variable_dict[variable_step]['tag']
@@ -147,10 +168,8 @@ class DriverData:
                         'ancillary_datetime': datetime_step, 'ancillary_sub_path_time': datetime_step,
                         'destination_datetime': datetime_step, 'destination_sub_path_time': datetime_step}
 
-                    folder_name_def = fill_tags2string(
-                        folder_name_raw, self.template_dict, template_values_step)
-                    file_name_def = fill_tags2string(
-                        file_name_raw, self.template_dict, template_values_step)
+                    folder_name_def = folder_name_tmpl(template_values_step)
+                    file_name_def = file_name_tmpl(template_values_step)
                     file_path_def = os.path.join(folder_name_def, file_name_def)
 
                     file_name_list.append(file_path_def)
@@ -161,6 +180,23 @@ class DriverData:
 
     # -------------------------------------------------------------------------------------
 
+    # -------------------------------------------------------------------------------------
+    # Method to download the dataset of a time step
+    def download_step(self, var_tag, time_step, file_path_anc_step):
+
+        time_from, time_to = parse_query_time(time_step)
+        if self.db_fetch_size:
+            write_obj_columns(
+                file_path_anc_step,
+                get_data_rs_chunks(var_tag, time_from, time_to, self.db_settings,
+                                   db_pool=self.db_pool, db_workers=self.db_workers))
+        else:
+            var_data = get_data_rs(var_tag, time_from, time_to, self.db_settings,
+                                   db_pool=self.db_pool, db_workers=self.db_workers)
+            write_obj_columns(file_path_anc_step, [transpose_data_rows(var_data)])
+
+    # -------------------------------------------------------------------------------------
+
     # -------------------------------------------------------------------------------------
     # Method to download datasets
     def download_data(self):
@@ -175,6 +211,7 @@ class DriverData:
         flag_upd_anc = self.flag_updating_ancillary
         flag_upd_dst = self.flag_updating_destination
 
+        download_tasks = []
         for var_name, var_fields in var_dict.items():
 
             logging.info(' -----> Variable ' + var_name + ' ... ')
@@ -207,9 +244,14 @@ class DriverData:
 
                         if (not os.path.exists(file_path_anc_step)) and (not os.path.exists(file_path_dst_step)):
 
-                            time_from, time_to = parse_query_time(time_step)
-                            var_data = get_data_rs(var_tag, time_from, time_to, self.db_settings)
-                            write_obj(file_path_anc_step, var_data)
+                            if self.db_download_workers > 1:
+                                download_tasks.append(((var_name, str(time_step)), self.db_download_key,
+                                                       self.download_step, (var_tag, time_step, file_path_anc_step)))
+                                logging.info(' ------> Time Step ' + str(time_step) + ' ... QUEUED. '
+                                             'Data will be downloaded by the concurrent downloader.')
+                                continue
+
+                            self.download_step(var_tag, time_step, file_path_anc_step)
 
                             logging.info(' ------> Time Step ' + str(time_step) + ' ... DONE')
 
@@ -234,6 +276,14 @@ class DriverData:
 
                 logging.info(' -----> Variable ' + var_name + ' ... SKIPPED. Variable tag is null.')
 
+        # Download the queued (variable, time step) dataset(s) concurrently (file(s) are written by each task)
+        if download_tasks:
+            logging.info(' -----> Queued datasets ... ')
+            run_download_tasks(download_tasks, download_limits={self.db_download_key: self.db_download_workers})
+            for (var_name, time_key), _, _, _ in download_tasks:
+                logging.info(' ------> Variable ' + var_name + ' -- Time ' + time_key + ' ... DONE')
+            logging.info(' -----> Queued datasets ... DONE')
+
         logging.info(' ----> Download datasets ... DONE')
 
     # -------------------------------------------------------------------------------------
@@ -282,7 +332,7 @@ class DriverData:
 
                     if (os.path.exists(file_path_anc_step)) and (not os.path.exists(file_path_dst_step)):
 
-                        var_data = read_obj(file_path_anc_step)
+                        var_data = read_obj_columns(file_path_anc_step)
 
                         if var_data.__len__() > 0:
 
@@ -7,11 +7,14 @@ import pandas as pd
 
 from copy import deepcopy
 
-from ground_network.odbc.lib_utils_io import write_file_csv, write_obj, read_obj
-from ground_network.odbc.lib_utils_system import fill_tags2string, make_folder, get_root_path, list_folder
-
-from ground_network.odbc.lib_utils_db_sirmip import define_db_settings, get_db_credential, \
-    parse_query_time, get_data_ws, organize_data_ws, order_data
+from ground_network.odbc.lib_utils_io import write_file_csv, write_obj_columns, read_obj_columns
+from ground_network.odbc.lib_utils_system import compile_tags2string, make_folder, get_root_path, list_folder
+
+from ground_network.odbc.lib_utils_db_sirmip import DBConnectionPool, define_db_settings, get_db_credential, \
+    parse_query_time, get_data_ws, get_data_ws_chunks, get_data_ws_period, get_data_ws_period_chunks, \
+    organize_data_ws, order_data
+from ground_network.odbc.lib_utils_columns import transpose_data_rows
+from ground_network.odbc.lib_utils_download import run_download_tasks
 # -------------------------------------------------------------------------------------
 
 
@@ -21,7 +24,8 @@ class DriverData:
 
     def __init__(self, time_step, src_dict=None, ancillary_dict=None, dst_dict=None,
                  time_dict=None, variable_dict=None, template_dict=None, info_dict=None,
-                 flag_updating_ancillary=True, flag_updating_destination=True, flag_cleaning_tmp=True):
+                 flag_updating_ancillary=True, flag_updating_destination=True, flag_cleaning_tmp=True,
+                 db_pool=None):
 
         self.time_step = time_step
 
@@ -44,6 +48,21 @@ class DriverData:
 
         self.db_info = self.collect_db_settings(self.src_dict)
         self.db_settings = define_db_settings(self.db_info)
+        # Database fetch size (if defined, rows are streamed in batches to the ancillary file(s))
+        self.db_fetch_size = self.db_info.get('server_fetch_size', None)
+
+        # Database download worker(s) (time step(s) and variable(s) downloaded concurrently)
+        self.db_download_workers = self.db_info.get('server_download_workers', 1)
+        self.db_download_key = self.db_info['server_name']
+
+        # Database connection pool (shared over the time step(s) if passed by the caller)
+        if db_pool is None:
+            db_pool = DBConnectionPool(
+                self.db_settings, pool_size=max(self.db_info.get('server_pool_size', 1), self.db_download_workers),
+                validate_interval=self.db_info.get('server_pool_validate', 60))
+        self.db_pool = db_pool
+        # Database query mode (step: one query for each time step; period: one query for all the time steps)
+        self.db_query_mode = self.db_info.get('server_query_mode', 'step')
 
         self.folder_name_anc_dset_raw = self.ancillary_dict[self.tag_folder_name]
         self.file_name_anc_dset_raw = self.ancillary_dict[self.tag_file_name]
@@ -131,6 +150,9 @@ class DriverData:
 
         domain_name = self.domain_name
 
+        folder_name_tmpl = compile_tags2string(folder_name_raw, self.template_dict)
+        file_name_tmpl = compile_tags2string(file_name_raw, self.template_dict)
+
         file_name_obj = {}
         for variable_step in self.variable_list:
             variable_tag = self.variable_dict[variable_step]['tag']
@@ -146,10 +168,8 @@ class DriverData:
                         'ancillary_datetime': datetime_step, 'ancillary_sub_path_time': datetime_step,
                         'destination_datetime': datetime_step, 'destination_sub_path_time': datetime_step}
 
-                    folder_name_def = fill_tags2string(
-                        folder_name_raw, self.template_dict, template_values_step)
-                    file_name_def = fill_tags2string(
-                        file_name_raw, self.template_dict, template_values_step)
+                    folder_name_def = folder_name_tmpl(template_values_step)
+                    file_name_def = file_name_tmpl(template_values_step)
                     file_path_def = os.path.join(folder_name_def, file_name_def)
 
                     file_name_list.append(file_path_def)
@@ -160,6 +180,62 @@ class DriverData:
 
     # -------------------------------------------------------------------------------------
 
+    # -------------------------------------------------------------------------------------
+    # Method to download the dataset of a time step
+    def download_step(self, var_tag, time_step, file_path_anc_step):
+
+        time_from, time_to = parse_query_time(time_step)
+        if self.db_fetch_size:
+            write_obj_columns(
+                file_path_anc_step,
+                get_data_ws_chunks(var_tag, time_from, time_to, self.db_settings,
+                                   flag_type='automatic', db_pool=self.db_pool,
+                                   db_fetch_size=self.db_fetch_size))
+        else:
+            var_data = get_data_ws(var_tag, time_from, time_to, self.db_settings,
+                                   flag_type='automatic', db_pool=self.db_pool)
+            write_obj_columns(file_path_anc_step, [transpose_data_rows(var_data)])
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # Method to download the dataset of a period (one query; time_download: [(time_step, file_path_anc_step)])
+    def download_period(self, var_tag, time_download):
+
+        if self.db_fetch_size:
+
+            # Append the chunk(s) of each batch to the time step tmp file(s)
+            file_path_anc_tmp = {time_step: file_path_anc_step + '.tmp'
+                                 for time_step, file_path_anc_step in time_download}
+            for file_path_anc_tmp_step in file_path_anc_tmp.values():
+                if os.path.exists(file_path_anc_tmp_step):
+                    os.remove(file_path_anc_tmp_step)
+
+            for var_chunk_period in get_data_ws_period_chunks(
+                    var_tag, [time_step for time_step, _ in time_download], self.db_settings,
+                    time_frequency=self.time_dict['time_frequency'],
+                    flag_type='automatic', db_pool=self.db_pool,
+                    db_fetch_size=self.db_fetch_size):
+                for time_step, var_chunk_step in var_chunk_period.items():
+                    write_obj_columns(file_path_anc_tmp[time_step], [var_chunk_step], file_append=True)
+
+            # Rename the tmp file(s) (time step(s) without data get an empty file)
+            for time_step, file_path_anc_step in time_download:
+                write_obj_columns(file_path_anc_tmp[time_step], [], file_append=True)
+                os.replace(file_path_anc_tmp[time_step], file_path_anc_step)
+
+        else:
+
+            var_data_period = get_data_ws_period(
+                var_tag, [time_step for time_step, _ in time_download], self.db_settings,
+                time_frequency=self.time_dict['time_frequency'],
+                flag_type='automatic', db_pool=self.db_pool)
+
+            for time_step, file_path_anc_step in time_download:
+                write_obj_columns(file_path_anc_step, [transpose_data_rows(var_data_period[time_step])])
+
+    # -------------------------------------------------------------------------------------
+
     # -------------------------------------------------------------------------------------
     # Method to download datasets
     def download_data(self):
@@ -174,6 +250,7 @@ class DriverData:
         flag_upd_anc = self.flag_updating_ancillary
         flag_upd_dst = self.flag_updating_destination
 
+        download_tasks = []
         for var_name, var_fields in var_dict.items():
 
             logging.info(' -----> Variable ' + var_name + ' ... ')
@@ -188,6 +265,7 @@ class DriverData:
 
                 if var_download:
 
+                    time_download = []
                     for time_step, file_path_anc_step, file_path_dst_step in zip(
                             time_range, file_path_anc_list, file_path_dst_list):
 
@@ -206,9 +284,20 @@ class DriverData:
 
                         if (not os.path.exists(file_path_anc_step)) and (not os.path.exists(file_path_dst_step)):
 
-                            time_from, time_to = parse_query_time(time_step)
-                            var_data = get_data_ws(var_tag, time_from, time_to, self.db_settings, flag_type='automatic')
-                            write_obj(file_path_anc_step, var_data)
+                            if self.db_query_mode == 'period':
+                                time_download.append((time_step, file_path_anc_step))
+                                logging.info(' ------> Time Step ' + str(time_step) + ' ... QUEUED. '
+                                             'Data will be downloaded by the period query.')
+                                continue
+
+                            if self.db_download_workers > 1:
+                                download_tasks.append(((var_name, str(time_step)), self.db_download_key,
+                                                       self.download_step, (var_tag, time_step, file_path_anc_step)))
+                                logging.info(' ------> Time Step ' + str(time_step) + ' ... QUEUED. '
+                                             'Data will be downloaded by the concurrent downloader.')
+                                continue
+
+                            self.download_step(var_tag, time_step, file_path_anc_step)
 
                             logging.info(' ------> Time Step ' + str(time_step) + ' ... DONE')
 
@@ -222,6 +311,20 @@ class DriverData:
                             logging.error(' ===> Bad file multiple condition')
                             raise NotImplemented("File multiple condition not implemented yet")
 
+                    # Download the queued time step(s) with a single query over the period
+                    if time_download:
+
+                        time_period = str(time_download[0][0]) + ' :: ' + str(time_download[-1][0])
+                        if self.db_download_workers > 1:
+                            download_tasks.append(((var_name, time_period), self.db_download_key,
+                                                   self.download_period, (var_tag, time_download)))
+                            logging.info(' ------> Period ' + time_period + ' ... QUEUED. '
+                                         'Data will be downloaded by the concurrent downloader.')
+                        else:
+                            logging.info(' ------> Period ' + time_period + ' ... ')
+                            self.download_period(var_tag, time_download)
+                            logging.info(' ------> Period ' + time_period + ' ... DONE')
+
                     logging.info(' -----> Variable ' + var_name + ' ... DONE')
 
                 else:
@@ -233,6 +336,14 @@ class DriverData:
 
                 logging.info(' -----> Variable ' + var_name + ' ... SKIPPED. Variable tag is null.')
 
+        # Download the queued (variable, time step) dataset(s) concurrently (file(s) are written by each task)
+        if download_tasks:
+            logging.info(' -----> Queued datasets ... ')
+            run_download_tasks(download_tasks, download_limits={self.db_download_key: self.db_download_workers})
+            for (var_name, time_key), _, _, _ in download_tasks:
+                logging.info(' ------> Variable ' + var_name + ' -- Time ' + time_key + ' ... DONE')
+            logging.info(' -----> Queued datasets ... DONE')
+
         logging.info(' ----> Download datasets ... DONE')
 
     # -------------------------------------------------------------------------------------
@@ -279,7 +390,7 @@ class DriverData:
 
                     if (os.path.exists(file_path_anc_step)) and (not os.path.exists(file_path_dst_step)):
 
-                        var_data = read_obj(file_path_anc_step)
+                        var_data = read_obj_columns(file_path_anc_step)
 
                         if var_data.__len__() > 0:
                             var_df = organize_data_ws(var_data, data_type=var_type,
@@ -1,38 +1,277 @@
 # -------------------------------------------------------------------------------------
 # Libraries
 import logging
-import pyodbc
 import datetime
 import csv
 import netrc
+import threading
+import time
 
-import numpy as np
 import pandas as pd
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from ground_network.odbc.lib_utils_columns import organize_data_columns, filter_data_column, transpose_data_rows
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to import the database driver (the driver is imported at the first connection)
+def import_db_driver():
+    try:
+        import pyodbc
+    except ImportError:
+        logging.error(' ===> Library pyodbc is not available')
+        raise ImportError('Library "pyodbc" is needed to connect to the database')
+    return pyodbc
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Class to manage a pool of database connection(s) (reused over time steps and variables)
+class DBConnectionPool:
+
+    def __init__(self, db_settings, db_connect=None, pool_size=1,
+                 validate_query='SELECT 1', validate_interval=60):
+
+        self.db_settings = db_settings
+        self.db_connect = db_connect
+        self.pool_size = max(int(pool_size), 1)
+        self.validate_query = validate_query
+        self.validate_interval = validate_interval
+
+        self.db_idle = []
+        self.db_lock = threading.Lock()
+        self.db_semaphore = threading.BoundedSemaphore(self.pool_size)
+
+    # Method to open a new connection
+    def open_connection(self):
+        if self.db_connect is not None:
+            return self.db_connect(self.db_settings)
+        return import_db_driver().connect(self.db_settings)
+
+    # Method to validate an idle connection (stale handles are closed and replaced)
+    def validate_connection(self, db_connection):
+        try:
+            db_cursor = db_connection.cursor()
+            db_cursor.execute(self.validate_query)
+            db_cursor.fetchall()
+            return True
+        except Exception as exc:
+            logging.warning(' ===> Database connection is not valid [' + str(exc) + ']. Reconnect')
+            return False
+
+    # Method to close a connection (errors are ignored)
+    @staticmethod
+    def close_connection(db_connection):
+        try:
+            db_connection.close()
+        except Exception:
+            pass
+
+    # Method to acquire a connection
+    def acquire(self):
+
+        self.db_semaphore.acquire()
+        try:
+            db_connection, db_time = None, None
+            with self.db_lock:
+                if self.db_idle:
+                    db_connection, db_time = self.db_idle.pop()
+
+            if db_connection is not None:
+                if (self.validate_interval is not None) and (time.time() - db_time >= self.validate_interval):
+                    if not self.validate_connection(db_connection):
+                        self.close_connection(db_connection)
+                        db_connection = None
+
+            if db_connection is None:
+                db_connection = self.open_connection()
+
+        except Exception:
+            self.db_semaphore.release()
+            raise
+
+        return db_connection
+
+    # Method to release a connection (broken connection(s) are discarded)
+    def release(self, db_connection, db_discard=False):
+        try:
+            if db_discard:
+                self.close_connection(db_connection)
+            else:
+                with self.db_lock:
+                    self.db_idle.append((db_connection, time.time()))
+        finally:
+            self.db_semaphore.release()
+
+    # Method to get a connection in a context (commit at the end, discard on error)
+    @contextmanager
+    def connection(self):
+        db_connection = self.acquire()
+        try:
+            yield db_connection
+            db_connection.commit()
+        except BaseException:
+            self.release(db_connection, db_discard=True)
+            raise
+        else:
+            self.release(db_connection)
+
+    # Method to close all the idle connection(s)
+    def close(self):
+        with self.db_lock:
+            db_idle, self.db_idle = self.db_idle, []
+        for db_connection, _ in db_idle:
+            self.close_connection(db_connection)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to open a database connection (from the pool if defined; otherwise a connection closed at the end)
+@contextmanager
+def open_db_connection(db_line_settings, db_pool=None):
+    if db_pool is not None:
+        with db_pool.connection() as db_connection:
+            yield db_connection
+    else:
+        db_connection = DBConnectionPool(db_line_settings).open_connection()
+        try:
+            yield db_connection
+            db_connection.commit()
+        finally:
+            DBConnectionPool.close_connection(db_connection)
 # -------------------------------------------------------------------------------------
 
 
 # -------------------------------------------------------------------------------------
 # Method to get weather station dataset
-def get_data_ws(var_name, time_from, time_to, db_line_settings, flag_type='automatic'):
+def get_data_ws(var_name, time_from, time_to, db_line_settings, flag_type='automatic', db_pool=None):
 
     # Define DB query
     db_query = define_query_ws(var_name, time_from, time_to, flag_type)
 
     # Open DB connection
-    db_connection = pyodbc.connect(db_line_settings)
-    db_cursor = db_connection.cursor()
+    with open_db_connection(db_line_settings, db_pool) as db_connection:
+        db_cursor = db_connection.cursor()
 
-    # Execute DB query
-    db_cursor.execute(db_query)
-    # Get all data
-    db_dataset = db_cursor.fetchall()
-    # Close DB connection
-    db_connection.commit()
+        # Execute DB query
+        db_cursor.execute(db_query)
+        # Get all data
+        db_dataset = db_cursor.fetchall()
 
     return db_dataset
 # -------------------------------------------------------------------------------------
 
 
+# -------------------------------------------------------------------------------------
+# Method to fetch rows in batches (peak memory bounded by the fetch size)
+def fetch_data_batches(db_cursor, db_fetch_size=5000):
+    while True:
+        db_batch = db_cursor.fetchmany(db_fetch_size)
+        if not db_batch:
+            break
+        yield db_batch
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to get weather station dataset in columnar chunks (rows fetched in batches)
+def get_data_ws_chunks(var_name, time_from, time_to, db_line_settings, flag_type='automatic', db_pool=None,
+                       db_fetch_size=5000):
+
+    # Define DB query
+    db_query = define_query_ws(var_name, time_from, time_to, flag_type)
+
+    # Open DB connection
+    with open_db_connection(db_line_settings, db_pool) as db_connection:
+        db_cursor = db_connection.cursor()
+
+        # Execute DB query
+        db_cursor.execute(db_query)
+        # Fetch rows in batches
+        for db_batch in fetch_data_batches(db_cursor, db_fetch_size):
+            yield transpose_data_rows(db_batch)
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to split rows by time step (time_step - freq, time_step]
+def split_data_rows(db_rows, db_dataset, db_time_map, time_frequency='H', column_time_id=12):
+    for db_row in db_rows:
+        db_time_raw = db_row[column_time_id]
+        if db_time_raw not in db_time_map:
+            db_time_map[db_time_raw] = pd.Timestamp(db_time_raw).ceil(time_frequency)
+        db_time_step = db_time_map[db_time_raw]
+        if db_time_step in db_dataset:
+            db_dataset[db_time_step].append(db_row)
+    return db_dataset
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to define weather station query over a period (from the first to the last time step)
+def define_query_ws_period(var_name, time_steps, time_frequency='H', flag_type='automatic'):
+    time_from, _ = parse_query_time(time_steps[0], time_frequency=time_frequency)
+    _, time_to = parse_query_time(time_steps[-1], time_frequency=time_frequency)
+    return define_query_ws(var_name, time_from, time_to, flag_type)
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to get weather station dataset over a period (one query; rows split by time step)
+def get_data_ws_period(var_name, time_steps, db_line_settings, time_frequency='H',
+                       flag_type='automatic', db_pool=None, column_time_id=12):
+
+    # Define DB query over the period
+    time_steps = sorted(time_steps)
+    db_query = define_query_ws_period(var_name, time_steps, time_frequency, flag_type)
+
+    # Open DB connection
+    db_dataset, db_time_map = {time_step: [] for time_step in time_steps}, {}
+    with open_db_connection(db_line_settings, db_pool) as db_connection:
+        db_cursor = db_connection.cursor()
+
+        # Execute DB query
+        db_cursor.execute(db_query)
+        # Iterate over the rows (streamed by the cursor) and split them by time step
+        split_data_rows(db_cursor, db_dataset, db_time_map, time_frequency, column_time_id)
+
+    return db_dataset
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to get weather station dataset over a period in columnar chunks ({time_step: chunk} for each batch)
+def get_data_ws_period_chunks(var_name, time_steps, db_line_settings, time_frequency='H',
+                              flag_type='automatic', db_pool=None, column_time_id=12, db_fetch_size=5000):
+
+    # Define DB query over the period
+    time_steps = sorted(time_steps)
+    db_query = define_query_ws_period(var_name, time_steps, time_frequency, flag_type)
+
+    # Open DB connection
+    db_time_map = {}
+    with open_db_connection(db_line_settings, db_pool) as db_connection:
+        db_cursor = db_connection.cursor()
+
+        # Execute DB query
+        db_cursor.execute(db_query)
+        # Fetch rows in batches and split them by time step
+        for db_batch in fetch_data_batches(db_cursor, db_fetch_size):
+            db_dataset = split_data_rows(
+                db_batch, {time_step: [] for time_step in time_steps}, db_time_map, time_frequency, column_time_id)
+            yield {time_step: transpose_data_rows(db_rows) for time_step, db_rows in db_dataset.items() if db_rows}
+# -------------------------------------------------------------------------------------
+
+
 # -------------------------------------------------------------------------------------
 # Method to order ground network data
 def order_data(data_frame, data_fields_expected):
@@ -65,7 +304,7 @@ def organize_data_rs(time, data_collection, sections_df, data_type='istantaneous
         columns_list_data = ['id', 'code', 'time_datatime', 'time', 'time_parts', 'water_level', 'discharge',
                              'undefined_1', 'undefined_2', 'name', 'check']
     if columns_type_data is None:
-        columns_type_data = [np.int, np.int, datetime.datetime, pd.Timestamp, str, np.float, np.float,
+        columns_type_data = [int, int, datetime.datetime, pd.Timestamp, str, float, float,
                              str, str, str, bool]
     if columns_id_data is None:
         columns_id_data = [0, 1, 3, 5, 6, 10]
@@ -89,49 +328,13 @@ def organize_data_rs(time, data_collection, sections_df, data_type='istantaneous
         logging.error(' ===> Column index of sections and data tags must have the same name')
         raise ValueError('Bad definition of column tag')
 
-    data_workspace = {}
-    for data_array_row in data_collection:
-
-        columns_list_select = [columns_list_data[i] for i in columns_id_data]
-        columns_type_select = [columns_type_data[i] for i in columns_id_data]
-
-        data_list_row = list(data_array_row)
-        data_list_select = [data_list_row[i] for i in columns_id_data]
-
-        for column_name, column_value in zip(columns_list_select, data_list_select):
-
-            if column_name not in list(data_workspace.keys()):
-                data_workspace[column_name] = [column_value]
-            else:
-                column_tmp = data_workspace[column_name]
-                column_tmp.append(column_value)
-                data_workspace[column_name] = column_tmp
-
-    for column_name, column_type in zip(columns_list_select, columns_type_select):
-        data_tmp = data_workspace[column_name]
-
-        if np.int == column_type:
-            data_tmp = np.asarray(data_tmp, dtype=np.int)
-        elif np.float == column_type:
-            data_tmp = np.asarray(data_tmp, dtype=np.float)
-        elif pd.Timestamp == column_type:
-            data_tmp = pd.to_datetime(data_tmp)
-        elif bool == column_type:
-            data_tmp = np.asarray(data_tmp, dtype=bool)
-
-        if column_name == column_discharge_data:
-
-            data_tmp = data_tmp / data_scale_factor
-
-            data_valid_min = data_valid_range[0]
-            data_valid_max = data_valid_range[1]
-
-            if data_valid_min is not None:
-                data_tmp[data_tmp < data_valid_min] = np.nan
-            if data_valid_max is not None:
-                data_tmp[data_tmp > data_valid_max] = np.nan
-
-        data_workspace[column_name] = data_tmp
+    # organize rows into typed columns
+    data_workspace, columns_list_select = organize_data_columns(
+        data_collection, columns_list_data, columns_type_data, columns_id_data)
+    if column_discharge_data in data_workspace:
+        data_workspace[column_discharge_data] = filter_data_column(
+            data_workspace[column_discharge_data],
+            data_scale_factor=data_scale_factor, data_valid_range=data_valid_range)
 
     data_df = pd.DataFrame(data_workspace, columns=columns_list_select)
     data_df_merged = pd.merge(data_df, sections_df, left_on=column_idx_data, right_on=column_idx_sections)
@@ -157,7 +360,7 @@ def organize_data_ws(data_collection, data_type='accumulated', data_units='', da
                         'boundary_limit_01', 'boundary_limit_02', 'boundary_limit_03',
                         'catchment', 'time_start', 'time_end']
     if columns_type is None:
-        columns_type = [np.int, np.int, str, np.float, np.float, np.float, np.float,
+        columns_type = [int, int, str, float, float, float, float,
                         str, str, str,
                         str, pd.Timestamp, pd.Timestamp]
     if columns_id is None:
@@ -179,47 +382,13 @@ def organize_data_ws(data_collection, data_type='accumulated', data_units='', da
         logging.error(' ===> Column time end tag is not in columns list names')
         raise ValueError('Bad definition of column tag')
 
-    data_workspace = {}
-    for data_array_row in data_collection:
-
-        columns_list_select = [columns_list[i] for i in columns_id]
-        columns_type_select = [columns_type[i] for i in columns_id]
-
-        data_list_row = list(data_array_row)
-        data_list_select = [data_list_row[i] for i in columns_id]
-
-        for column_name, column_value in zip(columns_list_select, data_list_select):
-
-            if column_name not in list(data_workspace.keys()):
-                data_workspace[column_name] = [column_value]
-            else:
-                column_tmp = data_workspace[column_name]
-                column_tmp.append(column_value)
-                data_workspace[column_name] = column_tmp
-
-    for column_name, column_type in zip(columns_list_select, columns_type_select):
-        data_tmp = data_workspace[column_name]
-
-        if np.int == column_type:
-            data_tmp = np.asarray(data_tmp, dtype=np.int)
-        elif np.float == column_type:
-            data_tmp = np.asarray(data_tmp, dtype=np.float)
-        elif pd.Timestamp == column_type:
-            data_tmp = pd.to_datetime(data_tmp)
-
-        if column_name == column_data:
-
-            data_tmp = data_tmp / data_scale_factor
-
-            data_valid_min = data_valid_range[0]
-            data_valid_max = data_valid_range[1]
-
-            if data_valid_min is not None:
-                data_tmp[data_tmp < data_valid_min] = np.nan
-            if data_valid_max is not None:
-                data_tmp[data_tmp > data_valid_max] = np.nan
-
-        data_workspace[column_name] = data_tmp
+    # organize rows into typed columns
+    data_workspace, columns_list_select = organize_data_columns(
+        data_collection, columns_list, columns_type, columns_id)
+    if column_data in data_workspace:
+        data_workspace[column_data] = filter_data_column(
+            data_workspace[column_data],
+            data_scale_factor=data_scale_factor, data_valid_range=data_valid_range)
 
     data_df = pd.DataFrame(data_workspace, columns=columns_list_select)
     data_df = data_df.reset_index()
@@ -269,42 +438,125 @@ def organize_data_ws(data_collection, data_type='accumulated', data_units='', da
 
 
 # -------------------------------------------------------------------------------------
-# Method to get river station dataset
-def get_data_rs(var_name, time_from, time_to, db_line_settings):
+# Method to check if a database error is limited to the query (DB-API database error not related to the connection;
+# connection error(s), SQLSTATE class 08, and non database error(s) are not query error(s))
+def check_db_error_query(db_error, db_state_query=('HYT00', 'HYT01')):
+
+    db_error_names = [db_error_class.__name__ for db_error_class in type(db_error).__mro__]
+    db_state = db_error.args[0] if db_error.args and isinstance(db_error.args[0], str) else ''
+
+    if 'DatabaseError' not in db_error_names:
+        return False
+    if db_state.startswith('08'):
+        return False
+    if ('OperationalError' in db_error_names) and (db_state not in db_state_query):
+        return False
+    return True
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to get river station dataset for a single sensor (query error(s) are logged and the sensor is skipped, None
+# is returned; connection error(s) are raised so the connection is discarded)
+def get_data_rs_point(db_cursor, db_query_data, time_from, time_to, db_registry_code):
+
+    db_query_parameters = (time_from, time_to, db_registry_code)
+    try:
+        db_cursor.execute(db_query_data, db_query_parameters)
+        db_point = db_cursor.fetchall()
+    except Exception as exc:
+        if not check_db_error_query(exc):
+            logging.error(' ===> Query for sensor ' + str(db_registry_code) + ' failed [' + str(exc) + ']. '
+                          'Error is not limited to the sensor query')
+            raise
+        logging.warning(' ===> Query for sensor ' + str(db_registry_code) + ' failed [' + str(exc) + ']. Skip sensor')
+        return None
+
+    return [db_point_step for db_point_step in db_point if db_point_step]
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to iterate over river station dataset by sensor (rows of each sensor in registry order; an error is raised
+# if the query failed for all the sensor(s), so no empty dataset is saved)
+def iter_data_rs(var_name, time_from, time_to, db_line_settings, db_pool=None, db_workers=1):
 
     # Define DB query
     db_query_registry = define_query_rs_registry(var_name)
     db_query_data = define_query_rs_data()
 
     # Open DB connection
-    db_connection = pyodbc.connect(db_line_settings)
-    db_cursor = db_connection.cursor()
-
-    # Execute DB query
-    db_cursor.execute(db_query_registry)
-    # Get all registry
-    db_registry = db_cursor.fetchall()
-
-    # Execute DB query to data
-    db_dataset = []
-    for db_registry_id, db_registry_field in enumerate(db_registry):
-
-        db_registry_code = np.int(db_registry_field[0])
-        db_query_parameters = (time_from, time_to, db_registry_code)
+    db_failed = 0
+    with open_db_connection(db_line_settings, db_pool) as db_connection:
+        db_cursor = db_connection.cursor()
+
+        # Execute DB query
+        db_cursor.execute(db_query_registry)
+        # Get all registry
+        db_registry = db_cursor.fetchall()
+        db_registry_codes = [int(db_registry_field[0]) for db_registry_field in db_registry]
+
+        # Execute DB query to data (sequential mode, one cursor)
+        if (db_pool is None) or (db_workers <= 1):
+            for db_registry_code in db_registry_codes:
+                db_point = get_data_rs_point(db_cursor, db_query_data, time_from, time_to, db_registry_code)
+                if db_point is None:
+                    db_failed += 1
+                    continue
+                yield db_point
+
+    # Execute DB query to data (concurrent mode, connections bounded by the pool; registry order is kept)
+    if (db_pool is not None) and (db_workers > 1):
+
+        # Method to execute DB query to data for a sensor using a pooled connection (connection error(s) are raised
+        # inside the pool context, so the connection is discarded)
+        def get_data_rs_worker(db_registry_code):
+            with db_pool.connection() as db_connection_worker:
+                return get_data_rs_point(
+                    db_connection_worker.cursor(), db_query_data, time_from, time_to, db_registry_code)
+
+        db_executor = ThreadPoolExecutor(max_workers=db_workers)
+        try:
+            for db_point in db_executor.map(get_data_rs_worker, db_registry_codes):
+                if db_point is None:
+                    db_failed += 1
+                    continue
+                yield db_point
+        finally:
+            # pending query(ies) are cancelled if an error is raised
+            db_executor.shutdown(wait=True, cancel_futures=True)
+
+    # Check the failed query(ies)
+    if db_registry_codes and db_failed == len(db_registry_codes):
+        logging.error(' ===> Query failed for all the ' + str(db_failed) + ' sensor(s) of variable ' + var_name)
+        raise RuntimeError('River station datasets are not available. Check the database')
+    elif db_failed > 0:
+        logging.warning(' ===> Query failed for ' + str(db_failed) + ' of ' + str(len(db_registry_codes)) +
+                        ' sensor(s) of variable ' + var_name)
+# -------------------------------------------------------------------------------------
 
-        db_cursor.execute(db_query_data, db_query_parameters)
-        db_point = db_cursor.fetchall()
 
-        for db_point_step in db_point:
-            if db_point_step:
-                db_dataset.append(db_point_step)
+# -------------------------------------------------------------------------------------
+# Method to get river station dataset
+def get_data_rs(var_name, time_from, time_to, db_line_settings, db_pool=None, db_workers=1):
 
-    # Close DB connection
-    db_connection.commit()
+    db_dataset = []
+    for db_point in iter_data_rs(var_name, time_from, time_to, db_line_settings,
+                                 db_pool=db_pool, db_workers=db_workers):
+        db_dataset.extend(db_point)
 
     return db_dataset
+# -------------------------------------------------------------------------------------
+
 
 # -------------------------------------------------------------------------------------
+# Method to get river station dataset in columnar chunks (one chunk for each sensor)
+def get_data_rs_chunks(var_name, time_from, time_to, db_line_settings, db_pool=None, db_workers=1):
+    for db_point in iter_data_rs(var_name, time_from, time_to, db_line_settings,
+                                 db_pool=db_pool, db_workers=db_workers):
+        if db_point:
+            yield transpose_data_rows(db_point)
+# -------------------------------------------------------------------------------------
 
 
 # -------------------------------------------------------------------------------------
@@ -0,0 +1,60 @@
+# -------------------------------------------------------------------------------------
+# Libraries
+import logging
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to run download task(s) (task: (task_key, task_db, task_fx, task_args); results in task order)
+def run_download_tasks(download_tasks, download_limits=None, download_workers=1):
+
+    if download_limits is None:
+        download_limits = {}
+
+    # Sequential mode (blocking call(s) executed one by one)
+    if download_workers <= 1 and all(download_limit <= 1 for download_limit in download_limits.values()):
+        return [task_fx(*task_args) for _, _, task_fx, task_args in download_tasks]
+
+    # Concurrent mode (blocking call(s) executed by a thread executor and scheduled by asyncio)
+    download_results = asyncio.run(exec_download_tasks(download_tasks, download_limits, download_workers))
+
+    # Raise the first error (in task order) after all the task(s) are completed
+    for (task_key, _, _, _), task_result in zip(download_tasks, download_results):
+        if isinstance(task_result, BaseException):
+            logging.error(' ===> Download task ' + str(task_key) + ' failed')
+            raise task_result
+
+    return download_results
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to execute download task(s) concurrently (concurrency capped by database)
+async def exec_download_tasks(download_tasks, download_limits, download_workers=1):
+
+    download_loop = asyncio.get_running_loop()
+
+    # Semaphore(s) by database (default limit is the number of workers)
+    download_semaphores = {}
+    for _, task_db, _, _ in download_tasks:
+        if task_db not in download_semaphores:
+            download_semaphores[task_db] = asyncio.Semaphore(download_limits.get(task_db, download_workers))
+
+    executor_workers = max([download_workers] + list(download_limits.values()))
+    with ThreadPoolExecutor(max_workers=executor_workers) as download_executor:
+
+        # Method to execute a download task in the executor
+        async def exec_download_task(task_db, task_fx, task_args):
+            async with download_semaphores[task_db]:
+                return await download_loop.run_in_executor(download_executor, partial(task_fx, *task_args))
+
+        download_results = await asyncio.gather(
+            *[exec_download_task(task_db, task_fx, task_args) for _, task_db, task_fx, task_args in download_tasks],
+            return_exceptions=True)
+
+    return download_results
+# -------------------------------------------------------------------------------------
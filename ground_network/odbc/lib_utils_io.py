@@ -5,6 +5,16 @@ import tempfile
 import os
 import json
 import pickle
+import mmap
+import struct
+
+import numpy as np
+
+from ground_network.odbc.lib_utils_columns import encode_data_column, decode_data_column, merge_data_chunks
+
+# Columnar file tag and buffer alignment
+file_columns_tag = b'GNCOLS01'
+file_columns_align = 8
 # -------------------------------------------------------------------------------------
 
 
@@ -95,3 +105,142 @@ def write_obj(filename, data):
     with open(filename, 'wb') as handle:
         pickle.dump(data, handle, protocol=pickle.HIGHEST_PROTOCOL)
 # -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to read data obj chunks (consecutive pickles in the same file)
+def read_obj_chunks(filename):
+    if os.path.exists(filename):
+        with open(filename, 'rb') as handle:
+            while True:
+                try:
+                    yield pickle.load(handle)
+                except EOFError:
+                    break
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to write data obj columns (typed columnar file; each chunk is dumped as a block as soon as it is received)
+def write_obj_columns(filename, data_chunks, file_append=False):
+
+    # new file is written as tmp file and renamed at the end (partial file(s) are never left)
+    if file_append:
+        filename_tmp = filename
+    else:
+        filename_tmp = filename + '.tmp'
+        if os.path.exists(filename_tmp):
+            os.remove(filename_tmp)
+
+    chunk_n = 0
+    with open(filename_tmp, 'ab') as handle:
+        if handle.tell() == 0:
+            handle.write(file_columns_tag)
+        for data_chunk in data_chunks:
+            write_obj_columns_block(handle, data_chunk)
+            chunk_n += 1
+
+    if not file_append:
+        os.replace(filename_tmp, filename)
+
+    return chunk_n
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to write a block of data obj columns (header with schema and buffers of the typed columns)
+def write_obj_columns_block(handle, data_chunk):
+
+    block_rows, block_schema, block_buffers, block_offset = 0, [], [], 0
+    for column_id, column_values in data_chunk.items():
+
+        column_kind, column_data, column_mask = encode_data_column(column_values)
+        block_rows = len(column_data)
+
+        column_buffers = []
+        if column_kind == 'object':
+            logging.warning(' ===> Column ' + str(column_id) + ' has mixed or unknown types. '
+                            'Values are stored as python objects')
+            column_buffers.append(('data', None, pickle.dumps(column_data, protocol=pickle.HIGHEST_PROTOCOL)))
+        else:
+            column_buffers.append(('data', column_data.dtype.str, np.ascontiguousarray(column_data).tobytes()))
+        if column_mask is not None:
+            column_buffers.append(('mask', column_mask.dtype.str, column_mask.tobytes()))
+
+        column_schema = {'id': column_id, 'kind': column_kind}
+        for buffer_tag, buffer_dtype, buffer_bytes in column_buffers:
+            column_schema[buffer_tag] = {'dtype': buffer_dtype, 'offset': block_offset, 'nbytes': len(buffer_bytes)}
+            buffer_pad = (-len(buffer_bytes)) % file_columns_align
+            block_buffers.append(buffer_bytes + b'\0' * buffer_pad)
+            block_offset += len(buffer_bytes) + buffer_pad
+        block_schema.append(column_schema)
+
+    block_header = json.dumps({'rows': block_rows, 'columns': block_schema}).encode('utf-8')
+    block_header += b' ' * ((-len(block_header)) % file_columns_align)
+
+    handle.write(struct.pack('<QQ', len(block_header), block_offset))
+    handle.write(block_header)
+    for block_buffer in block_buffers:
+        handle.write(block_buffer)
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to read data obj columns (typed columns are memory-mapped; previous pickled file(s) are still supported)
+def read_obj_columns(filename):
+
+    if not os.path.exists(filename):
+        return None
+
+    with open(filename, 'rb') as handle:
+        file_tag = handle.read(len(file_columns_tag))
+        if file_tag != file_columns_tag:
+            return merge_data_chunks(read_obj_chunks(filename))
+
+        file_map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+    data_blocks, file_position = {}, len(file_columns_tag)
+    while file_position < len(file_map):
+
+        block_header_size, block_data_size = struct.unpack_from('<QQ', file_map, file_position)
+        file_position += struct.calcsize('<QQ')
+        block_header = json.loads(file_map[file_position:file_position + block_header_size].decode('utf-8'))
+        file_position += block_header_size
+
+        block_rows = block_header['rows']
+        for column_schema in block_header['columns']:
+
+            column_buffers = {}
+            for buffer_tag in ['data', 'mask']:
+                if buffer_tag not in column_schema:
+                    continue
+                buffer_info = column_schema[buffer_tag]
+                buffer_start = file_position + buffer_info['offset']
+                if buffer_info['dtype'] is None:
+                    column_buffers[buffer_tag] = pickle.loads(
+                        file_map[buffer_start:buffer_start + buffer_info['nbytes']])
+                else:
+                    column_buffers[buffer_tag] = np.frombuffer(
+                        file_map, dtype=np.dtype(buffer_info['dtype']), count=block_rows, offset=buffer_start)
+
+            column_data = decode_data_column(
+                column_schema['kind'], column_buffers['data'], column_buffers.get('mask', None))
+            data_blocks.setdefault(column_schema['id'], []).append(column_data)
+
+        file_position += block_data_size
+
+    # merge block(s) (a single block is returned without copy)
+    data_columns = {}
+    for column_id, column_blocks in data_blocks.items():
+        if len(column_blocks) == 1:
+            data_columns[column_id] = column_blocks[0]
+        elif all(isinstance(column_block, np.ndarray) for column_block in column_blocks):
+            data_columns[column_id] = np.concatenate(column_blocks)
+        else:
+            data_columns[column_id] = [column_value for column_block in column_blocks for column_value in column_block]
+
+    if not data_columns or all(len(column_data) == 0 for column_data in data_columns.values()):
+        return []
+
+    return data_columns
+# -------------------------------------------------------------------------------------
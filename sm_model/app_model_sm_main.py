@@ -103,8 +103,6 @@ def main():
         alg_info=alg_data_settings['algorithm']['info'],
         alg_template=alg_data_settings['algorithm']['template'],
         alg_flags=alg_data_settings['algorithm']['flags'])
-    # organize dynamic datasets
-    alg_data_dynamic = drv_data_dynamic.organize_data()
     # ------------------------------------------------------------------------------------------------------------------
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -118,8 +116,15 @@ def main():
         alg_template=alg_data_settings['algorithm']['template'],
         alg_flags=alg_data_settings['algorithm']['flags']
     )
-    # execute model
-    driver_model.exec()
+    # check execution mode
+    if driver_model.mode_model == 'pipeline':
+        # organize dynamic datasets and execute model (datasets streamed in memory point by point)
+        driver_model.exec_pipeline(drv_data_dynamic)
+    else:
+        # organize dynamic datasets
+        alg_data_dynamic = drv_data_dynamic.organize_data()
+        # execute model
+        driver_model.exec()
     # view model
     driver_model.view()
     # ------------------------------------------------------------------------------------------------------------------
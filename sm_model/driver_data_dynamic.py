@@ -12,11 +12,16 @@ Version:       '1.5.0'
 import logging
 import os
 
-from lib_data_io_generic import combine_data_point_by_time
+from functools import partial
+
+from lib_data_io_generic import combine_data_point_by_time, organize_data_point_by_fields
 from lib_data_io_csv import read_datasets_csv, write_datasets_csv
+from lib_data_io_parquet import read_datasets_parquet, write_datasets_parquet
+from lib_data_io_cube import organize_datasets_cube, write_datasets_cube
 
 from lib_utils_io import fill_string_with_time, fill_string_with_info
 from lib_utils_generic import make_folder
+from lib_utils_process import exec_process_pool, exec_thread_pool
 
 from lib_info_args import logger_name, time_format_algorithm, time_format_datasets
 
@@ -48,6 +53,8 @@ class DriverData:
         self.alg_datasets_src_airt = alg_data_dynamic['source']['air_temperature']
         self.alg_datasets_src_sm = alg_data_dynamic['source']['soil_moisture']
         self.alg_datasets_dst = alg_data_dynamic['destination']
+        self.alg_datasets_settings = alg_data_dynamic.get('settings', {})
+        self.alg_datasets_cube = alg_data_dynamic.get('cube', {})
         self.alg_template_time = alg_template['time']
         self.alg_template_datasets = alg_template['datasets']
 
@@ -98,11 +105,25 @@ class DriverData:
         self.folder_name_dst = self.alg_datasets_dst['folder_name']
         self.file_name_dst = self.alg_datasets_dst['file_name']
         self.format_dst = self.alg_datasets_dst[self.format_tag]
+        self.float_type_dst = self.alg_datasets_dst.get('float_type', 'float64')
         self.fields_dst = self.alg_datasets_dst[self.fields_tag]
         self.time_dst = self.alg_datasets_dst[self.time_tag]
         self.filters_dst = self.alg_datasets_dst[self.filters_tag]
         self.file_path_dst = os.path.join(self.folder_name_dst, self.file_name_dst)
 
+        # settings object(s)
+        self.mode_dynamic = self.alg_datasets_settings.get('mode', 'serial')
+        self.workers_dynamic = self.alg_datasets_settings.get('workers', 4)
+
+        # cube object(s) (optional store of all the point(s) in a single time x station file)
+        self.cube_active = self.alg_datasets_cube.get('active', False)
+        self.file_path_cube, self.format_cube, self.chunks_cube = None, None, {}
+        if self.cube_active:
+            self.file_path_cube = os.path.join(
+                self.alg_datasets_cube['folder_name'], self.alg_datasets_cube['file_name'])
+            self.format_cube = self.alg_datasets_cube.get('format', 'netcdf')
+            self.chunks_cube = self.alg_datasets_cube.get('chunks', {})
+
     # -------------------------------------------------------------------------------------
 
     # -------------------------------------------------------------------------------------
@@ -137,6 +158,18 @@ class DriverData:
                 file_fields=file_fields, registry_fields=registry_fields,
                 file_decimal='.', **time_fields)
 
+        elif file_format in ['parquet', 'feather']:
+
+            # time fields
+            if time_fields is None:
+                time_fields = {}
+
+            # get datasets in columnar format
+            fields_obj = read_datasets_parquet(
+                file_name,
+                time_reference=self.time_reference, file_format=file_format,
+                file_fields=file_fields, registry_fields=registry_fields, **time_fields)
+
         else:
             # exit with error if file format is not supported
             log_stream.error(' ===> File format "' + file_format + '" is not supported')
@@ -150,7 +183,7 @@ class DriverData:
 
     # -------------------------------------------------------------------------------------
     # method to dump datasets object
-    def dump_obj_datasets(self, file_name, file_dframe, file_format='csv',
+    def dump_obj_datasets(self, file_name, file_dframe, file_format='csv', file_float_type='float64',
                           file_fields=None, time_fields=None, registry_fields=None):
 
         # info start method
@@ -170,6 +203,17 @@ class DriverData:
                 dframe_sep=';', dframe_decimal='.', dframe_float_format='%.3f',
                 dframe_index=True, dframe_header=True)
 
+        elif file_format in ['parquet', 'feather']:
+
+            # dump combined dframe
+            folder_name, _ = os.path.split(file_name)
+            make_folder(folder_name)
+
+            # write datasets in columnar format
+            write_datasets_parquet(
+                file_name, file_dframe, file_fields=file_fields, time_fields=time_fields,
+                file_format=file_format, file_float_type=file_float_type)
+
         else:
             # exit with error if file format is not supported
             log_stream.error(' ===> File format "' + file_format + '" is not supported')
@@ -180,6 +224,44 @@ class DriverData:
 
     # -------------------------------------------------------------------------------------
 
+    # -------------------------------------------------------------------------------------
+    # method to dump cube object (all the point(s) in a single time x station file; point dataframe(s) available in
+    # memory are used, the other point(s) are read from the destination file(s))
+    def dump_obj_cube(self, obj_collections, point_collections=None):
+
+        # get file path
+        file_path_cube = self.__define_file_string(self.file_path_cube)
+
+        # info start method
+        log_stream.info(' -----> Dump cube datasets "' + file_path_cube + '" ... ')
+
+        # get point(s) datasets
+        if point_collections is None:
+            point_collections = {}
+        point_collections = {point_tag: point_dframe for point_tag, point_dframe in point_collections.items()
+                             if point_dframe is not None}
+        for point_tag, file_path_dst_point in obj_collections.items():
+            if point_tag in point_collections:
+                continue
+            point_dframe = self.get_obj_datasets(
+                file_path_dst_point, file_format=self.format_dst, file_delimiter=',', file_mandatory=False,
+                file_fields=None, time_fields=None, registry_fields=None)
+            if point_dframe is not None:
+                point_collections[point_tag] = point_dframe
+
+        # organize and write cube (variable(s) named as the destination field(s))
+        var_list = [self.fields_dst[var_key] for var_key in ['values_k1', 'values_k2', 'values_k3']
+                    if var_key in list(self.fields_dst.keys())]
+        dset_cube = organize_datasets_cube(point_collections, var_list)
+        write_datasets_cube(
+            file_path_cube, dset_cube, file_format=self.format_cube,
+            chunk_time=self.chunks_cube.get('time', 720), chunk_station=self.chunks_cube.get('station', 16))
+
+        # info end method
+        log_stream.info(' -----> Dump cube datasets "' + file_path_cube + '" ... DONE')
+
+    # -------------------------------------------------------------------------------------
+
     # -------------------------------------------------------------------------------------
     # method to define file string
     def __define_file_string(self, file_string_tmpl, extended_info=None):
@@ -201,107 +283,234 @@ class DriverData:
         # method start info
         log_stream.info(' ----> Organize data dynamic object(s) ... ')
 
-        # get time reference
-        time_reference = self.time_reference
         # get data registry
         data_registry = self.data_registry
 
-        # get path(s
-        file_path_src_rain_tmpl = self.file_path_src_rain
-        file_path_src_airt_tmpl = self.file_path_src_airt
-        file_path_src_sm_tmpl = self.file_path_src_sm
-        file_path_dst_tmpl = self.file_path_dst
+        # organize point(s) arguments
+        point_args = {}
+        for fields_data in data_registry.to_dict(orient="records"):
+            point_args[fields_data['tag']] = (fields_data, )
 
-        # get flag(s)
-        reset_data_dynamic = self.reset_data_dynamic
+        # iterate over geo point(s) (if the cube is activated, the point dataframe(s) are kept in memory to build it)
+        fx_point = partial(self.stream_point, dump_data=True) if self.cube_active else self.organize_point
 
-        # iterate over geo point(s)
-        obj_collections = {}
-        for fields_data in data_registry.to_dict(orient="records"):
+        obj_collections, point_collections = {}, {}
+        if self.mode_dynamic == 'serial':
 
-            # get point information
-            point_name, point_tag = fields_data['name'], fields_data['tag']
-
-            # info point start
-            log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag + '" ... ')
-
-            # method to fill the filename(s)
-            file_path_src_rain_point = self.__define_file_string(
-                file_path_src_rain_tmpl, extended_info={'point_name': point_tag})
-            file_path_src_airt_point = self.__define_file_string(
-                file_path_src_airt_tmpl, extended_info={'point_name': point_tag})
-            file_path_src_sm_point = self.__define_file_string(
-                file_path_src_sm_tmpl, extended_info={'point_name': point_tag})
-
-            file_path_dst_point = self.__define_file_string(
-                file_path_dst_tmpl, extended_info={'point_name': point_tag})
-
-            # reset ancillary file if required
-            if reset_data_dynamic:
-                if os.path.exists(file_path_dst_point):
-                    os.remove(file_path_dst_point)
-
-            # check ancillary file availability
-            if not os.path.exists(file_path_dst_point):
-
-                # get rain dataframe
-                dframe_rain = self.get_obj_datasets(
-                    file_path_src_rain_point,
-                    file_format=self.format_rain, file_delimiter=self.delimiter_rain, file_mandatory=True,
-                    time_fields=self.time_rain, file_fields=self.fields_rain, registry_fields=data_registry)
-
-                # get air temperature dataframe
-                dframe_airt = self.get_obj_datasets(
-                    file_path_src_airt_point,
-                    file_format=self.format_airt, file_delimiter=self.delimiter_airt, file_mandatory=True,
-                    time_fields=self.time_airt, file_fields=self.fields_airt, registry_fields=data_registry)
-
-                # get soil moisture dataframe
-                dframe_sm = self.get_obj_datasets(
-                    file_path_src_sm_point,
-                    file_format=self.format_sm, file_delimiter=self.delimiter_sm, file_mandatory=False,
-                    time_fields=self.time_sm, file_fields=self.fields_sm, registry_fields=data_registry)
-
-                # create combined dataframe
-                dframe_combined = combine_data_point_by_time(
-                    dframe_k1=dframe_rain, dframe_k2=dframe_airt, dframe_k3=dframe_sm)
-
-                # check combined dataframe
-                if dframe_combined is not None:
-
-                    # dump combined dataframe
-                    self.dump_obj_datasets(
-                        file_path_dst_point, dframe_combined, file_format=self.format_dst,
-                        file_fields=self.fields_dst, time_fields=self.time_dst, registry_fields=data_registry)
-
-                    # store file path
-                    obj_collections[point_tag] = file_path_dst_point
-
-                    # info point end
-                    log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag +
-                                    '" ... DONE')
-                else:
-                    log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag +
-                                    '" ... SKIPPED. Datasets not available')
+            for point_tag, (fields_data, ) in point_args.items():
+                point_result = fx_point(fields_data)
+                if not self.cube_active:
+                    point_result = (point_result, None)
 
+                file_path_dst_point, point_dframe = point_result
+                if file_path_dst_point is not None:
+                    obj_collections[point_tag], point_collections[point_tag] = file_path_dst_point, point_dframe
+
+        elif self.mode_dynamic in ['thread', 'process']:
+
+            # execute the point(s) over the pool (limited concurrency to preserve the shared filesystem)
+            if self.mode_dynamic == 'thread':
+                point_results = exec_thread_pool(fx_point, point_args, thread_n=self.workers_dynamic)
             else:
+                point_results = exec_process_pool(fx_point, point_args, process_n=self.workers_dynamic)
 
-                # store file path
-                obj_collections[point_tag] = file_path_dst_point
+            point_failed = {}
+            for point_tag, point_result in point_results.items():
+                if point_result['status']:
+                    if not self.cube_active:
+                        point_result['result'] = (point_result['result'], None)
 
-                # info point end
-                log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag +
-                                '" ... SKIPPED. Datasets previously saved')
+                    file_path_dst_point, point_dframe = point_result['result']
+                    if file_path_dst_point is not None:
+                        obj_collections[point_tag], point_collections[point_tag] = file_path_dst_point, point_dframe
+                else:
+                    point_failed[point_tag] = point_result['error']
+
+            # summary of the point(s) failed
+            if point_failed:
+                log_stream.warning(' ===> Organize data dynamic failed for ' + str(len(point_failed)) + ' of ' +
+                                   str(len(point_results)) + ' point(s)')
+                for point_tag, point_error in point_failed.items():
+                    log_stream.warning(' ===> Point "' + point_tag + '" :: Error: ' + str(point_error))
+
+        else:
+            log_stream.error(' ===> Organize mode "' + str(self.mode_dynamic) + '" is not supported')
+            raise NotImplementedError('Case not implemented yet')
 
         # check if datasets are available
         if not obj_collections:
             log_stream.warning(' ===> All datasets are not available. Check your data source(s)')
             obj_collections = None
 
+        # dump cube object (optional)
+        if self.cube_active and obj_collections is not None:
+            self.dump_obj_cube(obj_collections, point_collections)
+
         # method end info
         log_stream.info(' ----> Organize data dynamic object(s) ... DONE')
 
         return obj_collections
     # -------------------------------------------------------------------------------------
 
+    # -------------------------------------------------------------------------------------
+    # method to combine the source datasets of a single point
+    def combine_point(self, point_tag):
+
+        # get data registry
+        data_registry = self.data_registry
+
+        # method to fill the filename(s)
+        file_path_src_rain_point = self.__define_file_string(
+            self.file_path_src_rain, extended_info={'point_name': point_tag})
+        file_path_src_airt_point = self.__define_file_string(
+            self.file_path_src_airt, extended_info={'point_name': point_tag})
+        file_path_src_sm_point = self.__define_file_string(
+            self.file_path_src_sm, extended_info={'point_name': point_tag})
+
+        # get rain dataframe
+        dframe_rain = self.get_obj_datasets(
+            file_path_src_rain_point,
+            file_format=self.format_rain, file_delimiter=self.delimiter_rain, file_mandatory=True,
+            time_fields=self.time_rain, file_fields=self.fields_rain, registry_fields=data_registry)
+
+        # get air temperature dataframe
+        dframe_airt = self.get_obj_datasets(
+            file_path_src_airt_point,
+            file_format=self.format_airt, file_delimiter=self.delimiter_airt, file_mandatory=True,
+            time_fields=self.time_airt, file_fields=self.fields_airt, registry_fields=data_registry)
+
+        # get soil moisture dataframe
+        dframe_sm = self.get_obj_datasets(
+            file_path_src_sm_point,
+            file_format=self.format_sm, file_delimiter=self.delimiter_sm, file_mandatory=False,
+            time_fields=self.time_sm, file_fields=self.fields_sm, registry_fields=data_registry)
+
+        # create combined dataframe
+        dframe_combined = combine_data_point_by_time(
+            dframe_k1=dframe_rain, dframe_k2=dframe_airt, dframe_k3=dframe_sm)
+
+        return dframe_combined
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # method to stream data for a single point (pipeline mode; the combined dataframe is returned in memory with the
+    # layout of the destination file reader and the dump of the destination file is optional)
+    def stream_point(self, fields_data, dump_data=True):
+
+        # get data registry
+        data_registry = self.data_registry
+
+        # get point information
+        point_name, point_tag = fields_data['name'], fields_data['tag']
+
+        # info point start
+        log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag + '" ... ')
+
+        # method to fill the filename(s)
+        file_path_dst_point = self.__define_file_string(
+            self.file_path_dst, extended_info={'point_name': point_tag})
+
+        # reset ancillary file if required
+        if self.reset_data_dynamic:
+            if os.path.exists(file_path_dst_point):
+                os.remove(file_path_dst_point)
+
+        # check ancillary file availability (datasets previously saved are read by the model)
+        if os.path.exists(file_path_dst_point):
+            log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag +
+                            '" ... SKIPPED. Datasets previously saved')
+            return file_path_dst_point, None
+
+        # create combined dataframe
+        dframe_combined = self.combine_point(point_tag)
+
+        # check combined dataframe
+        if dframe_combined is None:
+            log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag +
+                            '" ... SKIPPED. Datasets not available')
+            return None, None
+
+        # dump combined dataframe (optional)
+        if dump_data:
+            self.dump_obj_datasets(
+                file_path_dst_point, dframe_combined.copy(),
+                file_format=self.format_dst, file_float_type=self.float_type_dst,
+                file_fields=self.fields_dst, time_fields=self.time_dst, registry_fields=data_registry)
+
+        # organize combined dataframe as read from the destination file (csv values with the writer precision)
+        dframe_point = organize_data_point_by_fields(
+            dframe_combined, file_fields=self.fields_dst, registry_fields=data_registry,
+            time_reference=self.time_reference,
+            file_float_format='%.2f' if self.format_dst == 'csv' else None,
+            file_float_type=self.float_type_dst if self.format_dst != 'csv' else 'float64')
+
+        # info point end
+        log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag + '" ... DONE')
+
+        return file_path_dst_point, dframe_point
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # method to organize data for a single point
+    def organize_point(self, fields_data):
+
+        # get data registry
+        data_registry = self.data_registry
+
+        # get path(s
+        file_path_dst_tmpl = self.file_path_dst
+
+        # get flag(s)
+        reset_data_dynamic = self.reset_data_dynamic
+
+        # get point information
+        point_name, point_tag = fields_data['name'], fields_data['tag']
+
+        # info point start
+        log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag + '" ... ')
+
+        # method to fill the filename(s)
+        file_path_dst_point = self.__define_file_string(
+            file_path_dst_tmpl, extended_info={'point_name': point_tag})
+
+        # reset ancillary file if required
+        if reset_data_dynamic:
+            if os.path.exists(file_path_dst_point):
+                os.remove(file_path_dst_point)
+
+        # check ancillary file availability
+        if not os.path.exists(file_path_dst_point):
+
+            # create combined dataframe
+            dframe_combined = self.combine_point(point_tag)
+
+            # check combined dataframe
+            if dframe_combined is not None:
+
+                # dump combined dataframe
+                self.dump_obj_datasets(
+                    file_path_dst_point, dframe_combined,
+                    file_format=self.format_dst, file_float_type=self.float_type_dst,
+                    file_fields=self.fields_dst, time_fields=self.time_dst, registry_fields=data_registry)
+
+
+                # info point end
+                log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag +
+                                '" ... DONE')
+            else:
+                log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag +
+                                '" ... SKIPPED. Datasets not available')
+
+                # no datasets available for the point
+                file_path_dst_point = None
+
+        else:
+
+            # info point end
+            log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag +
+                            '" ... SKIPPED. Datasets previously saved')
+
+        return file_path_dst_point
+    # -------------------------------------------------------------------------------------
+
 # -------------------------------------------------------------------------------------
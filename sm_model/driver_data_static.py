@@ -18,6 +18,8 @@ from lib_data_io_pickle import read_obj, write_obj
 
 from lib_utils_io import fill_string_with_time, fill_string_with_info
 from lib_utils_generic import make_folder
+from lib_utils_fingerprint import define_fingerprint, check_fingerprint, define_fingerprint_file, \
+    read_fingerprint, write_fingerprint, remove_fingerprint
 from lib_utils_obj import join_dframe
 
 from lib_info_args import logger_name
@@ -202,6 +204,16 @@ class DriverData:
         return file_string_def
     # -------------------------------------------------------------------------------------
 
+    # -------------------------------------------------------------------------------------
+    # method to define settings fingerprint
+    def __define_settings_fingerprint(self):
+        return {
+            'registry': {'format': self.format_registry, 'fields': self.fields_registry,
+                         'filters': self.filters_registry, 'delimiter': self.delimiter_registry},
+            'parameters': {'format': self.format_params, 'fields': self.fields_params,
+                           'filters': self.filters_params, 'delimiter': self.delimiter_params}}
+    # -------------------------------------------------------------------------------------
+
     # -------------------------------------------------------------------------------------
     # method to organize data
     def organize_data(self):
@@ -225,14 +237,34 @@ class DriverData:
         file_path_src_params_def = self.__define_file_string(file_path_src_params_tmpl)
         file_path_dst_def = self.__define_file_string(file_path_dst_tmpl)
 
+        # fingerprint of the source file(s) and settings (the destination file is rebuilt when they change)
+        file_path_fp_def = define_fingerprint_file(file_path_dst_def)
+        file_list_fp = [file_path_src_registry_def, file_path_src_params_def]
+        settings_fp = self.__define_settings_fingerprint()
+
         # reset destination file if required
         if reset_data_static:
             if os.path.exists(file_path_dst_def):
                 os.remove(file_path_dst_def)
+            remove_fingerprint(file_path_fp_def)
+
+        # check destination file fingerprint
+        if os.path.exists(file_path_dst_def):
+            fp_check, fp_reason, fp_obj = check_fingerprint(
+                read_fingerprint(file_path_fp_def), file_list_fp, settings_fp)
+            if not fp_check:
+                log_stream.info(' -----> Datasets previously saved are not valid (' + fp_reason + '). Rebuild')
+                os.remove(file_path_dst_def)
+                remove_fingerprint(file_path_fp_def)
+        else:
+            fp_obj = None
 
         # check ancillary file availability
         if not os.path.exists(file_path_dst_def):
 
+            # get source fingerprint (before reading the file(s) to catch update(s) during the run)
+            fp_obj = define_fingerprint(file_list_fp, settings_fp)
+
             # get registry obj
             obj_registry = self.get_obj_registry(
                 file_path_src_registry_def, self.fields_registry, self.filters_registry)
@@ -246,13 +278,17 @@ class DriverData:
             # organize destination obj
             obj_collections = {'registry': obj_registry}
 
-            # dump destination obj
+            # dump destination obj and fingerprint
             self.dump_obj_collections(file_path_dst_def, obj_collections)
+            write_fingerprint(file_path_fp_def, fp_obj)
 
             # method end info
             log_stream.info(' ----> Organize data static object(s) ... DONE')
 
         else:
+            # update fingerprint if file(s) are touched without changes (to skip the hash at the next run)
+            if fp_obj != read_fingerprint(file_path_fp_def):
+                write_fingerprint(file_path_fp_def, fp_obj)
             # read source obj
             obj_collections = self.read_obj_collections(file_path_dst_def)
             # method end info
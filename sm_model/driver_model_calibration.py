@@ -0,0 +1,232 @@
+"""
+Class Features
+
+Name:          driver_model_calibration
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20241120'
+Version:       '1.0.0'
+"""
+
+# -------------------------------------------------------------------------------------
+# libraries
+import logging
+import os
+import pandas as pd
+
+from lib_data_io_csv import read_datasets_csv
+from lib_data_io_parquet import read_datasets_parquet
+
+from lib_utils_io import fill_string_with_time, fill_string_with_info
+from lib_utils_generic import make_folder
+from lib_utils_process import define_process_n, exec_process_pool
+
+from lib_model_utils import filter_model_data, organize_model_data, organize_model_parameters
+from lib_model_calibration import calibrate_model_de, params_list_default, params_bounds_default
+
+from lib_info_args import logger_name
+
+# logging
+log_stream = logging.getLogger(logger_name)
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# class driver calibration
+class DriverCalibration:
+
+    # -------------------------------------------------------------------------------------
+    # initialize class
+    def __init__(self, time_reference, alg_data_static, alg_datasets_static, alg_data_dynamic,
+                 alg_calibration, alg_info, alg_template):
+
+        # set time reference
+        self.time_reference = time_reference
+
+        # set data static object(s)
+        self.data_registry = alg_data_static['registry']
+
+        # set algorithm information
+        self.alg_info = alg_info
+        self.alg_model_data = alg_data_dynamic['destination']
+        self.alg_params_src = alg_datasets_static['source']['parameters']
+        self.alg_calibration_settings = alg_calibration.get('settings', {})
+        self.alg_calibration_bounds = alg_calibration.get('bounds', params_bounds_default)
+        self.alg_calibration_dst = alg_calibration['destination']
+        self.alg_template_time = alg_template['time']
+        self.alg_template_datasets = alg_template['datasets']
+
+        # model data object(s)
+        self.fields_data = self.alg_model_data['fields']
+        self.format_data = self.alg_model_data.get('format', 'csv')
+        self.file_path_data = os.path.join(self.alg_model_data['folder_name'], self.alg_model_data['file_name'])
+
+        # parameters source object(s)
+        self.fields_params = self.alg_params_src['fields']
+        self.delimiter_params = self.alg_params_src.get('delimiter', ',')
+        self.file_path_params_src = os.path.join(self.alg_params_src['folder_name'], self.alg_params_src['file_name'])
+        # parameters destination object(s)
+        self.file_path_params_dst = os.path.join(
+            self.alg_calibration_dst['folder_name'], self.alg_calibration_dst['file_name'])
+
+        # calibration settings
+        self.objective = self.alg_calibration_settings.get('objective', 'kge')
+        self.population_size = self.alg_calibration_settings.get('population_size', 40)
+        self.generations = self.alg_calibration_settings.get('generations', 100)
+        self.mutation = self.alg_calibration_settings.get('mutation', 0.7)
+        self.crossover = self.alg_calibration_settings.get('crossover', 0.9)
+        self.tolerance = self.alg_calibration_settings.get('tolerance', 1e-6)
+        self.seed = self.alg_calibration_settings.get('seed', None)
+        self.workers = self.alg_calibration_settings.get('workers', None)
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # method to define file string
+    def __define_file_string(self, file_string_tmpl, extended_info=None):
+
+        if extended_info is not None:
+            alg_info = {**self.alg_info, **extended_info}
+        else:
+            alg_info = self.alg_info
+
+        file_string_def = fill_string_with_time(file_string_tmpl, self.time_reference, self.alg_template_time)
+        file_string_def = fill_string_with_info(file_string_def, alg_info, self.alg_template_datasets)
+        return file_string_def
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # method to calibrate a single point
+    def calibrate_point(self, fields_registry):
+
+        # get point information
+        point_name, point_tag = fields_registry['name'], fields_registry['tag']
+
+        # info point start
+        log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag + '" ... ')
+
+        # method to fill the filename(s)
+        file_path_data_point = self.__define_file_string(self.file_path_data, extended_info={'point_name': point_tag})
+
+        # check data file availability
+        if not os.path.exists(file_path_data_point):
+            log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag +
+                            '" ... SKIPPED. Datasets not available')
+            return None
+
+        # get and organize model data
+        if self.format_data in ['parquet', 'feather']:
+            dframe_data = read_datasets_parquet(
+                file_path_data_point, time_reference=self.time_reference,
+                file_fields=None, registry_fields=None, file_format=self.format_data)
+        else:
+            dframe_data = read_datasets_csv(
+                file_path_data_point, time_reference=self.time_reference,
+                file_fields=None, registry_fields=None, file_sep=',', file_decimal='.')
+        dframe_data = filter_model_data(dframe_data, dframe_fields=self.fields_data)
+        values_data, values_time = organize_model_data(dframe_data)
+        # organize model parameters (used as values for the fixed parameters)
+        values_params = organize_model_parameters(fields_registry)
+
+        # calibrate model parameters
+        params_best, score_best, generation_n = calibrate_model_de(
+            values_time, values_data, values_params,
+            params_bounds=self.alg_calibration_bounds, params_list=params_list_default, objective=self.objective,
+            population_size=self.population_size, generations=self.generations,
+            mutation=self.mutation, crossover=self.crossover, tolerance=self.tolerance, seed=self.seed)
+
+        # info point end
+        log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag +
+                        '" ... DONE [' + self.objective.upper() + ': ' + '{:.3f}'.format(score_best) +
+                        ' :: Generations: ' + str(generation_n) + ']')
+
+        return {'params': dict(zip(params_list_default, params_best.tolist())), 'score': float(score_best)}
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # method to dump the calibrated parameters (same layout of the source parameters file)
+    def dump_obj_parameters(self, file_name_src, file_name_dst, point_params):
+
+        # info start method
+        log_stream.info(' -----> Dump calibrated parameters "' + file_name_dst + '" ... ')
+
+        # get source parameters table
+        dframe_params = pd.read_table(file_name_src, sep=self.delimiter_params)
+        dframe_params.columns = dframe_params.columns.str.strip()
+
+        # map parameters name to the file columns (case insensitive on the fields keys)
+        fields_map = {field_key.lower(): field_value for field_key, field_value in self.fields_params.items()}
+        column_tag = fields_map.get('tag', 'Tag')
+        values_tag = dframe_params[column_tag].astype(str).str.strip()
+
+        # update parameters by point tag
+        for point_tag, point_obj in point_params.items():
+            mask_tag = (values_tag == point_tag).values
+            if not mask_tag.any():
+                log_stream.warning(' ===> Point "' + point_tag + '" not found in the parameters table')
+                continue
+            for params_name, params_value in point_obj['params'].items():
+                column_params = fields_map.get(params_name)
+                if column_params is not None and column_params in dframe_params.columns:
+                    dframe_params.loc[mask_tag, column_params] = round(params_value, 4)
+
+        # dump parameters table
+        folder_name, _ = os.path.split(file_name_dst)
+        make_folder(folder_name)
+        dframe_params.to_csv(file_name_dst, sep=self.delimiter_params, index=False)
+
+        # info end method
+        log_stream.info(' -----> Dump calibrated parameters "' + file_name_dst + '" ... DONE')
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # method to execute calibration
+    def exec(self):
+
+        # method start info
+        log_stream.info(' ----> Execution calibration ... ')
+
+        # organize point(s) arguments
+        point_args = {}
+        for fields_registry in self.data_registry.to_dict(orient="records"):
+            point_args[fields_registry['tag']] = (fields_registry, )
+
+        # calibrate point(s) (candidates are evaluated with the batched model; points over the process pool)
+        process_n = define_process_n(self.workers, process_max=len(point_args))
+        point_params, point_failed = {}, {}
+        if process_n == 1:
+            for point_tag, (fields_registry, ) in point_args.items():
+                point_obj = self.calibrate_point(fields_registry)
+                if point_obj is not None:
+                    point_params[point_tag] = point_obj
+        else:
+            point_results = exec_process_pool(self.calibrate_point, point_args, process_n=process_n)
+            for point_tag, point_result in point_results.items():
+                if point_result['status']:
+                    if point_result['result'] is not None:
+                        point_params[point_tag] = point_result['result']
+                else:
+                    point_failed[point_tag] = point_result['error']
+
+        # summary of the point(s) failed
+        for point_tag, point_error in point_failed.items():
+            log_stream.warning(' ===> Point "' + point_tag + '" :: Calibration failed :: Error: ' + str(point_error))
+
+        # dump calibrated parameters
+        if point_params:
+            file_path_params_src = self.__define_file_string(self.file_path_params_src)
+            file_path_params_dst = self.__define_file_string(self.file_path_params_dst)
+            self.dump_obj_parameters(file_path_params_src, file_path_params_dst, point_params)
+
+            # method end info
+            log_stream.info(' ----> Execution calibration ... DONE')
+        else:
+            # method end info
+            log_stream.info(' ----> Execution calibration ... SKIPPED. Datasets not available')
+
+        return point_params
+
+    # -------------------------------------------------------------------------------------
+
+# -------------------------------------------------------------------------------------
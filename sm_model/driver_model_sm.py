@@ -11,16 +11,30 @@ Version:       '1.0.0'
 # libraries
 import logging
 import os
+import numpy as np
+
+from functools import partial
 
 from lib_data_io_csv import read_datasets_csv, write_datasets_csv, write_metrics_csv
+from lib_data_io_parquet import read_datasets_parquet, write_datasets_parquet
+from lib_data_io_cube import organize_datasets_cube, write_datasets_cube
 
 from lib_utils_io import fill_string_with_time, fill_string_with_info
 from lib_utils_generic import make_folder
 
-from lib_model_utils import (filter_model_data, organize_model_data, organize_model_parameters,
-                             organize_model_results, organize_model_metrics, plot_model_results)
+from lib_model_utils import (filter_model_data, organize_model_data, organize_model_batch,
+                             organize_model_parameters, merge_model_results,
+                             organize_model_results, organize_model_metrics)
+from lib_model_figure import (plot_model_results, define_figure_settings, define_figure_fingerprint,
+                              check_figure_updated, save_figure_fingerprint, remove_figure)
 
 from lib_model_core import SMestim_IE_03 as fx_sm_model
+from lib_model_core import SMestim_IE_03_batch as fx_sm_model_batch
+from lib_model_kernel import engine_default
+from lib_model_metrics import compute_metrics_stats, compute_metrics_from_stats, merge_metrics_stats
+from lib_model_state import check_model_state, organize_model_state, read_model_state, write_model_state
+
+from lib_utils_process import define_process_n, exec_process_pool, exec_pipeline_pool
 
 from lib_info_args import logger_name
 
@@ -54,6 +68,7 @@ class DriverModel:
         self.alg_model_results = alg_model['results']
         self.alg_model_metrics = alg_model['metrics']
         self.alg_model_figure = alg_model['figure']
+        self.alg_model_settings = alg_model.get('settings', {})
         self.alg_template_time = alg_template['time']
         self.alg_template_datasets = alg_template['datasets']
 
@@ -79,6 +94,7 @@ class DriverModel:
         self.folder_name_results = self.alg_model_results['folder_name']
         self.file_name_results = self.alg_model_results['file_name']
         self.format_results = self.alg_model_results[self.format_tag]
+        self.float_type_results = self.alg_model_results.get('float_type', 'float64')
         self.time_results = self.alg_model_results[self.time_tag]
         self.fields_results = self.alg_model_results[self.fields_tag]
         self.file_path_results = os.path.join(self.folder_name_results, self.file_name_results)
@@ -101,6 +117,36 @@ class DriverModel:
         self.spacing_x_figure = {'type': 'days', 'offset': 5}
         self.dpi_figure = 150
         self.show_figure = False
+        # model figure settings (figures rendered over a process pool in parallel mode)
+        self.mode_figure = self.alg_model_figure.get('mode', 'sequential')
+        self.workers_figure = self.alg_model_figure.get('workers', None)
+
+        # model settings object(s)
+        self.engine_model = self.alg_model_settings.get('engine', engine_default)
+        self.mode_model = self.alg_model_settings.get('mode', 'point')
+        self.workers_model = self.alg_model_settings.get('workers', None)
+        # model pipeline object(s) (dynamic datasets streamed in memory to the model)
+        self.alg_model_pipeline = self.alg_model_settings.get('pipeline', {})
+        self.dump_data_pipeline = self.alg_model_pipeline.get('dump_data', True)
+        self.queue_pipeline = self.alg_model_pipeline.get('queue', None)
+
+        # model state object(s) (warm start)
+        self.alg_model_state = alg_model.get('state', {})
+        self.state_active = self.alg_model_state.get('active', False)
+        self.file_path_state = None
+        if self.state_active:
+            self.file_path_state = self.__define_file_string(
+                os.path.join(self.alg_model_state['folder_name'], self.alg_model_state['file_name']))
+        self.state_collections = {}
+
+        # cube object(s) (optional store of all the point(s) in a single time x station file)
+        self.alg_model_cube = alg_data_dynamic.get('cube', {})
+        self.cube_active = self.alg_model_cube.get('active', False)
+        self.file_path_cube, self.format_cube, self.chunks_cube = None, None, {}
+        if self.cube_active:
+            self.file_path_cube = os.path.join(self.alg_model_cube['folder_name'], self.alg_model_cube['file_name'])
+            self.format_cube = self.alg_model_cube.get('format', 'netcdf')
+            self.chunks_cube = self.alg_model_cube.get('chunks', {})
 
     # -------------------------------------------------------------------------------------
 
@@ -131,6 +177,18 @@ class DriverModel:
                 file_fields=file_fields, registry_fields=registry_fields,
                 file_sep=',', file_decimal='.', **time_fields)
 
+        elif file_format in ['parquet', 'feather']:
+
+            # time fields
+            if time_fields is None:
+                time_fields = {}
+
+            # get datasets in columnar format
+            fields_obj = read_datasets_parquet(
+                file_name,
+                time_reference=self.time_reference, file_format=file_format,
+                file_fields=file_fields, registry_fields=registry_fields, **time_fields)
+
         else:
             # exit with error if file format is not supported
             log_stream.error(' ===> File format "' + file_format + '" is not supported')
@@ -144,7 +202,7 @@ class DriverModel:
 
     # -------------------------------------------------------------------------------------
     # method to dump datasets object
-    def dump_obj_datasets(self, file_name, file_dframe, file_format='csv',
+    def dump_obj_datasets(self, file_name, file_dframe, file_format='csv', file_float_type='float64',
                           file_fields=None, time_fields=None, registry_fields=None):
 
         # info start method
@@ -164,6 +222,17 @@ class DriverModel:
                 dframe_sep=';', dframe_decimal='.', dframe_float_format='%.3f',
                 dframe_index=True, dframe_header=True)
 
+        elif file_format in ['parquet', 'feather']:
+
+            # dump combined dframe
+            folder_name, _ = os.path.split(file_name)
+            make_folder(folder_name)
+
+            # write datasets in columnar format
+            write_datasets_parquet(
+                file_name, file_dframe, file_fields=file_fields, time_fields=time_fields,
+                file_format=file_format, file_float_type=file_float_type)
+
         else:
             # exit with error if file format is not supported
             log_stream.error(' ===> File format "' + file_format + '" is not supported')
@@ -229,6 +298,88 @@ class DriverModel:
 
     # ------------------------------------------------------------------------------------
 
+    # -------------------------------------------------------------------------------------
+    # method to get model state object
+    def get_obj_state(self):
+
+        self.state_collections = {}
+        if self.state_active:
+
+            # info start method
+            log_stream.info(' -----> Read model state "' + self.file_path_state + '" ... ')
+            # get state collections
+            self.state_collections = read_model_state(self.file_path_state)
+            # info end method
+            log_stream.info(' -----> Read model state "' + self.file_path_state + '" ... DONE [Points: ' +
+                            str(len(self.state_collections)) + ']')
+
+        return self.state_collections
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # method to dump model state object
+    def dump_obj_state(self, point_states):
+
+        if self.state_active:
+
+            # info start method
+            log_stream.info(' -----> Dump model state "' + self.file_path_state + '" ... ')
+
+            # update state collections with the point(s) executed in the current run
+            state_collections = dict(self.state_collections)
+            for point_tag, point_state in point_states.items():
+                if point_state is not None:
+                    state_collections[point_tag] = point_state
+            write_model_state(self.file_path_state, state_collections)
+            self.state_collections = state_collections
+
+            # info end method
+            log_stream.info(' -----> Dump model state "' + self.file_path_state + '" ... DONE')
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # method to dump cube object (model results of all the point(s) in a single time x station file)
+    def dump_obj_cube(self):
+
+        if self.cube_active:
+
+            # get file path
+            file_path_cube = self.__define_file_string(self.file_path_cube)
+
+            # info start method
+            log_stream.info(' -----> Dump cube datasets "' + file_path_cube + '" ... ')
+
+            # get point(s) results
+            point_collections = {}
+            for fields_registry in self.data_registry.to_dict(orient="records"):
+                point_tag = fields_registry['tag']
+                file_path_results_point = self.__define_file_string(
+                    self.file_path_results, extended_info={'point_name': point_tag})
+                if os.path.exists(file_path_results_point):
+                    point_collections[point_tag] = self.get_obj_datasets(
+                        file_path_results_point, file_format=self.format_results,
+                        time_fields=None, file_fields=None, registry_fields=None)
+
+            # organize and write cube (variable(s) named as the results field(s))
+            if point_collections:
+                var_list = [self.fields_results[var_key] for var_key in ['values_k3', 'values_model']
+                            if var_key in list(self.fields_results.keys())]
+                dset_cube = organize_datasets_cube(point_collections, var_list)
+                write_datasets_cube(
+                    file_path_cube, dset_cube, file_format=self.format_cube,
+                    chunk_time=self.chunks_cube.get('time', 720), chunk_station=self.chunks_cube.get('station', 16))
+
+                # info end method
+                log_stream.info(' -----> Dump cube datasets "' + file_path_cube + '" ... DONE')
+            else:
+                # info end method
+                log_stream.info(' -----> Dump cube datasets "' + file_path_cube +
+                                '" ... SKIPPED. Results not available')
+
+    # -------------------------------------------------------------------------------------
+
     # -------------------------------------------------------------------------------------
     # method to define file string
     def __define_file_string(self, file_string_tmpl, extended_info=None):
@@ -247,15 +398,180 @@ class DriverModel:
     # method to execution model
     def exec(self):
 
+        # check execution mode
+        if self.mode_model == 'batch':
+            self.exec_batch()
+            return
+        elif self.mode_model == 'parallel':
+            self.exec_parallel()
+            return
+        elif self.mode_model == 'pipeline':
+            log_stream.error(' ===> Execution mode "pipeline" needs the dynamic driver. Use the pipeline method')
+            raise RuntimeError('Execution mode not available by the exec method')
+        elif self.mode_model != 'point':
+            log_stream.error(' ===> Execution mode "' + str(self.mode_model) + '" is not supported')
+            raise NotImplementedError('Case not implemented yet')
+
         # method start info
         log_stream.info(' ----> Execution model ... ')
 
+        # get data object(s)
+        data_registry = self.data_registry
+
+        # get model state object(s)
+        self.get_obj_state()
+
+        # iterate over geo point(s)
+        point_states = {}
+        for fields_registry in data_registry.to_dict(orient="records"):
+
+            # debug (jesi == 2 in this case
+            # fields_registry = data_registry.iloc[2].to_dict()
+
+            # execute model for the point
+            point_states[fields_registry['tag']] = self.exec_point(fields_registry)
+
+        # dump model state object(s)
+        self.dump_obj_state(point_states)
+        # dump cube object (optional)
+        self.dump_obj_cube()
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # method to execution model (parallel mode, points distributed over a process pool)
+    def exec_parallel(self):
+
+        # method start info
+        log_stream.info(' ----> Execution model [parallel] ... ')
+
+        # get data object(s)
+        data_registry = self.data_registry
+
+        # organize point(s) arguments
+        point_args = {}
+        for fields_registry in data_registry.to_dict(orient="records"):
+            point_args[fields_registry['tag']] = (fields_registry, )
+
+        # get model state object(s)
+        self.get_obj_state()
+
+        # execute model over the process pool
+        process_n = define_process_n(self.workers_model, process_max=len(point_args))
+        log_stream.info(' -----> Points: ' + str(len(point_args)) + ' :: Workers: ' + str(process_n))
+
+        point_results = exec_process_pool(self.exec_point, point_args, process_n=process_n)
+
+        # dump model state object(s) (collected in the main process)
+        self.dump_obj_state(
+            {point_tag: point_result['result'] for point_tag, point_result in point_results.items()
+             if point_result['status']})
+        # dump cube object (optional)
+        self.dump_obj_cube()
+
+        # summary of the point(s) failed
+        point_failed = {point_tag: point_result['error'] for point_tag, point_result in point_results.items()
+                        if not point_result['status']}
+        if point_failed:
+            log_stream.warning(' ===> Execution model failed for ' + str(len(point_failed)) + ' of ' +
+                               str(len(point_results)) + ' point(s)')
+            for point_tag, point_error in point_failed.items():
+                log_stream.warning(' ===> Point "' + point_tag + '" :: Error: ' + str(point_error))
+
+            # method end info
+            log_stream.info(' ----> Execution model [parallel] ... DONE. Some points failed')
+        else:
+            # method end info
+            log_stream.info(' ----> Execution model [parallel] ... DONE')
+
+        return point_results
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # method to execution model (pipeline mode, dynamic datasets organized in threads and streamed in memory to the
+    # model point by point)
+    def exec_pipeline(self, driver_data_dynamic):
+
+        # method start info
+        log_stream.info(' ----> Execution model [pipeline] ... ')
+
+        # get data object(s)
+        data_registry = self.data_registry
+
+        # get dump flag
+        dump_data = self.dump_data_pipeline
+
+        # organize point(s) arguments
+        point_args = {}
+        for fields_registry in data_registry.to_dict(orient="records"):
+            point_args[fields_registry['tag']] = (fields_registry, )
+
+        # get model state object(s)
+        self.get_obj_state()
+
+        # execute dynamic datasets (thread or process pool) and model (main process) over the point(s)
+        worker_type = 'process' if driver_data_dynamic.mode_dynamic == 'process' else 'thread'
+        worker_n = define_process_n(driver_data_dynamic.workers_dynamic, process_max=len(point_args))
+        log_stream.info(' -----> Points: ' + str(len(point_args)) + ' :: Workers: ' + str(worker_n) +
+                        ' [' + worker_type + ']')
+
+        # keep the streamed dataframe(s) in memory if the cube object is activated
+        point_collections = None
+        fx_consumer = self.exec_point
+        if driver_data_dynamic.cube_active:
+            point_collections = {}
+            fx_consumer = partial(self.exec_point_stream, point_collections=point_collections)
+
+        point_results = exec_pipeline_pool(
+            partial(driver_data_dynamic.stream_point, dump_data=dump_data),
+            fx_consumer, point_args, worker_n=worker_n, worker_type=worker_type, queue_n=self.queue_pipeline)
+
+        # dump model state object(s)
+        self.dump_obj_state(
+            {point_tag: point_result['result'] for point_tag, point_result in point_results.items()
+             if point_result['status']})
+
+        # dump cube object(s) (optional; streamed dataframe(s) in memory or data file(s) previously saved)
+        if driver_data_dynamic.cube_active:
+            obj_collections = {point_tag: file_path_data_point
+                               for point_tag, (file_path_data_point, point_dframe) in point_collections.items()
+                               if point_dframe is not None or os.path.exists(file_path_data_point)}
+            if obj_collections:
+                driver_data_dynamic.dump_obj_cube(
+                    obj_collections,
+                    {point_tag: point_dframe for point_tag, (_, point_dframe) in point_collections.items()})
+        self.dump_obj_cube()
+
+        # summary of the point(s) failed
+        point_failed = {point_tag: point_result['error'] for point_tag, point_result in point_results.items()
+                        if not point_result['status']}
+        if point_failed:
+            log_stream.warning(' ===> Execution model failed for ' + str(len(point_failed)) + ' of ' +
+                               str(len(point_results)) + ' point(s)')
+            for point_tag, point_error in point_failed.items():
+                log_stream.warning(' ===> Point "' + point_tag + '" :: Error: ' + str(point_error))
+
+            # method end info
+            log_stream.info(' ----> Execution model [pipeline] ... DONE. Some points failed')
+        else:
+            # method end info
+            log_stream.info(' ----> Execution model [pipeline] ... DONE')
+
+        return point_results
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # method to execution model for a single point (point data: data file path and dataframe streamed in memory;
+    # if not defined the dataframe is read from the data file)
+    def exec_point(self, fields_registry, point_data=None):
+
         # get time reference
         time_step_reference = self.time_reference
 
         # get data object(s)
         data_registry = self.data_registry
-        data_vars = self.data_vars
 
         # get path(s
         file_path_data_tmpl = self.file_path_data
@@ -267,11 +583,186 @@ class DriverModel:
         reset_model_results = self.reset_model_results
         reset_model_metrics = self.reset_model_metrics
 
-        # iterate over geo point(s)
-        for fields_registry in data_registry.to_dict(orient="records"):
+        # get point information
+        point_name, point_tag = fields_registry['name'], fields_registry['tag']
+        point_state = None
+
+        # info point start
+        log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag + '" ... ')
+
+        # method to fill the filename(s)
+        file_path_data_point = self.__define_file_string(
+            file_path_data_tmpl, extended_info={'point_name': point_tag})
+        file_path_results_point = self.__define_file_string(
+            file_path_results_tmpl, extended_info={'point_name': point_tag})
+        file_path_metrics_point = self.__define_file_string(
+            file_path_metrics_tmpl, extended_info={'point_name': point_tag})
+        file_path_figure_point = self.__define_file_string(
+            file_path_figure_tmpl, extended_info={'point_name': point_tag})
+
+        # reset ancillary file if required
+        if reset_model_results or reset_model_metrics:
+            if os.path.exists(file_path_results_point):
+                os.remove(file_path_results_point)
+            if os.path.exists(file_path_metrics_point):
+                os.remove(file_path_metrics_point)
+            remove_figure(file_path_figure_point)
+
+        # get dataframe streamed in memory (pipeline mode)
+        dframe_data = None
+        if point_data is not None:
+            _, dframe_data = point_data
+
+        # check results file availability
+        if not os.path.exists(file_path_results_point):
+
+            # check data file availability
+            if dframe_data is not None or os.path.exists(file_path_data_point):
+
+                # get dataframe obj
+                if dframe_data is None:
+                    dframe_data = self.get_obj_datasets(
+                        file_path_data_point, file_format=self.format_data,
+                        time_fields=None,
+                        file_fields=None, registry_fields=data_registry)
 
-            # debug (jesi == 2 in this case
-            # fields_registry = data_registry.iloc[2].to_dict()
+                # filter model data
+                dframe_data = filter_model_data(dframe_data, dframe_fields=self.fields_data)
+                # organize model data
+                values_data, values_time = organize_model_data(dframe_data)
+                # organize model parameters
+                values_params = organize_model_parameters(fields_registry)
+
+                # get model state (warm start) if active and consistent with the point datasets
+                point_state_prev, point_state_valid = None, False
+                if self.state_active:
+                    point_state_prev = self.state_collections.get(point_tag, None)
+                    point_state_valid, point_state_reason = check_model_state(
+                        point_state_prev, values_params, values_time)
+                    if not point_state_valid:
+                        log_stream.info(' -----> Model state not used: ' + point_state_reason +
+                                        '. Execute model over the full period')
+
+                if not point_state_valid:
+
+                    # apply sm model (full period)
+                    (values_theta, values_ns, values_ns_ln_q, values_ns_rad_q,
+                     values_kge, values_rmse, values_rq, state_w, state_dt) = fx_sm_model(
+                        values_time, values_data, values_params, engine=self.engine_model, return_state=True)
+
+                    # organize result object
+                    dframe_result = organize_model_results(
+                        dframe_data, values_theta, values_time, dframe_fields=self.fields_results)
+
+                    # compute metrics statistics (stored in the model state)
+                    metrics_stats = compute_metrics_stats(values_theta, values_data[:, 2])
+
+                else:
+
+                    # select the new step(s) since the model state
+                    mask_new = values_time > point_state_prev['time_last']
+                    state_w, state_dt = point_state_prev['state_w'], point_state_prev['dt']
+
+                    log_stream.info(' -----> Model state used: warm start from "' +
+                                    str(point_state_prev['time_last']) + '" :: New steps: ' + str(int(mask_new.sum())))
+
+                    # apply sm model (new steps only)
+                    dframe_result_new, metrics_stats = None, point_state_prev['metrics_stats']
+                    if mask_new.any():
+                        values_theta_new, _, _, _, _, _, _, state_w, state_dt = fx_sm_model(
+                            values_time[mask_new], values_data[mask_new], values_params, engine=self.engine_model,
+                            dt=state_dt, W_init=state_w, return_state=True)
+                        dframe_result_new = organize_model_results(
+                            dframe_data[mask_new], values_theta_new, values_time[mask_new],
+                            dframe_fields=self.fields_results)
+                        metrics_stats = merge_metrics_stats(
+                            metrics_stats, compute_metrics_stats(values_theta_new, values_data[mask_new, 2]))
+
+                    # merge previous and new result object(s)
+                    dframe_result_prev = self.get_obj_datasets(
+                        point_state_prev['file_results'], file_format=self.format_results,
+                        time_fields=None, file_fields=None, registry_fields=fields_registry)
+                    dframe_result = merge_model_results(dframe_result_prev, dframe_result_new)
+
+                    # compute metrics over the full period (updated statistics, full precision values)
+                    (values_ns, values_ns_ln_q, values_ns_rad_q,
+                     values_kge, values_rmse, values_rq) = compute_metrics_from_stats(metrics_stats)
+
+                # organize model state
+                point_state = organize_model_state(
+                    state_w, values_time[-1], state_dt, values_params, file_path_results_point, metrics_stats)
+
+                # dump result object
+                self.dump_obj_datasets(
+                    file_path_results_point, dframe_result,
+                    file_format=self.format_results, file_float_type=self.float_type_results,
+                    file_fields=self.fields_results, time_fields=self.time_results, registry_fields=fields_registry)
+
+                # dump metrics object
+                dframe_metrics = organize_model_metrics(
+                    data_metrics={
+                        'ns': values_ns, 'ns_ln_q': values_ns_ln_q, 'ns_rad_q': values_ns_rad_q,
+                        'kge': values_kge, 'rmse': values_rmse, 'rq': values_rq},
+                    data_time={'time': time_step_reference},
+                    data_registry=fields_registry,
+                    data_fields=self.fields_metrics)
+
+                # dump metrics object
+                self.dump_obj_metrics(file_path_metrics_point, dframe_metrics, file_format=self.format_metrics)
+
+                # method start info
+                log_stream.info(' ----> Execution model ... DONE')
+
+        else:
+
+            # method end info
+            log_stream.info(' ----> Execution model ... DONE. Datasets previously saved')
+
+        return point_state
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # method to execution model for a single point and keep the streamed point data (pipeline mode with cube object)
+    def exec_point_stream(self, fields_registry, point_data, point_collections=None):
+
+        if point_collections is not None and point_data[0] is not None:
+            point_collections[fields_registry['tag']] = point_data
+
+        return self.exec_point(fields_registry, point_data)
+
+    # -------------------------------------------------------------------------------------
+
+    # -------------------------------------------------------------------------------------
+    # method to execution model (batch mode, all the points at once; if the model state is active, the points with a
+    # valid state are not stacked and advance only the new steps as in the point mode)
+    def exec_batch(self):
+
+        # method start info
+        log_stream.info(' ----> Execution model [batch] ... ')
+
+        # get time reference
+        time_step_reference = self.time_reference
+
+        # get data object(s)
+        data_registry = self.data_registry
+
+        # get path(s
+        file_path_data_tmpl = self.file_path_data
+        file_path_results_tmpl = self.file_path_results
+        file_path_metrics_tmpl = self.file_path_metrics
+        file_path_figure_tmpl = self.file_path_figure
+
+        # get flag(s)
+        reset_model_results = self.reset_model_results
+        reset_model_metrics = self.reset_model_metrics
+
+        # get model state object(s)
+        self.get_obj_state()
+
+        # iterate over geo point(s) to collect the model data
+        point_collections, point_warm = {}, {}
+        for fields_registry in data_registry.to_dict(orient="records"):
 
             # get point information
             point_name, point_tag = fields_registry['name'], fields_registry['tag']
@@ -295,60 +786,127 @@ class DriverModel:
                     os.remove(file_path_results_point)
                 if os.path.exists(file_path_metrics_point):
                     os.remove(file_path_metrics_point)
-                if os.path.exists(file_path_figure_point):
-                    os.remove(file_path_figure_point)
+                remove_figure(file_path_figure_point)
 
-            # check results file availability
+            # check results and data file availability
             if not os.path.exists(file_path_results_point):
-
-                # check data file availability
                 if os.path.exists(file_path_data_point):
 
                     # get dataframe obj
                     dframe_data = self.get_obj_datasets(
-                        file_path_data_point, file_format='csv',
+                        file_path_data_point, file_format=self.format_data,
                         time_fields=None,
                         file_fields=None, registry_fields=data_registry)
 
                     # filter model data
+                    point_data = (file_path_data_point, dframe_data)
                     dframe_data = filter_model_data(dframe_data, dframe_fields=self.fields_data)
                     # organize model data
                     values_data, values_time = organize_model_data(dframe_data)
                     # organize model parameters
                     values_params = organize_model_parameters(fields_registry)
 
-                    # apply sm model
-                    (values_theta, values_ns, values_ns_ln_q, values_ns_rad_q,
-                     values_kge, values_rmse, values_rq) = fx_sm_model(values_time, values_data, values_params)
-
-                    # organize result object
-                    dframe_result = organize_model_results(
-                        dframe_data, values_theta, values_time, dframe_fields=self.fields_results)
-
-                    # dump result object
-                    self.dump_obj_datasets(
-                        file_path_results_point, dframe_result, file_format=self.format_results,
-                        file_fields=self.fields_results, time_fields=self.time_results, registry_fields=fields_registry)
-
-                    # dump metrics object
-                    dframe_metrics = organize_model_metrics(
-                        data_metrics={
-                            'ns': values_ns, 'ns_ln_q': values_ns_ln_q, 'ns_rad_q': values_ns_rad_q,
-                            'kge': values_kge, 'rmse': values_rmse, 'rq': values_rq},
-                        data_time={'time': time_step_reference},
-                        data_registry=fields_registry,
-                        data_fields=self.fields_metrics)
-
-                    # dump metrics object
-                    self.dump_obj_metrics(file_path_metrics_point, dframe_metrics, file_format=self.format_metrics)
-
-                    # method start info
-                    log_stream.info(' ----> Execution model ... DONE')
-
+                    # check model state (warm start); point(s) with a valid state are executed in point mode
+                    if self.state_active:
+                        point_state_valid, point_state_reason = check_model_state(
+                            self.state_collections.get(point_tag, None), values_params, values_time)
+                        if point_state_valid:
+                            point_warm[point_tag] = (fields_registry, point_data)
+                            log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' +
+                                            point_tag + '" ... DONE. Model state available (warm start)')
+                            continue
+                        log_stream.info(' -----> Model state not used: ' + point_state_reason +
+                                        '. Execute model over the full period')
+
+                    # store point obj
+                    point_collections[point_tag] = {
+                        'registry': fields_registry, 'dframe': dframe_data,
+                        'data': values_data, 'time': values_time, 'params': values_params,
+                        'file_path_results': file_path_results_point, 'file_path_metrics': file_path_metrics_point}
+
+                    # info point end
+                    log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag +
+                                    '" ... DONE')
+                else:
+                    # info point end
+                    log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag +
+                                    '" ... SKIPPED. Datasets not available')
             else:
+                # info point end
+                log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag +
+                                '" ... SKIPPED. Datasets previously saved')
+
+        # check point collections
+        if not point_collections and not point_warm:
+            log_stream.info(' ----> Execution model [batch] ... SKIPPED. Datasets not available')
+            return
+
+        # execute point(s) with a valid model state (new steps only)
+        point_states = {}
+        for point_tag, (fields_registry, point_data) in point_warm.items():
+            point_states[point_tag] = self.exec_point(fields_registry, point_data)
+
+        # execute point(s) stacked over the common time grid
+        if point_collections:
+
+            # organize model data over the common time grid
+            point_list = list(point_collections.keys())
+            values_data_batch, values_time_batch, values_idx_batch, values_mask_batch = organize_model_batch(
+                [point_collections[point_tag]['data'] for point_tag in point_list],
+                [point_collections[point_tag]['time'] for point_tag in point_list])
+            values_params_batch = np.vstack([point_collections[point_tag]['params'] for point_tag in point_list])
+
+            # apply sm model (all points)
+            (values_theta_batch, values_ns_batch, values_ns_ln_q_batch, values_ns_rad_q_batch,
+             values_kge_batch, values_rmse_batch, values_rq_batch, state_w_batch, state_dt_batch) = fx_sm_model_batch(
+                values_time_batch, values_data_batch, values_params_batch, MASK=values_mask_batch, return_state=True)
+
+            # iterate over point(s) to dump the model results
+            for point_id, point_tag in enumerate(point_list):
+
+                # get point obj
+                point_obj = point_collections[point_tag]
+                fields_registry, dframe_data = point_obj['registry'], point_obj['dframe']
+                values_time = point_obj['time']
+                values_theta = values_theta_batch[values_idx_batch[point_id], point_id]
+
+                # organize result object
+                dframe_result = organize_model_results(
+                    dframe_data, values_theta, values_time, dframe_fields=self.fields_results)
+
+                # organize model state (storage at the last step of the point)
+                if self.state_active:
+                    point_states[point_tag] = organize_model_state(
+                        state_w_batch[point_id], values_time[-1], state_dt_batch[point_id], point_obj['params'],
+                        point_obj['file_path_results'], compute_metrics_stats(values_theta, point_obj['data'][:, 2]))
+
+                # dump result object
+                self.dump_obj_datasets(
+                    point_obj['file_path_results'], dframe_result,
+                    file_format=self.format_results, file_float_type=self.float_type_results,
+                    file_fields=self.fields_results, time_fields=self.time_results, registry_fields=fields_registry)
+
+                # organize metrics object
+                dframe_metrics = organize_model_metrics(
+                    data_metrics={
+                        'ns': values_ns_batch[point_id], 'ns_ln_q': values_ns_ln_q_batch[point_id],
+                        'ns_rad_q': values_ns_rad_q_batch[point_id], 'kge': values_kge_batch[point_id],
+                        'rmse': values_rmse_batch[point_id], 'rq': values_rq_batch[point_id]},
+                    data_time={'time': time_step_reference},
+                    data_registry=fields_registry,
+                    data_fields=self.fields_metrics)
+
+                # dump metrics object
+                self.dump_obj_metrics(point_obj['file_path_metrics'], dframe_metrics, file_format=self.format_metrics)
+
+        # dump model state object(s)
+        self.dump_obj_state(point_states)
+
+        # dump cube object (optional)
+        self.dump_obj_cube()
 
-                # method end info
-                log_stream.info(' ----> Execution model ... DONE. Datasets previously saved')
+        # method end info
+        log_stream.info(' ----> Execution model [batch] ... DONE')
 
     # -------------------------------------------------------------------------------------
 
@@ -359,71 +917,124 @@ class DriverModel:
         # method start info
         log_stream.info(' ----> View model ... ')
 
-        # get time reference
-        time_step_reference = self.time_reference
-
         # get data object(s)
         data_registry = self.data_registry
-        data_vars = self.data_vars
 
-        # get path(s
-        file_path_results_tmpl = self.file_path_results
-        file_path_metrics_tmpl = self.file_path_metrics
-        file_path_figure_tmpl = self.file_path_figure
+        # organize point(s) arguments
+        point_args = {}
+        for fields_registry in data_registry.to_dict(orient="records"):
+            point_args[fields_registry['tag']] = (fields_registry, )
 
-        # get flag(s)
-        reset_model_figure = self.reset_model_figure
+        if self.mode_figure == 'parallel' and not self.show_figure:
 
-        # iterate over geo point(s)
-        for fields_registry in data_registry.to_dict(orient="records"):
+            # render figure(s) over the process pool
+            process_n = define_process_n(self.workers_figure, process_max=len(point_args))
+            log_stream.info(' -----> Points: ' + str(len(point_args)) + ' :: Workers: ' + str(process_n))
 
-            # get point information
-            point_name, point_tag = fields_registry['name'], fields_registry['tag']
+            point_results = exec_process_pool(self.view_point, point_args, process_n=process_n)
 
-            # info point start
-            log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag + '" ... ')
+            # summary of the point(s) failed
+            point_failed = {point_tag: point_result['error'] for point_tag, point_result in point_results.items()
+                            if not point_result['status']}
+            if point_failed:
+                log_stream.warning(' ===> View model failed for ' + str(len(point_failed)) + ' of ' +
+                                   str(len(point_results)) + ' point(s)')
+                for point_tag, point_error in point_failed.items():
+                    log_stream.warning(' ===> Point "' + point_tag + '" :: Error: ' + str(point_error))
 
-            # method to fill the filename(s)
-            file_path_results_point = self.__define_file_string(
-                file_path_results_tmpl, extended_info={'point_name': point_tag})
-            file_path_metrics_point = self.__define_file_string(
-                file_path_metrics_tmpl, extended_info={'point_name': point_tag})
-            file_path_figure_point = self.__define_file_string(
-                file_path_figure_tmpl, extended_info={'point_name': point_tag})
+                # method end info
+                log_stream.info(' ----> View model ... DONE. Some points failed')
+                return
 
-            # reset ancillary file if required
-            if reset_model_figure:
-                if os.path.exists(file_path_figure_tmpl):
-                    os.remove(file_path_figure_tmpl)
+        elif self.mode_figure in ['parallel', 'sequential']:
 
-            # check results file availability
-            if os.path.exists(file_path_results_point) and os.path.exists(file_path_metrics_point):
+            # render figure(s) point by point
+            for point_tag, (fields_registry, ) in point_args.items():
+                self.view_point(fields_registry)
 
-                # get dataframe results
-                dframe_results = self.get_obj_datasets(
-                    file_path_results_point, file_format='csv',
-                    time_fields=None,
-                    file_fields=None, registry_fields=fields_registry)
+        else:
+            # exit with error if mode is not supported
+            log_stream.error(' ===> Figure mode "' + str(self.mode_figure) + '" is not supported')
+            raise NotImplementedError('Case not implemented yet')
 
-                # get dataframe metrics
-                dframe_metrics = self.get_obj_datasets(
-                    file_path_metrics_point, file_format='csv',
-                    time_fields=None,
-                    file_fields=None, registry_fields=fields_registry)
+        # method end info
+        log_stream.info(' ----> View model ... DONE')
 
-                # method to plot results and metrics
-                self.plot_obj_datasets(file_path_figure_point, dframe_results, dframe_metrics)
+    # -------------------------------------------------------------------------------------
 
-                # method start info
-                log_stream.info(' ----> View model ... DONE')
+    # -------------------------------------------------------------------------------------
+    # method to view results of a point (figure skipped if results, metrics and settings are not changed)
+    def view_point(self, fields_registry):
 
-            else:
+        # get path(s
+        file_path_results_tmpl = self.file_path_results
+        file_path_metrics_tmpl = self.file_path_metrics
+        file_path_figure_tmpl = self.file_path_figure
 
-                # method end info
-                log_stream.info(' ----> View model ... SKIPPED. Datasets not available')
+        # get flag(s)
+        reset_model_figure = self.reset_model_figure
 
-        # method end info
-        log_stream.info(' ----> View model ... DONE')
+        # get point information
+        point_name, point_tag = fields_registry['name'], fields_registry['tag']
+
+        # info point start
+        log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag + '" ... ')
+
+        # method to fill the filename(s)
+        file_path_results_point = self.__define_file_string(
+            file_path_results_tmpl, extended_info={'point_name': point_tag})
+        file_path_metrics_point = self.__define_file_string(
+            file_path_metrics_tmpl, extended_info={'point_name': point_tag})
+        file_path_figure_point = self.__define_file_string(
+            file_path_figure_tmpl, extended_info={'point_name': point_tag})
+
+        # reset ancillary file if required
+        if reset_model_figure:
+            remove_figure(file_path_figure_point)
+
+        # check results file availability
+        if not (os.path.exists(file_path_results_point) and os.path.exists(file_path_metrics_point)):
+            # info point end
+            log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag +
+                            '" ... SKIPPED. Datasets not available')
+            return False
+
+        # check figure update (source file(s) and settings)
+        file_list_point = [file_path_results_point, file_path_metrics_point]
+        figure_settings = define_figure_settings(
+            fig_spacing_x=self.spacing_x_figure, fig_dpi=self.dpi_figure, fig_format=self.format_figure)
+        if check_figure_updated(file_path_figure_point, file_list_point, figure_settings):
+            # info point end
+            log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag +
+                            '" ... SKIPPED. Figure previously saved')
+            return False
+
+        # fingerprint of the source file(s) (defined before reading the datasets)
+        remove_figure(file_path_figure_point)
+        figure_fingerprint = define_figure_fingerprint(file_list_point, figure_settings)
+
+        # get dataframe results
+        dframe_results = self.get_obj_datasets(
+            file_path_results_point, file_format=self.format_results,
+            time_fields=None,
+            file_fields=None, registry_fields=fields_registry)
+
+        # get dataframe metrics
+        dframe_metrics = self.get_obj_datasets(
+            file_path_metrics_point, file_format=self.format_metrics,
+            time_fields=None,
+            file_fields=None, registry_fields=fields_registry)
+
+        # method to plot results and metrics
+        self.plot_obj_datasets(file_path_figure_point, dframe_results, dframe_metrics,
+                               file_format=self.format_figure)
+        # save figure fingerprint
+        save_figure_fingerprint(file_path_figure_point, figure_fingerprint)
+
+        # info point end
+        log_stream.info(' -----> Point -- (1) Name: "' + point_tag + '" :: (2) Tag: "' + point_tag + '" ... DONE')
+
+        return True
     # -------------------------------------------------------------------------------------
 
 # -------------------------------------------------------------------------------------
@@ -0,0 +1,275 @@
+"""
+Library Features:
+
+Name:          lib_data_io_cube
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20241120'
+Version:       '1.0.0'
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import logging
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+from lib_utils_generic import make_folder, check_library
+from lib_info_args import logger_name
+
+# logging
+log_stream = logging.getLogger(logger_name)
+
+# array store backend (optional, imported only when a cube is organized or read)
+xarray_available = check_library('xarray')
+
+# format(s) tag(s)
+format_netcdf, format_zarr = 'netcdf', 'zarr'
+# dimension(s) tag(s)
+dim_time, dim_station = 'time', 'station'
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to check the array store backend
+def check_backend_cube(file_format):
+    if file_format not in [format_netcdf, format_zarr]:
+        log_stream.error(' ===> File format "' + str(file_format) + '" is not supported by the cube backend')
+        raise NotImplementedError('Case not implemented yet')
+    if not xarray_available:
+        log_stream.error(' ===> File format "' + file_format + '" needs the "xarray" library')
+        raise ImportError('Library "xarray" is not available')
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to organize the point(s) dataframe(s) in a cube (time x station)
+def organize_datasets_cube(point_collections, var_list, var_no_data=-9999.0, var_type='float32'):
+
+    if not xarray_available:
+        log_stream.error(' ===> Cube datasets need the "xarray" library')
+        raise ImportError('Library "xarray" is not available')
+
+    # point_collections: {point_tag: dframe (datetime index)}
+    point_tags = list(point_collections.keys())
+
+    # common time axis (ascending)
+    time_index = pd.DatetimeIndex([])
+    for point_dframe in point_collections.values():
+        time_index = time_index.union(pd.DatetimeIndex(point_dframe.index))
+    time_index = time_index.sort_values()
+    time_index.name = dim_time
+
+    # fill the variable(s) by station column
+    data_vars = {}
+    for var_name in var_list:
+        var_values = np.full((time_index.shape[0], len(point_tags)), np.nan, dtype=var_type)
+        for point_id, point_tag in enumerate(point_tags):
+            point_dframe = point_collections[point_tag]
+            if var_name not in list(point_dframe.columns):
+                continue
+            point_values = point_dframe[var_name].values.astype(np.float64)
+            point_values[point_values == var_no_data] = np.nan
+            var_values[time_index.get_indexer(point_dframe.index), point_id] = point_values
+        data_vars[var_name] = ((dim_time, dim_station), var_values)
+
+    import xarray as xr
+    dset_cube = xr.Dataset(data_vars, coords={dim_time: time_index, dim_station: point_tags})
+
+    return dset_cube
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to read the cube (selection by time range and station(s))
+def read_datasets_cube(file_name, file_format=format_netcdf, time_start=None, time_end=None, station_list=None):
+
+    # check backend
+    check_backend_cube(file_format)
+
+    if not os.path.exists(file_name):
+        return None
+
+    import xarray as xr
+    if file_format == format_netcdf:
+        dset_cube = xr.open_dataset(file_name)
+    else:
+        dset_cube = xr.open_zarr(file_name)
+
+    # select time range and station(s) (only the selected chunk(s) are loaded)
+    if (time_start is not None) or (time_end is not None):
+        dset_cube = dset_cube.sel({dim_time: slice(time_start, time_end)})
+    if station_list is not None:
+        dset_cube = dset_cube.sel({dim_station: station_list})
+
+    dset_cube = dset_cube.load()
+    dset_cube.close()
+
+    return dset_cube
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to read the axis of the cube (time, station(s), variable(s) type(s) and time dimension unlimited or not)
+def read_axis_cube(file_name, file_format=format_netcdf):
+
+    import xarray as xr
+    if file_format == format_netcdf:
+        dset_cube = xr.open_dataset(file_name)
+        time_unlimited = dim_time in dset_cube.encoding.get('unlimited_dims', set())
+    else:
+        dset_cube = xr.open_zarr(file_name)
+        time_unlimited = True
+
+    time_index = pd.DatetimeIndex(dset_cube[dim_time].values)
+    station_list = [str(station_name) for station_name in dset_cube[dim_station].values]
+    var_types = {var_name: dset_cube[var_name].dtype for var_name in dset_cube.data_vars}
+    dset_cube.close()
+
+    return time_index, station_list, var_types, time_unlimited
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to define how the cube is updated ("append": new hours after the last hour and previous hours updated in
+# place; "merge": the cube is rewritten, needed if new station(s) or variable(s) are added or hours are inserted before
+# the last hour of the previous cube)
+def define_update_cube(dset_cube, time_prev, station_prev, var_prev, time_unlimited=True):
+
+    if not time_unlimited:
+        return 'merge', None, None
+    if not set(dset_cube[dim_station].values).issubset(station_prev):
+        return 'merge', None, None
+    if not set(dset_cube.data_vars).issubset(var_prev):
+        return 'merge', None, None
+
+    time_new = pd.DatetimeIndex(dset_cube[dim_time].values)
+    time_position = time_prev.get_indexer(time_new)
+
+    mask_update, mask_append = time_position >= 0, time_new > time_prev[-1]
+    if not np.all(mask_update | mask_append):
+        return 'merge', None, None
+
+    time_update = slice(int(time_position[mask_update].min()), int(time_position[mask_update].max()) + 1) \
+        if mask_update.any() else None
+    time_append = time_new[mask_append] if mask_append.any() else None
+
+    return 'append', time_update, time_append
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to write the cube (new hours are appended along the time dimension and the previous hours included in the
+# new cube are updated in place; the cube is rewritten only for the first write or if the layout changes)
+def write_datasets_cube(file_name, dset_cube, file_format=format_netcdf,
+                        chunk_time=720, chunk_station=16, file_append=True):
+
+    # check backend
+    check_backend_cube(file_format)
+
+    folder_name, _ = os.path.split(file_name)
+    make_folder(folder_name)
+
+    # update the previous cube
+    if file_append and os.path.exists(file_name):
+
+        time_prev, station_prev, var_prev, time_unlimited = read_axis_cube(file_name, file_format=file_format)
+        update_mode, time_update, time_append = define_update_cube(
+            dset_cube, time_prev, station_prev, var_prev, time_unlimited=time_unlimited)
+
+        if update_mode == 'append':
+
+            # align station(s) and variable(s) to the previous cube (station(s) and variable(s) not available are nan;
+            # data and results are stored in the same cube)
+            dset_cube = dset_cube.reindex({dim_station: station_prev})
+            for var_name, var_type in var_prev.items():
+                if var_name not in dset_cube.data_vars:
+                    dset_cube[var_name] = ((dim_time, dim_station), np.full(
+                        (dset_cube.sizes[dim_time], dset_cube.sizes[dim_station]), np.nan, dtype=var_type))
+
+            # update the previous hours (new values override the previous ones)
+            if time_update is not None:
+                dset_prev = read_datasets_cube(
+                    file_name, file_format=file_format,
+                    time_start=time_prev[time_update.start], time_end=time_prev[time_update.stop - 1])
+                dset_update = dset_cube.reindex({dim_time: dset_prev[dim_time].values}).combine_first(dset_prev)
+                dset_update = dset_update.astype(var_prev)
+                if not dset_update.equals(dset_prev):
+                    update_datasets_cube(file_name, dset_update, time_update, file_format=file_format)
+
+            # append the new hours
+            if time_append is not None:
+                dset_append = dset_cube.sel({dim_time: time_append})
+                append_datasets_cube(file_name, dset_append, time_prev.shape[0], file_format=file_format)
+
+            return
+
+        # merge with the previous cube (new values override the previous ones; union of time, station(s) and
+        # variable(s))
+        log_stream.info(' ===> Cube "' + file_name + '" is rewritten. Layout changed or hours inserted before '
+                        'the last hour of the previous cube')
+        dset_prev = read_datasets_cube(file_name, file_format=file_format)
+        dset_cube = dset_cube.combine_first(dset_prev)
+
+    # define chunk(s)
+    chunk_time = min(int(chunk_time), dset_cube.sizes[dim_time])
+    chunk_station = min(int(chunk_station), dset_cube.sizes[dim_station])
+
+    # dump cube (tmp file moved in place at the end; the previous cube is removed only after the new one is moved)
+    file_name_tmp = file_name + '.tmp'
+    if file_format == format_netcdf:
+        var_encoding = {var_name: {'zlib': True, 'complevel': 4, 'chunksizes': (chunk_time, chunk_station)}
+                        for var_name in dset_cube.data_vars}
+        dset_cube.to_netcdf(file_name_tmp, encoding=var_encoding, unlimited_dims=[dim_time])
+        os.replace(file_name_tmp, file_name)
+    else:
+        var_encoding = {var_name: {'chunks': (chunk_time, chunk_station)} for var_name in dset_cube.data_vars}
+        if os.path.exists(file_name_tmp):
+            shutil.rmtree(file_name_tmp)
+        dset_cube.to_zarr(file_name_tmp, mode='w', encoding=var_encoding)
+        file_name_old = file_name + '.old'
+        if os.path.exists(file_name_old):
+            shutil.rmtree(file_name_old)
+        if os.path.exists(file_name):
+            os.rename(file_name, file_name_old)
+        os.rename(file_name_tmp, file_name)
+        if os.path.exists(file_name_old):
+            shutil.rmtree(file_name_old)
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to update the hours of the cube in place (time region of the previous cube)
+def update_datasets_cube(file_name, dset_update, time_update, file_format=format_netcdf):
+
+    if file_format == format_netcdf:
+        import netCDF4
+        with netCDF4.Dataset(file_name, 'a') as file_handle:
+            for var_name in dset_update.data_vars:
+                file_handle.variables[var_name][time_update, :] = dset_update[var_name].values
+    else:
+        dset_update.drop_vars(dim_station).to_zarr(file_name, region={dim_time: time_update})
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to append the new hours to the cube (along the time dimension, unlimited in the netcdf files)
+def append_datasets_cube(file_name, dset_append, time_n, file_format=format_netcdf):
+
+    if file_format == format_netcdf:
+        import netCDF4
+        with netCDF4.Dataset(file_name, 'a') as file_handle:
+            var_time = file_handle.variables[dim_time]
+            time_values = netCDF4.date2num(
+                pd.DatetimeIndex(dset_append[dim_time].values).to_pydatetime(),
+                units=var_time.units, calendar=getattr(var_time, 'calendar', 'standard'))
+            time_append = slice(time_n, time_n + time_values.shape[0])
+            for var_name in dset_append.data_vars:
+                var_obj = file_handle.variables[var_name]
+                var_obj[time_append, :] = dset_append[var_name].values.astype(var_obj.dtype)
+            var_time[time_append] = time_values
+    else:
+        dset_append.to_zarr(file_name, append_dim=dim_time)
+# ----------------------------------------------------------------------------------------------------------------------
@@ -10,6 +10,7 @@ Version:       '1.0.0'
 # ----------------------------------------------------------------------------------------------------------------------
 # libraries
 import logging
+import re
 import numpy as np
 import pandas as pd
 
@@ -23,6 +24,30 @@ log_stream = logging.getLogger(logger_name)
 # ----------------------------------------------------------------------------------------------------------------------
 
 
+# ----------------------------------------------------------------------------------------------------------------------
+# method to define the position of the time steps over the common time range (-1 if not included)
+def define_time_position(time_index, time_range):
+
+    time_values = pd.DatetimeIndex(time_index).values.astype('datetime64[ns]').view('i8')
+
+    try:
+        time_step = pd.tseries.frequencies.to_offset(time_range.freq).nanos
+    except (ValueError, TypeError):
+        time_step = None
+
+    # fixed frequency: integer offset from the first step (steps not aligned to the range are excluded)
+    if time_step is not None and time_step > 0:
+        time_offset = time_values - time_range[0].value
+        time_position = time_offset // time_step
+        mask_valid = (time_offset % time_step == 0) & (time_position >= 0) & (time_position < time_range.shape[0])
+        time_position[~mask_valid] = -1
+    else:
+        time_position = time_range.get_indexer(pd.DatetimeIndex(time_index))
+
+    return time_position
+# ----------------------------------------------------------------------------------------------------------------------
+
+
 # ----------------------------------------------------------------------------------------------------------------------
 # method to combine data over the expected time range
 def combine_data_point_by_time(dframe_k1, dframe_k2, dframe_k3,
@@ -35,69 +60,133 @@ def combine_data_point_by_time(dframe_k1, dframe_k2, dframe_k3,
         log_stream.warning(' ===> Dataframes are not defined; One or more dataframes are defined by None')
         return None
 
-    # define time common limits
-    time_start_k1, time_end_k1 = dframe_k1.index.min(), dframe_k1.index.max()
-    time_start_k2, time_end_k2 = dframe_k2.index.min(), dframe_k2.index.max()
-    time_start_k3, time_end_k3 = dframe_k3.index.min(), dframe_k3.index.max()
+    # check dataframes columns
+    for var_id, (var_dframe, var_name) in enumerate(
+            zip([dframe_k1, dframe_k2, dframe_k3], ['values_k1', 'values_k2', 'values_k3']), start=1):
+        if var_name not in var_dframe.columns:
+            log_stream.error(' ===> Dataframe ' + str(var_id) + ' does not have the column "' + var_name + '"')
+            raise RuntimeError('Column "' + var_name + '" must be included in the dataframe. '
+                               'Check if the variable mapping is correctly defined')
 
-    time_start_common = pd.DatetimeIndex([time_start_k1, time_start_k2, time_start_k3]).min()
-    time_end_common = pd.DatetimeIndex([time_end_k1, time_end_k2, time_end_k3]).max()
+    # define time common limits
+    time_start_common = pd.DatetimeIndex([dframe_k1.index.min(), dframe_k2.index.min(), dframe_k3.index.min()]).min()
+    time_end_common = pd.DatetimeIndex([dframe_k1.index.max(), dframe_k2.index.max(), dframe_k3.index.max()]).max()
 
-    time_range_common = pd.date_range(time_start_common, time_end_common, freq=time_frequency)
+    time_range_common = pd.date_range(time_start_common, time_end_common, freq=time_frequency, name=time_tag)
 
     # get attributes
     attrs_common = dframe_k1.attrs
 
-    # remove time information from each dataframe and apply scale factor
-    dframe_k1 = dframe_k1.drop(columns=[time_tag])
-
-    if 'values_k1' not in dframe_k1.columns:
-        log_stream.error(' ===> Dataframe 1 does not have the column "values_k1"')
-        raise RuntimeError('Column "values_k1" must be included in the dataframe. '
-                           'Check if the variable mapping is correctly defined')
+    # fill the common values (time x variable; steps not available are nan)
+    values_common = np.full((time_range_common.shape[0], 3), np.nan, dtype=np.float64)
+    for var_id, (var_dframe, var_name, var_no_data, var_scale_factor) in enumerate([
+            (dframe_k1, 'values_k1', no_data_k1, scale_factor_k1),
+            (dframe_k2, 'values_k2', no_data_k2, scale_factor_k2),
+            (dframe_k3, 'values_k3', no_data_k3, scale_factor_k3)]):
 
-    dframe_k1['values_k1'][dframe_k1['values_k1'] == no_data_k1] = np.nan
-    dframe_k1['values_k1'] = dframe_k1['values_k1'].values * scale_factor_k1
-    dframe_k1['values_k1'][np.isnan(dframe_k1['values_k1'])] = no_data_k1
+        # apply scale factor (no data and nan values are set to no data)
+        var_values = var_dframe[var_name].to_numpy(dtype=np.float64, copy=True)
+        mask_no_data = (var_values == var_no_data) | np.isnan(var_values)
+        var_values *= var_scale_factor
+        var_values[mask_no_data] = var_no_data
 
-    dframe_k2 = dframe_k2.drop(columns=[time_tag])
-
-    if 'values_k2' not in dframe_k2.columns:
-        log_stream.error(' ===> Dataframe 2 does not have the column "values_k2"')
-        raise RuntimeError('Column "values_k2" must be included in the dataframe. '
-                           'Check if the variable mapping is correctly defined')
-
-    dframe_k2['values_k2'][dframe_k2['values_k2'] == no_data_k2] = np.nan
-    dframe_k2['values_k2'] = dframe_k2['values_k2'].values * scale_factor_k2
-    dframe_k2['values_k2'][np.isnan(dframe_k2['values_k2'])] = no_data_k2
-
-    dframe_k3 = dframe_k3.drop(columns=[time_tag])
-
-    if 'values_k3' not in dframe_k3.columns:
-        log_stream.error(' ===> Dataframe 3 does not have the column "values_k3"')
-        raise RuntimeError('Column "values_k3" must be included in the dataframe. '
-                           'Check if the variable mapping is correctly defined')
-
-    dframe_k3['values_k3'][dframe_k3['values_k3'] == no_data_k3] = np.nan
-    dframe_k3['values_k3'] = dframe_k3['values_k3'].values * scale_factor_k3
-    dframe_k3['values_k3'][np.isnan(dframe_k3['values_k3'])] = no_data_k3
+        # align values over the common time range
+        var_position = define_time_position(var_dframe.index, time_range_common)
+        mask_position = var_position >= 0
+        values_common[var_position[mask_position], var_id] = var_values[mask_position]
 
     # define common dataframe
-    dframe_common = pd.DataFrame(index=time_range_common)
-    dframe_common.index.name = time_tag
-    dframe_common = dframe_common.join(dframe_k1)
-    dframe_common = dframe_common.join(dframe_k2)
-    dframe_common = dframe_common.join(dframe_k3)
+    dframe_common = pd.DataFrame(
+        data=values_common, index=time_range_common, columns=['values_k1', 'values_k2', 'values_k3'])
     # add column time to the dataframe
-    if time_tag not in dframe_common.columns:
-        dframe_common[time_tag] = dframe_common.index
+    dframe_common[time_tag] = dframe_common.index
 
     # time reverse flag
     if time_reverse:
-        dframe_common = dframe_common.sort_index(ascending=False)
+        dframe_common = dframe_common.iloc[::-1]
 
     dframe_common.attrs = attrs_common
 
     return dframe_common
 
 # ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to define the decimals of a fixed point float format (e.g. '%.2f'; None if the format is not fixed point)
+def define_float_decimals(file_float_format):
+    float_match = re.fullmatch(r'%\.(\d+)f', file_float_format)
+    if float_match is None:
+        return None
+    return int(float_match.group(1))
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to round float values as written and read by a text format (values close to a tie or too large for the scaled
+# rounding, where the result may differ from the text format, and not fixed point formats are converted by the text
+# format)
+def round_float_values(values, file_float_format, file_float_decimals=None, tie_tolerance=1e-6):
+
+    values = np.asarray(values, dtype=np.float64)
+    if file_float_decimals is None:
+        return np.char.mod(file_float_format, values).astype(np.float64)
+
+    with np.errstate(invalid='ignore'):
+        values_round = np.round(values, file_float_decimals)
+        values_scaled = values * 10.0 ** file_float_decimals
+        mask_tie = ((np.abs(np.abs(values_scaled - np.trunc(values_scaled)) - 0.5) < tie_tolerance) |
+                    (np.abs(values_scaled) >= 2 ** 52))
+    if mask_tie.any():
+        values_round[mask_tie] = np.char.mod(file_float_format, values[mask_tie]).astype(np.float64)
+
+    return values_round
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to organize a point dataframe as read from the destination file (in memory; same layout of the columnar
+# readers: renamed fields, no data values, time column and index, sorted index and attributes)
+def organize_data_point_by_fields(dframe_point, file_fields=None, registry_fields=None, time_reference=None,
+                                  time_index_label='time', file_no_data=-9999, file_float_format=None,
+                                  file_float_type='float64', ascending_index=False, sort_index=True):
+
+    # organize file fields
+    if file_fields is not None:
+        dframe_point = dframe_point.rename(columns=file_fields)
+    # remove time label if available in the columns (index is stored as time column)
+    if time_index_label in list(dframe_point.columns):
+        dframe_point = dframe_point.drop(columns=[time_index_label])
+
+    # set float type (same values of the columnar formats, e.g. float32 for parquet files) and no data value
+    columns_float = dframe_point.select_dtypes(include=[np.floating]).columns
+    dframe_point = dframe_point.astype({column_name: file_float_type for column_name in columns_float})
+    dframe_point = dframe_point.astype({column_name: 'float64' for column_name in columns_float})
+    if np.isfinite(file_no_data):
+        dframe_point = dframe_point.fillna(file_no_data)
+    # set float precision (same values of the text formats, e.g. '%.2f' for csv files)
+    if file_float_format is not None:
+        file_float_decimals = define_float_decimals(file_float_format)
+        for column_name in columns_float:
+            dframe_point[column_name] = round_float_values(
+                dframe_point[column_name].values, file_float_format, file_float_decimals)
+
+    # sort index
+    if sort_index:
+        dframe_point = dframe_point.sort_index(ascending=ascending_index)
+
+    # organize time column and index
+    time_index = pd.DatetimeIndex(dframe_point.index, name=time_index_label)
+    dframe_point.index = time_index
+    dframe_point.insert(0, time_index_label, time_index.values)
+    dframe_point.index = pd.DatetimeIndex(dframe_point[time_index_label])
+    dframe_point.index.name = 'time'
+
+    # add attributes
+    dframe_point.attrs = {}
+    if registry_fields is not None:
+        dframe_point.attrs = registry_fields
+    dframe_point.attrs['time_reference'] = time_reference
+
+    return dframe_point
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,150 @@
+"""
+Library Features:
+
+Name:          lib_data_io_parquet
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20241120'
+Version:       '1.0.0'
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import logging
+import numpy as np
+import pandas as pd
+
+from lib_utils_generic import invert_dict, check_library
+from lib_info_args import logger_name
+
+# logging
+log_stream = logging.getLogger(logger_name)
+
+# columnar backend (optional, imported by pandas only when a columnar file is read or written)
+pyarrow_available = check_library('pyarrow')
+
+# format(s) tag(s)
+format_parquet, format_feather = 'parquet', 'feather'
+# float type(s) of the value column(s)
+float_types = ['float32', 'float64']
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to check the columnar backend
+def check_backend_columnar(file_format):
+    if file_format not in [format_parquet, format_feather]:
+        log_stream.error(' ===> File format "' + str(file_format) + '" is not supported by the columnar backend')
+        raise NotImplementedError('Case not implemented yet')
+    if not pyarrow_available:
+        log_stream.error(' ===> File format "' + file_format + '" needs the "pyarrow" library')
+        raise ImportError('Library "pyarrow" is not available')
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to read datasets in columnar format (parquet or feather; time is stored as typed datetime column)
+def read_datasets_parquet(file_name,
+                          file_fields, registry_fields,
+                          time_reference, time_start=None, time_end=None,
+                          time_rounding='H', time_frequency='Y',
+                          file_format=format_parquet, time_index_label='time',
+                          ascending_index=False, sort_index=True, **kwargs):
+
+    # check backend
+    check_backend_columnar(file_format)
+
+    # get file fields
+    if file_format == format_parquet:
+        fields_data_raw = pd.read_parquet(file_name)
+    else:
+        fields_data_raw = pd.read_feather(file_name)
+
+    if file_fields is None:
+        file_fields = {}
+    if registry_fields is None:
+        registry_fields = {}
+
+    # organize file fields (same layout of the csv reader: time as index and as column)
+    tmp_fields = invert_dict(file_fields)
+    fields_data_map = fields_data_raw.rename(columns=tmp_fields)
+    fields_data_map.index = pd.DatetimeIndex(fields_data_map[time_index_label])
+    fields_data_map.index.name = 'time'
+
+    # select file fields by time range
+    if (time_start is not None) and (time_end is not None):
+
+        time_start = pd.Timestamp(time_start).floor(time_rounding.lower())
+        time_end = pd.Timestamp(time_end).floor(time_rounding.lower())
+        time_range = pd.date_range(time_start, time_end, freq=time_frequency.lower())
+
+        fields_data_select = pd.DataFrame(index=time_range)
+        fields_data_select = fields_data_select.join(fields_data_map)
+
+    else:
+        fields_data_select = fields_data_map
+
+    # sort index
+    if sort_index:
+        if ascending_index:
+            fields_data_select = fields_data_select.sort_index(ascending=True)
+        else:
+            fields_data_select = fields_data_select.sort_index(ascending=False)
+
+    # add attributes
+    if registry_fields is not None:
+        fields_data_select.attrs = registry_fields
+    fields_data_select.attrs['time_reference'] = time_reference
+
+    return fields_data_select
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to write datasets in columnar format (parquet or feather; no text conversion of time and values)
+def write_datasets_parquet(file_name, file_dframe, file_fields=None, time_fields=None,
+                           file_format=format_parquet, file_float_type='float64',
+                           file_compression='snappy', time_index_label='time',
+                           file_no_data=-9999,
+                           ascending_index=False, sort_index=True, **kwargs):
+
+    # check backend
+    check_backend_columnar(file_format)
+    # check float type
+    if file_float_type not in float_types:
+        log_stream.error(' ===> Float type "' + str(file_float_type) + '" is not supported')
+        raise NotImplementedError('Case not implemented yet')
+
+    # organize file fields
+    if file_fields is not None:
+        file_dframe = file_dframe.rename(columns=file_fields)
+    # remove time label if available in the columns (index is stored as time column)
+    if time_index_label in list(file_dframe.columns):
+        file_dframe = file_dframe.drop(columns=[time_index_label])
+
+    # set float type and no data value
+    columns_float = file_dframe.select_dtypes(include=[np.floating]).columns
+    file_dframe = file_dframe.astype({column_name: file_float_type for column_name in columns_float})
+    if np.isfinite(file_no_data):
+        file_dframe = file_dframe.fillna(file_no_data)
+
+    # sort index
+    if sort_index:
+        if ascending_index:
+            file_dframe = file_dframe.sort_index(ascending=True)
+        else:
+            file_dframe = file_dframe.sort_index(ascending=False)
+
+    # organize time column
+    file_dframe.index = pd.DatetimeIndex(file_dframe.index)
+    file_dframe.index.name = time_index_label
+    file_dframe = file_dframe.reset_index()
+    # attributes are not stored (registry and time reference are attached by the reader)
+    file_dframe.attrs = {}
+
+    # dump file
+    if file_format == format_parquet:
+        file_dframe.to_parquet(file_name, index=False, compression=file_compression)
+    else:
+        file_dframe.to_feather(file_name)
+
+# ----------------------------------------------------------------------------------------------------------------------
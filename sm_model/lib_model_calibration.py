@@ -0,0 +1,140 @@
+"""
+Library Features:
+
+Name:          lib_model_calibration
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20241120'
+Version:       '1.0.0'
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import logging
+import numpy as np
+
+from lib_model_core import SMestim_IE_03_batch
+from lib_model_time import define_time_axis
+from lib_info_args import logger_name
+
+# logging
+log_stream = logging.getLogger(logger_name)
+
+# parameters default information
+params_list_default = ['w_p', 'w_max', 'alpha', 'm2', 'ks', 'kc', 'theta_min', 'theta_max']
+params_bounds_default = {
+    'w_p': [0.05, 0.95], 'w_max': [20.0, 400.0], 'alpha': [1.0, 20.0],
+    'm2': [1.0, 20.0], 'ks': [0.01, 20.0], 'kc': [0.4, 2.0]}
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to compute the objective function (cost to be minimized)
+def compute_objective(values_metrics, objective='kge'):
+
+    NS, NS_lnQ, NS_radQ, KGE, RMSE, RQ = values_metrics
+
+    if objective == 'kge':
+        values_score = np.asarray(KGE, dtype=np.float64)
+    elif objective == 'nse':
+        values_score = np.asarray(NS, dtype=np.float64)
+    else:
+        log_stream.error(' ===> Objective function "' + str(objective) + '" is not supported')
+        raise NotImplementedError('Case not implemented yet')
+
+    values_cost = 1 - values_score
+    values_cost = np.where(np.isfinite(values_cost), values_cost, np.inf)
+
+    return values_cost
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to evaluate a population of parameters with the batched model (one column per candidate)
+def evaluate_population(values_time, values_data_population, values_params, params_idx, params_population,
+                        objective='kge'):
+
+    params_matrix = np.tile(values_params, (params_population.shape[0], 1))
+    params_matrix[:, params_idx] = params_population
+
+    values_metrics = SMestim_IE_03_batch(values_time, values_data_population, params_matrix)[1:]
+
+    return compute_objective(values_metrics, objective=objective)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to calibrate the model parameters with the differential evolution algorithm (rand/1/bin)
+def calibrate_model_de(values_time, values_data, values_params,
+                       params_bounds=None, params_list=None, objective='kge',
+                       population_size=40, generations=100, mutation=0.7, crossover=0.9,
+                       tolerance=1e-6, seed=None):
+
+    if params_list is None:
+        params_list = params_list_default
+    if params_bounds is None:
+        params_bounds = params_bounds_default
+
+    # select the parameters to calibrate (the others are fixed to the registry values)
+    params_idx, params_lower, params_upper = [], [], []
+    for params_id, params_name in enumerate(params_list):
+        if params_name in list(params_bounds.keys()):
+            params_idx.append(params_id)
+            params_lower.append(params_bounds[params_name][0])
+            params_upper.append(params_bounds[params_name][1])
+    if not params_idx:
+        log_stream.error(' ===> Parameters bounds are not defined for any parameter')
+        raise IOError('Check your calibration bounds')
+
+    params_idx = np.array(params_idx)
+    params_lower, params_upper = np.array(params_lower, dtype=np.float64), np.array(params_upper, dtype=np.float64)
+    values_params = np.asarray(values_params, dtype=np.float64)
+
+    # define the time axis once (month and time step are shared by all the generations)
+    values_time = define_time_axis(values_time)
+
+    n_pop, n_dim = max(int(population_size), 4), params_idx.shape[0]
+    random_gen = np.random.default_rng(seed)
+
+    # replicate the point data for each candidate (time x candidate x variable)
+    values_data_population = np.repeat(values_data[:, np.newaxis, :], n_pop, axis=1)
+
+    # initialize population
+    params_population = params_lower + random_gen.random((n_pop, n_dim)) * (params_upper - params_lower)
+    cost_population = evaluate_population(
+        values_time, values_data_population, values_params, params_idx, params_population, objective=objective)
+
+    generation_n = 0
+    for generation_n in range(1, int(generations) + 1):
+
+        # mutation (three distinct candidates different from the target one)
+        idx_candidates = np.argsort(random_gen.random((n_pop, n_pop - 1)), axis=1)[:, :3]
+        idx_candidates = idx_candidates + (idx_candidates >= np.arange(n_pop)[:, np.newaxis])
+        params_mutant = params_population[idx_candidates[:, 0]] + mutation * (
+            params_population[idx_candidates[:, 1]] - params_population[idx_candidates[:, 2]])
+        params_mutant = np.clip(params_mutant, params_lower, params_upper)
+
+        # crossover (binomial, at least one dimension from the mutant)
+        mask_cross = random_gen.random((n_pop, n_dim)) < crossover
+        mask_cross[np.arange(n_pop), random_gen.integers(n_dim, size=n_pop)] = True
+        params_trial = np.where(mask_cross, params_mutant, params_population)
+
+        # selection
+        cost_trial = evaluate_population(
+            values_time, values_data_population, values_params, params_idx, params_trial, objective=objective)
+        mask_better = cost_trial <= cost_population
+        params_population[mask_better] = params_trial[mask_better]
+        cost_population[mask_better] = cost_trial[mask_better]
+
+        # convergence check
+        cost_finite = cost_population[np.isfinite(cost_population)]
+        if cost_finite.size == n_pop and np.std(cost_finite) < tolerance:
+            break
+
+    # select the best candidate
+    idx_best = int(np.argmin(cost_population))
+    params_best = values_params.copy()
+    params_best[params_idx] = params_population[idx_best]
+    score_best = 1 - cost_population[idx_best]
+
+    return params_best, score_best, generation_n
+# ----------------------------------------------------------------------------------------------------------------------
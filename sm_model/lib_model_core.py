@@ -10,36 +10,31 @@ Version:       '1.0.0'
 # libraries
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
 
+from lib_model_kernel import run_kernel, run_kernel_batch, engine_default
+from lib_model_metrics import compute_metrics, compute_kge
+from lib_model_time import define_time_axis, define_time_axis_matlab, convert_matlab2time, compute_time_dt
+from lib_model_figure import create_figure, close_figure
+
+# monthly factor of the potential evapotranspiration
+L = np.array([0.2100, 0.2200, 0.2300, 0.2800, 0.3000, 0.3100,
+              0.3000, 0.2900, 0.2700, 0.2500, 0.2200, 0.2000])
+Ka = 1.26
 
-def matlab2PythonDates(dateMatlab):
-    days = dateMatlab % 1
-    return datetime.fromordinal(int(dateMatlab)) + timedelta(days=days) - timedelta(days=366)
 
 def kling_gupta_efficiency(sim, obs):
-    valid_mask = ~np.isnan(sim) & ~np.isnan(obs)
-    sim = sim[valid_mask]
-    obs = obs[valid_mask]
-    r = np.corrcoef(sim, obs)[0, 1]
-    alpha = np.std(sim) / np.std(obs)
-    beta = np.mean(sim) / np.mean(obs)
-    kge = 1 - np.sqrt((r - 1)**2 + (alpha - 1)**2 + (beta - 1)**2)
-    return kge
+    return compute_kge(sim, obs)
 
-def SMestim_IE_03(TIME, PTSM, PAR):
+def SMestim_IE_03(TIME, PTSM, PAR, engine=engine_default, dt=None, W_init=None, return_state=False):
 
-    M = PTSM.shape[0]
-    D = TIME
+    # TIME: time grid (M) or time axis
+    TIME = define_time_axis(TIME)
     PIO = PTSM[:, 0]
     TEMPER = PTSM[:, 1]
     WWobs = PTSM[:, 2]
 
-    time_delta = (TIME[-1] - TIME[0]).total_seconds() / M
-    dt = round(time_delta / 3600)
-
-    MESE = pd.to_datetime(TIME).month
+    if dt is None:
+        dt = TIME.dt
 
     W_p = PAR[0]
     W_max = PAR[1]
@@ -51,53 +46,55 @@ def SMestim_IE_03(TIME, PTSM, PAR):
     theta_max = PAR[7] / 100
     Ks = Ks * dt
 
-    L = np.array([0.2100, 0.2200, 0.2300, 0.2800, 0.3000, 0.3100,
-                  0.3000, 0.2900, 0.2700, 0.2500, 0.2200, 0.2000])
-    Ka = 1.26
-    EPOT = (TEMPER > 0) * (Kc * (Ka * L[MESE - 1] * (0.46 * TEMPER + 8) - 2)) / (24 / dt)
+    L_MESE = TIME.get_month_values(L)
+    EPOT = (TEMPER > 0) * (Kc * (Ka * L_MESE * (0.46 * TEMPER + 8) - 2)) / (24 / dt)
 
-    WW = np.zeros(M)
-
-    W = W_p * W_max
-    W_reinit = W_p * W_max
-    for t in range(M):
+    WW, W = run_kernel(PIO, EPOT, W_p, W_max, alpha, m2, Ks, theta_min, theta_max, W_init=W_init, engine=engine)
 
-        if np.isfinite(EPOT[t]) and np.isnan(W):
-            W = W_reinit
+    NS, NS_lnQ, NS_radQ, KGE, RMSE, RQ = compute_metrics(WW, WWobs)
 
-        IE = PIO[t] * ((W / W_max) ** alpha)
-
-        E = EPOT[t] * W / W_max
-        PERC = Ks * (W / W_max) ** m2
-        W = W + (PIO[t] - IE - PERC - E)
-        if W >= W_max:
-            SE = W - W_max
-            W = W_max
-        else:
-            SE = 0
+    if return_state:
+        return WW, NS, NS_lnQ, NS_radQ, KGE, RMSE, RQ, W, dt
+    return WW, NS, NS_lnQ, NS_radQ, KGE, RMSE, RQ
 
-        WW[t] = W / W_max
-        WW[t] = WW[t] * (theta_max - theta_min) + theta_min
 
-    valid_mask = ~np.isnan(WW) & ~np.isnan(WWobs)
-    WW_valid = WW[valid_mask]
-    WWobs_valid = WWobs[valid_mask]
+def SMestim_IE_03_batch(TIME, PTSM, PAR, MASK=None, return_state=False):
+
+    # TIME: common time grid (M) or time axis; PTSM: rain, temperature, observed sm (M x N x 3); PAR: parameters (N x 8)
+    # MASK: steps available for each station (M x N); the time step of a station is computed over its own steps, as
+    # in the point mode, and the storage is carried unchanged over the steps not available
+    TIME = define_time_axis(TIME)
+    PIO = PTSM[:, :, 0]
+    TEMPER = PTSM[:, :, 1]
+    WWobs = PTSM[:, :, 2]
+
+    if MASK is None or TIME.stamp is None:
+        dt = TIME.dt
+    else:
+        MASK = np.asarray(MASK, dtype=bool)
+        dt = np.array([compute_time_dt(TIME.stamp[MASK[:, n]]) if MASK[:, n].any() else TIME.dt
+                       for n in range(MASK.shape[1])])
+
+    PAR = np.atleast_2d(PAR)
+    W_p = PAR[:, 0]
+    W_max = PAR[:, 1]
+    alpha = PAR[:, 2]
+    m2 = PAR[:, 3]
+    Ks = PAR[:, 4]
+    Kc = PAR[:, 5]
+    theta_min = PAR[:, 6] / 100
+    theta_max = PAR[:, 7] / 100
+    Ks = Ks * dt
 
-    RMSE = np.nanmean((WW_valid - WWobs_valid) ** 2) ** 0.5
-    NS = 1 - np.nansum((WW_valid - WWobs_valid) ** 2) / np.nansum((WWobs_valid - np.nanmean(WWobs_valid)) ** 2)
-    NS_radQ = 1 - np.nansum((np.sqrt(WW_valid + 0.00001) - np.sqrt(WWobs_valid + 0.00001)) ** 2) / \
-                 np.nansum((np.sqrt(WWobs_valid + 0.00001) - np.nanmean(np.sqrt(WWobs_valid + 0.00001))) ** 2)
-    NS_lnQ = 1 - np.nansum((np.log(WW_valid + 0.0001) - np.log(WWobs_valid + 0.0001)) ** 2) / \
-                np.nansum((np.log(WWobs_valid + 0.0001) - np.nanmean(np.log(WWobs_valid + 0.0001))) ** 2)
-    NS_lnQ = np.real(NS_lnQ)
-    NS_radQ = np.real(NS_radQ)
+    L_MESE = TIME.get_month_values(L)[:, np.newaxis]
+    EPOT = (TEMPER > 0) * (Kc * (Ka * L_MESE * (0.46 * TEMPER + 8) - 2)) / (24 / dt)
 
-    X = np.column_stack((WW_valid, WWobs_valid))
-    RRQ = np.corrcoef(X, rowvar=False) ** 2
-    RQ = RRQ[1, 0]
+    WW, W = run_kernel_batch(PIO, EPOT, W_p, W_max, alpha, m2, Ks, theta_min, theta_max, MASK=MASK)
 
-    KGE = kling_gupta_efficiency(WW_valid, WWobs_valid)
+    NS, NS_lnQ, NS_radQ, KGE, RMSE, RQ = compute_metrics(WW, WWobs)
 
+    if return_state:
+        return WW, NS, NS_lnQ, NS_radQ, KGE, RMSE, RQ, W, np.broadcast_to(dt, W.shape)
     return WW, NS, NS_lnQ, NS_radQ, KGE, RMSE, RQ
 
 
@@ -108,10 +105,8 @@ def SMestim_IE_02(PTSM, PAR, FIG, namefig):
     PIO = PTSM[:, 1]
     TEMPER = PTSM[:, 2]
     WWobs = PTSM[:, 3]
-    dt = round(np.nanmean(np.diff(D)) * 24 * 10000) / 10000 # 0.5 (30 minuti intervallo)
-
-    dates = [matlab2PythonDates(d) for d in D] # datetime.datetime(2022, 2, 1,0, 28, 48, 2)
-    MESE = pd.to_datetime(dates).month
+    D_AXIS = define_time_axis_matlab(D)
+    dt = D_AXIS.dt # 0.5 (30 minuti intervallo)
 
     W_p = PAR[0]
     W_max = PAR[1]
@@ -121,10 +116,7 @@ def SMestim_IE_02(PTSM, PAR, FIG, namefig):
     Kc = PAR[5]
     Ks = Ks * dt
 
-    L = np.array([0.2100, 0.2200, 0.2300, 0.2800, 0.3000, 0.3100,
-                  0.3000, 0.2900, 0.2700, 0.2500, 0.2200, 0.2000])
-    Ka = 1.26
-    EPOT = (TEMPER > 0) * (Kc * (Ka * L[MESE - 1] * (0.46 * TEMPER + 8) - 2)) / (24 / dt)
+    EPOT = (TEMPER > 0) * (Kc * (Ka * D_AXIS.get_month_values(L) * (0.46 * TEMPER + 8) - 2)) / (24 / dt)
 
     WW = np.zeros(M)
 
@@ -141,35 +133,19 @@ def SMestim_IE_02(PTSM, PAR, FIG, namefig):
             SE = 0
         WW[t] = W / W_max
 
-    valid_mask = ~np.isnan(WW) & ~np.isnan(WWobs)
-    WW_valid = WW[valid_mask]
-    WWobs_valid = WWobs[valid_mask]
-
-    RMSE = np.nanmean((WW_valid - WWobs_valid) ** 2) ** 0.5
-    NS = 1 - np.nansum((WW_valid - WWobs_valid) ** 2) / np.nansum((WWobs_valid - np.nanmean(WWobs_valid)) ** 2)
-    NS_radQ = 1 - np.nansum((np.sqrt(WW_valid + 0.00001) - np.sqrt(WWobs_valid + 0.00001)) ** 2) / \
-                 np.nansum((np.sqrt(WWobs_valid + 0.00001) - np.nanmean(np.sqrt(WWobs_valid + 0.00001))) ** 2)
-    NS_lnQ = 1 - np.nansum((np.log(WW_valid + 0.0001) - np.log(WWobs_valid + 0.0001)) ** 2) / \
-                np.nansum((np.log(WWobs_valid + 0.0001) - np.nanmean(np.log(WWobs_valid + 0.0001))) ** 2)
-    NS_lnQ = np.real(NS_lnQ)
-    NS_radQ = np.real(NS_radQ)
-
-    X = np.column_stack((WW_valid, WWobs_valid))
-    RRQ = np.corrcoef(X, rowvar=False) ** 2
-    RQ = RRQ[1, 0]
-
-    KGE = kling_gupta_efficiency(WW_valid, WWobs_valid)
+    NS, NS_lnQ, NS_radQ, KGE, RMSE, RQ = compute_metrics(WW, WWobs)
 
     return WW, NS, NS_lnQ, NS_radQ, KGE, RMSE, RQ
 
 def plot_results(D, WW, WWobs, PIO, NS, NS_lnQ, NS_radQ, RQ, RMSE, KGE, namefig):
-    D_dates = [matlab2PythonDates(d) for d in D]
+    from matplotlib.ticker import FuncFormatter
+    D_dates = convert_matlab2time(D)
 
-    plt.figure(figsize=(10, 7))
+    fig = create_figure(fig_size=(10, 7))
     
     s = f'NS= {NS:.3f} NS(lnSD)= {NS_lnQ:.3f} NS(radSD)= {NS_radQ:.3f} RQ= {RQ:.3f} RMSE= {RMSE:.3f} KGE= {KGE:.3f}'
     
-    ax1 = plt.axes([0.1, 0.5, 0.8, 0.40])
+    ax1 = fig.add_axes([0.1, 0.5, 0.8, 0.40])
     ax1.set_title(s, fontsize=14, fontweight='bold')
     ax1.plot(D_dates, WWobs, 'g', linewidth=3, label=r'$\theta_{obs}$')
     ax1.plot(D_dates, WW, 'r', linewidth=2, label=r'$\theta_{sim}$')
@@ -182,16 +158,16 @@ def plot_results(D, WW, WWobs, PIO, NS, NS_lnQ, NS_radQ, RQ, RMSE, KGE, namefig)
     ax1.set_ylim([y_min, y_max])
     ax1.tick_params(labelbottom=False)  
 
-    ax2 = plt.axes([0.1, 0.1, 0.8, 0.40])
+    ax2 = fig.add_axes([0.1, 0.1, 0.8, 0.40])
     ax2.plot(D_dates, PIO, color=[.5, .5, .5], linewidth=3)
     ax2.set_ylabel('Rain (mm/h)')
     ax2.grid(True)
     ax2.set_xlim([D_dates[0], D_dates[-1]])
     ax2.set_ylim([0, 1.05 * np.nanmax(PIO[np.isfinite(PIO)])])
-    ax2.xaxis.set_major_formatter(plt.FuncFormatter(lambda x, _: pd.to_datetime(x).strftime('%Y-%m-%d')))
+    ax2.xaxis.set_major_formatter(FuncFormatter(lambda x, _: pd.to_datetime(x).strftime('%Y-%m-%d')))
 
-    plt.savefig(namefig, format='png', dpi=150)
-    plt.show()
+    fig.savefig(namefig, format='png', dpi=150)
+    close_figure(fig)
 
 
 # ----------------------------------------------------------------------------------------------------------------------
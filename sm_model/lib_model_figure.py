@@ -0,0 +1,241 @@
+"""
+Library Features:
+
+Name:          lib_model_figure
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20241120'
+Version:       '1.0.0'
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import logging
+import os
+import numpy as np
+import pandas as pd
+
+from lib_utils_fingerprint import (define_fingerprint, check_fingerprint,
+                                   define_fingerprint_file, read_fingerprint, write_fingerprint, remove_fingerprint)
+from lib_info_args import logger_name
+
+# logging
+log_stream = logging.getLogger(logger_name)
+logging.getLogger('matplotlib').setLevel(logging.WARNING)
+
+# figure version (increase it to render again the saved figure(s) when the layout changes)
+figure_version = 1
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to create a figure (matplotlib is imported only when a figure is rendered; the agg canvas is used without
+# the pyplot state machine if the figure is not showed)
+def create_figure(fig_size=(10, 7), fig_show=False):
+
+    if fig_show:
+        import matplotlib.pyplot as plt
+        return plt.figure(figsize=fig_size)
+
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=fig_size)
+    FigureCanvasAgg(fig)
+    return fig
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to close a figure (figures created by pyplot are removed from the pyplot state machine)
+def close_figure(fig, fig_show=False):
+
+    if fig_show:
+        import matplotlib.pyplot as plt
+        plt.show()
+        plt.close(fig)
+    else:
+        fig.clear()
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to define the settings of a figure (used by the fingerprint)
+def define_figure_settings(fig_spacing_x=None, fig_dpi=150, fig_format='png'):
+    return {'version': figure_version, 'spacing_x': fig_spacing_x, 'dpi': fig_dpi, 'format': fig_format}
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to check if a figure is updated (figure available and source file(s) and settings not changed)
+def check_figure_updated(file_name, file_list, figure_settings):
+
+    if not os.path.exists(file_name):
+        return False
+
+    fingerprint_file = define_fingerprint_file(file_name)
+    figure_check, _, fingerprint_check = check_fingerprint(
+        read_fingerprint(fingerprint_file), file_list, figure_settings)
+    if figure_check:
+        # refresh the fingerprint if source file(s) were touched but not changed
+        write_fingerprint(fingerprint_file, fingerprint_check)
+
+    return figure_check
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to define the fingerprint of a figure (source file(s) and settings)
+def define_figure_fingerprint(file_list, figure_settings):
+    return define_fingerprint(file_list, figure_settings)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to save the fingerprint of a figure
+def save_figure_fingerprint(file_name, figure_fingerprint):
+    write_fingerprint(define_fingerprint_file(file_name), figure_fingerprint)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to remove a figure and its fingerprint
+def remove_figure(file_name):
+    if os.path.exists(file_name):
+        os.remove(file_name)
+    remove_fingerprint(define_fingerprint_file(file_name))
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to plot model results
+def plot_model_results(file_name, dframe_results, dframe_metrics,
+                       fig_spacing_x=None, fig_dpi=150, fig_show=False,
+                       no_data_rain=-9999.0, no_data_air_t=-9999.0,
+                       no_data_theta_obs=-9999.0, no_data_theta_sim=-9999.0,
+                       **kwargs):
+
+    # sort data by index (time)
+    dframe_results = dframe_results.sort_index()
+
+    # compute expected time period and data frame
+    time_index_start, time_index_end = dframe_results.index[0], dframe_results.index[-1]
+    time_index_resolution = dframe_results.index.resolution
+
+    if time_index_resolution == 'hour':
+        time_index_frequency = 'H'
+    else:
+        log_stream.error(' ===> Time resolution not expected in the dataframe obj')
+        raise NotImplementedError('Case not implemented yet')
+    time_index_range = pd.date_range(start=time_index_start, end=time_index_end, freq=time_index_frequency)
+
+    dframe_expected = pd.DataFrame(index=time_index_range)
+    dframe_expected = dframe_expected.join(dframe_results)
+
+    # get ts values
+    values_time = dframe_expected.index
+    values_rain = dframe_expected['rain'].values
+    values_air_t = dframe_expected['air_temperature'].values
+    values_theta_obs = dframe_expected['theta_observed'].values
+    values_theta_sim = dframe_expected['theta_simulated'].values
+
+    # nullify no data values
+    values_rain[values_rain == no_data_rain] = np.nan
+    values_air_t[values_air_t == no_data_air_t] = np.nan
+    values_theta_obs[values_theta_obs == no_data_theta_obs] = np.nan
+    values_theta_sim[values_theta_sim == no_data_theta_sim] = np.nan
+
+    # get metrics values
+    metrics_ns = dframe_metrics['ns'].values[0]
+    metrics_ns_ln_q = dframe_metrics['ns_ln_q'].values[0]
+    metrics_ns_rad_q = dframe_metrics['ns_rad_q'].values[0]
+    metrics_kge = dframe_metrics['kge'].values[0]
+    metrics_rmse = dframe_metrics['rmse'].values[0]
+    metrics_rq = dframe_metrics['rq'].values[0]
+    # get registry values
+    registry_name = dframe_metrics['name'].values[0].strip()
+    registry_catchment = dframe_metrics['catchment'].values[0].strip()
+    registry_time = dframe_metrics['time'].values[0]
+
+    # filter ts values (remove no data values)
+    values_rain[values_rain == -9999] = np.nan
+    values_theta_obs[values_theta_obs == -9999] = np.nan
+    values_theta_sim[values_theta_sim == -9999] = np.nan
+
+    y_min_sm = -0.05
+    y_max_sm = 1.05
+    y_min_rain = 0
+    y_max_rain = np.nanmax([np.nanmax(values_rain[np.isfinite(values_rain)]), 25])
+    y_min_air_t = np.nanmin([np.nanmin(values_air_t[np.isfinite(values_air_t)]), -25])
+    y_max_air_t = np.nanmax([np.nanmax(values_air_t[np.isfinite(values_air_t)]), 50])
+
+    # select time start and time end
+    time_start_string, time_start_stamp = values_time[0].strftime('%Y-%m-%d %H:%M'), values_time[0]
+    time_end_string, time_end_stamp = values_time[-1].strftime('%Y-%m-%d %H:%M'), values_time[-1]
+
+    if fig_spacing_x is not None:
+
+        spacing_type = 'automatic'
+        if 'type' in list(fig_spacing_x.keys()):
+            spacing_type = fig_spacing_x['type']
+        spacing_offset = 0
+        if 'offset' in list(fig_spacing_x.keys()):
+            spacing_offset = fig_spacing_x['offset']
+
+        if spacing_type == 'days':
+            time_period_tick_start = time_start_stamp
+            time_period_tick_end = time_end_stamp + pd.DateOffset(days=spacing_offset)
+        elif spacing_type == 'months':
+            time_period_tick_start = time_start_stamp
+            time_period_tick_end = time_end_stamp + pd.DateOffset(months=spacing_offset)
+        else:
+            time_period_tick_start = time_start_stamp
+            time_period_tick_end = time_end_stamp
+    else:
+        time_period_tick_start = time_start_stamp
+        time_period_tick_end = time_end_stamp
+
+    # plot figure
+    fig = create_figure(fig_size=(10, 7), fig_show=fig_show)
+    fig.autofmt_xdate()
+
+    # title
+    s = ('Point -- Name: "' + registry_name + '" Catchment: "' + registry_catchment + '"\n'
+         ' Time Ref: "' + registry_time + ' Time Period Start: "' +
+         time_start_string + '" Time Period End: "' + time_end_string +
+         '" UTC \n'
+         f'NS: "{metrics_ns:.3f}" NS(lnSD): "{metrics_ns_ln_q:.3f}" NS(radSD): "{metrics_ns_rad_q:.3f}" '
+         f'RQ: "{metrics_rq:.3f}" RMSE: "{metrics_rmse:.3f}" KGE: "{metrics_kge:.3f}"')
+
+    # upper panel (soil moisture)
+    ax1 = fig.add_axes([0.1, 0.5, 0.8, 0.40])
+    ax1.set_title(s, fontsize=10, fontweight='bold')
+    ax1.plot(values_time, values_theta_obs, 'g', linewidth=2, label=r'$\theta_{obs}$')
+    ax1.plot(values_time, values_theta_sim, 'r', linewidth=1, label=r'$\theta_{sim}$')
+    ax1.legend()
+    ax1.set_ylabel('Relative Soil Moisture [-]')
+    ax1.set_xlim([time_period_tick_start, time_period_tick_end])
+    ax1.set_ylim([y_min_sm, y_max_sm])
+    ax1.tick_params(labelbottom=False)
+    ax1.grid(True)
+
+    # lower panel (rain)
+    ax2 = fig.add_axes([0.1, 0.1, 0.8, 0.40])
+    ax2.plot(values_time, values_rain, color=[.5, .5, .5], linewidth=1, label='rain')
+    ax2.set_ylabel('Rain (mm/h)')
+    ax2.set_ylim([y_min_rain, y_max_rain])
+    ax2.set_xlim(time_period_tick_start, time_period_tick_end)
+    ax2.tick_params(axis='x', labelrotation=45, labelsize=6)
+    ax2.grid(True)
+
+    ax3 = ax2.twinx()
+    ax3.plot(values_time, values_air_t, color='r', linewidth=0.2, label='air temperature')
+    ax3.set_ylabel('Air Temperature (C)')
+    ax3.set_ylim(y_min_air_t, y_max_air_t)
+    ax3.set_xlim(time_period_tick_start, time_period_tick_end)
+
+    # save figure
+    fig.savefig(file_name, format='png', dpi=fig_dpi)
+
+    # close figure
+    close_figure(fig, fig_show=fig_show)
+# ----------------------------------------------------------------------------------------------------------------------
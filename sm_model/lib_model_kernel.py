@@ -0,0 +1,163 @@
+"""
+Library Features:
+
+Name:          lib_model_kernel
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20241120'
+Version:       '1.0.0'
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import logging
+import math
+import numpy as np
+
+from lib_utils_generic import check_library
+from lib_info_args import logger_name
+
+# logging
+log_stream = logging.getLogger(logger_name)
+
+# compiled backend (optional, imported and compiled only when the engine is selected)
+numba_available = check_library('numba')
+
+# engine(s) tag(s)
+engine_python, engine_numba = 'python', 'numba'
+engine_default = engine_python
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to run the soil moisture water balance recursion (pure python)
+def run_kernel_python(PIO, EPOT, W_p, W_max, alpha, m2, Ks, theta_min, theta_max, W_init):
+
+    M = PIO.shape[0]
+    WW = np.zeros(M)
+
+    W = W_init
+    W_reinit = W_p * W_max
+    for t in range(M):
+
+        if math.isfinite(EPOT[t]) and math.isnan(W):
+            W = W_reinit
+
+        IE = PIO[t] * ((W / W_max) ** alpha)
+
+        E = EPOT[t] * W / W_max
+        PERC = Ks * (W / W_max) ** m2
+        W = W + (PIO[t] - IE - PERC - E)
+        if W >= W_max:
+            W = W_max
+
+        WW[t] = W / W_max
+        WW[t] = WW[t] * (theta_max - theta_min) + theta_min
+
+    return WW, W
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to get the compiled version of the kernel (numba is imported and the kernel is defined at the first request)
+run_kernel_numba = None
+
+
+def get_kernel_numba():
+    global run_kernel_numba
+    if run_kernel_numba is None:
+        from numba import njit
+        run_kernel_numba = njit(cache=True, fastmath=False)(run_kernel_python)
+    return run_kernel_numba
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to select the kernel engine
+def select_kernel(engine=engine_default):
+
+    if engine is None:
+        engine = engine_default
+
+    if engine == engine_numba:
+        if numba_available:
+            return get_kernel_numba()
+        log_stream.warning(' ===> Kernel engine "' + engine_numba +
+                           '" is not available. Fall back to the "' + engine_python + '" engine')
+        return run_kernel_python
+    elif engine == engine_python:
+        return run_kernel_python
+    else:
+        log_stream.error(' ===> Kernel engine "' + str(engine) + '" is not supported')
+        raise NotImplementedError('Case not implemented yet')
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to run the kernel with the selected engine (storage starts from W_init or, if not set, from W_p * W_max)
+def run_kernel(PIO, EPOT, W_p, W_max, alpha, m2, Ks, theta_min, theta_max, W_init=None, engine=engine_default):
+
+    fx_kernel = select_kernel(engine)
+
+    PIO = np.ascontiguousarray(PIO, dtype=np.float64)
+    EPOT = np.ascontiguousarray(EPOT, dtype=np.float64)
+
+    if W_init is None:
+        W_init = W_p * W_max
+
+    WW, W = fx_kernel(PIO, EPOT,
+                      float(W_p), float(W_max), float(alpha), float(m2), float(Ks),
+                      float(theta_min), float(theta_max), float(W_init))
+
+    return WW, W
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to run the soil moisture water balance recursion for all the stations at once (time x station; the steps
+# not available for a station, mask false, keep the storage unchanged and are set to nan in the output; the storage
+# at the end of the run is returned for each station)
+def run_kernel_batch(PIO, EPOT, W_p, W_max, alpha, m2, Ks, theta_min, theta_max, MASK=None):
+
+    PIO = np.asarray(PIO, dtype=np.float64)
+    EPOT = np.asarray(EPOT, dtype=np.float64)
+
+    M, N = PIO.shape
+    WW = np.zeros((M, N))
+
+    if MASK is None:
+        MASK = np.ones((M, N), dtype=bool)
+    MASK = np.asarray(MASK, dtype=bool)
+    mask_all = MASK.all(axis=1)
+
+    W_p, W_max = np.asarray(W_p, dtype=np.float64), np.asarray(W_max, dtype=np.float64)
+    alpha, m2, Ks = (np.asarray(alpha, dtype=np.float64), np.asarray(m2, dtype=np.float64),
+                     np.asarray(Ks, dtype=np.float64))
+    theta_min, theta_max = np.asarray(theta_min, dtype=np.float64), np.asarray(theta_max, dtype=np.float64)
+    theta_range = theta_max - theta_min
+
+    W = W_p * W_max
+    W_reinit = W_p * W_max
+    for t in range(M):
+
+        mask_reinit = np.isfinite(EPOT[t]) & np.isnan(W) & MASK[t]
+        if mask_reinit.any():
+            W = np.where(mask_reinit, W_reinit, W)
+
+        W_rel = W / W_max
+        IE = PIO[t] * (W_rel ** alpha)
+
+        E = EPOT[t] * W / W_max
+        PERC = Ks * W_rel ** m2
+        W_step = W + (PIO[t] - IE - PERC - E)
+        W_step = np.where(W_step >= W_max, W_max, W_step)
+
+        if mask_all[t]:
+            W = W_step
+            WW[t] = W / W_max
+            WW[t] = WW[t] * theta_range + theta_min
+        else:
+            W = np.where(MASK[t], W_step, W)
+            WW[t] = np.where(MASK[t], (W_step / W_max) * theta_range + theta_min, np.nan)
+
+    return WW, W
+# ----------------------------------------------------------------------------------------------------------------------
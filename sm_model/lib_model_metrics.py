@@ -0,0 +1,201 @@
+"""
+Library Features:
+
+Name:          lib_model_metrics
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20241120'
+Version:       '1.0.0'
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import logging
+import numpy as np
+
+from lib_info_args import logger_name
+
+# logging
+log_stream = logging.getLogger(logger_name)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to compute the nash-sutcliffe efficiency (nan values are skipped as in np.nansum/np.nanmean)
+def compute_nash_sutcliffe(values_sim, values_obs):
+    values_obs_mean = np.nanmean(values_obs, axis=0)
+    values_num = np.nansum((values_sim - values_obs) ** 2, axis=0)
+    values_den = np.nansum((values_obs - values_obs_mean) ** 2, axis=0)
+    return 1 - values_num / values_den
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to organize the simulated and observed values (2d: time x station; the steps not available in both the
+# series are set to nan)
+def organize_metrics_values(values_sim, values_obs):
+
+    values_sim = np.asarray(values_sim, dtype=np.float64)
+    values_obs = np.asarray(values_obs, dtype=np.float64)
+
+    if values_sim.shape != values_obs.shape:
+        log_stream.error(' ===> Simulated and observed values have different shape')
+        raise IOError('Check your model values')
+
+    flag_squeeze = values_sim.ndim == 1
+    if flag_squeeze:
+        values_sim, values_obs = values_sim[:, np.newaxis], values_obs[:, np.newaxis]
+
+    # common valid mask (nan out all the steps not available in both the series)
+    mask_valid = ~np.isnan(values_sim) & ~np.isnan(values_obs)
+    values_sim = np.where(mask_valid, values_sim, np.nan)
+    values_obs = np.where(mask_valid, values_obs, np.nan)
+    n_valid = np.count_nonzero(mask_valid, axis=0)
+
+    return values_sim, values_obs, n_valid, flag_squeeze
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to compute the first and second order moments of the valid values (means, sums of squared anomalies and sum
+# of the anomalies product)
+def compute_metrics_moments(values_sim, values_obs, n_valid):
+
+    mean_sim = np.nansum(values_sim, axis=0) / n_valid
+    mean_obs = np.nansum(values_obs, axis=0) / n_valid
+    anom_sim = values_sim - mean_sim
+    anom_obs = values_obs - mean_obs
+    var_sim = np.nansum(anom_sim ** 2, axis=0)
+    var_obs = np.nansum(anom_obs ** 2, axis=0)
+    cov_sim_obs = np.nansum(anom_sim * anom_obs, axis=0)
+
+    return mean_sim, mean_obs, var_sim, var_obs, cov_sim_obs
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to compute the correlation and the kling-gupta efficiency from the moments
+def compute_kge_from_moments(mean_sim, mean_obs, var_sim, var_obs, cov_sim_obs):
+
+    r = cov_sim_obs / np.sqrt(var_sim * var_obs)
+    alpha = np.sqrt(var_sim / var_obs)
+    beta = mean_sim / mean_obs
+    KGE = 1 - np.sqrt((r - 1) ** 2 + (alpha - 1) ** 2 + (beta - 1) ** 2)
+
+    return KGE, r
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to compute the kling-gupta efficiency only (1d: time or 2d: time x station)
+def compute_kge(values_sim, values_obs):
+
+    values_sim, values_obs, n_valid, flag_squeeze = organize_metrics_values(values_sim, values_obs)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        KGE, _ = compute_kge_from_moments(*compute_metrics_moments(values_sim, values_obs, n_valid))
+
+    if flag_squeeze:
+        KGE = float(KGE[0])
+
+    return KGE
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to compute the goodness-of-fit metrics in one pass (1d: time or 2d: time x station)
+def compute_metrics(values_sim, values_obs, offset_rad=0.00001, offset_ln=0.0001):
+
+    values_sim, values_obs, n_valid, flag_squeeze = organize_metrics_values(values_sim, values_obs)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+
+        # first and second order moments
+        mean_sim, mean_obs, var_sim, var_obs, cov_sim_obs = compute_metrics_moments(values_sim, values_obs, n_valid)
+        sse = np.nansum((values_sim - values_obs) ** 2, axis=0)
+
+        # rmse and ns
+        RMSE = np.sqrt(sse / n_valid)
+        NS = 1 - sse / var_obs
+        # ns on the transformed values
+        NS_radQ = compute_nash_sutcliffe(np.sqrt(values_sim + offset_rad), np.sqrt(values_obs + offset_rad))
+        NS_lnQ = compute_nash_sutcliffe(np.log(values_sim + offset_ln), np.log(values_obs + offset_ln))
+
+        # correlation and kge
+        KGE, r = compute_kge_from_moments(mean_sim, mean_obs, var_sim, var_obs, cov_sim_obs)
+        RQ = r ** 2
+
+    if flag_squeeze:
+        NS, NS_lnQ, NS_radQ, KGE, RMSE, RQ = [float(values[0]) for values in (NS, NS_lnQ, NS_radQ, KGE, RMSE, RQ)]
+
+    return NS, NS_lnQ, NS_radQ, KGE, RMSE, RQ
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to compute the additive statistics of the metrics (1d: time; used to update the metrics incrementally)
+def compute_metrics_stats(values_sim, values_obs, offset_rad=0.00001, offset_ln=0.0001):
+
+    values_sim = np.asarray(values_sim, dtype=np.float64)
+    values_obs = np.asarray(values_obs, dtype=np.float64)
+
+    mask_valid = ~np.isnan(values_sim) & ~np.isnan(values_obs)
+    values_sim, values_obs = values_sim[mask_valid], values_obs[mask_valid]
+
+    metrics_stats = {
+        'n': float(values_sim.shape[0]),
+        'sum_sim': float(np.sum(values_sim)), 'sum_obs': float(np.sum(values_obs)),
+        'sum_sim2': float(np.sum(values_sim ** 2)), 'sum_obs2': float(np.sum(values_obs ** 2)),
+        'sum_sim_obs': float(np.sum(values_sim * values_obs)),
+        'sse': float(np.sum((values_sim - values_obs) ** 2))}
+
+    # transformed values (nan values are skipped as in np.nansum/np.nanmean)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for transform_tag, transform_sim, transform_obs in [
+                ('rad', np.sqrt(values_sim + offset_rad), np.sqrt(values_obs + offset_rad)),
+                ('ln', np.log(values_sim + offset_ln), np.log(values_obs + offset_ln))]:
+            metrics_stats['sse_' + transform_tag] = float(np.nansum((transform_sim - transform_obs) ** 2))
+            mask_obs = ~np.isnan(transform_obs)
+            metrics_stats['n_obs_' + transform_tag] = float(np.count_nonzero(mask_obs))
+            metrics_stats['sum_obs_' + transform_tag] = float(np.sum(transform_obs[mask_obs]))
+            metrics_stats['sum_obs2_' + transform_tag] = float(np.sum(transform_obs[mask_obs] ** 2))
+
+    return metrics_stats
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to merge the additive statistics of the metrics
+def merge_metrics_stats(metrics_stats_prev, metrics_stats_new):
+    return {stats_key: metrics_stats_prev[stats_key] + metrics_stats_new[stats_key]
+            for stats_key in metrics_stats_prev.keys()}
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to compute the metrics from the additive statistics
+def compute_metrics_from_stats(metrics_stats):
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+
+        n = np.float64(metrics_stats['n'])
+        mean_sim, mean_obs = metrics_stats['sum_sim'] / n, metrics_stats['sum_obs'] / n
+        var_sim = metrics_stats['sum_sim2'] - n * mean_sim ** 2
+        var_obs = metrics_stats['sum_obs2'] - n * mean_obs ** 2
+        cov_sim_obs = metrics_stats['sum_sim_obs'] - n * mean_sim * mean_obs
+
+        RMSE = np.sqrt(metrics_stats['sse'] / n)
+        NS = 1 - metrics_stats['sse'] / var_obs
+
+        NS_transform = {}
+        for transform_tag in ['rad', 'ln']:
+            n_obs = np.float64(metrics_stats['n_obs_' + transform_tag])
+            var_obs_transform = (metrics_stats['sum_obs2_' + transform_tag] -
+                                 metrics_stats['sum_obs_' + transform_tag] ** 2 / n_obs)
+            NS_transform[transform_tag] = 1 - metrics_stats['sse_' + transform_tag] / var_obs_transform
+        NS_radQ, NS_lnQ = NS_transform['rad'], NS_transform['ln']
+
+        KGE, r = compute_kge_from_moments(mean_sim, mean_obs, var_sim, var_obs, cov_sim_obs)
+        RQ = r ** 2
+
+    return float(NS), float(NS_lnQ), float(NS_radQ), float(KGE), float(RMSE), float(RQ)
+# ----------------------------------------------------------------------------------------------------------------------
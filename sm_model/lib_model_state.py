@@ -0,0 +1,82 @@
+"""
+Library Features:
+
+Name:          lib_model_state
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20241120'
+Version:       '1.0.0'
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import logging
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+
+from lib_data_io_pickle import read_obj, write_obj
+from lib_utils_generic import make_folder
+from lib_info_args import logger_name
+
+# logging
+log_stream = logging.getLogger(logger_name)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to define the parameters fingerprint (used to force a full rebuild when parameters change)
+def define_params_hash(values_params):
+    values_params = np.ascontiguousarray(values_params, dtype=np.float64)
+    return hashlib.md5(values_params.tobytes()).hexdigest()
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to organize the state of a point
+def organize_model_state(state_w, state_time, state_dt, values_params, file_results, metrics_stats):
+    return {'state_w': float(state_w), 'time_last': pd.Timestamp(state_time), 'dt': int(state_dt),
+            'params_hash': define_params_hash(values_params), 'file_results': file_results,
+            'metrics_stats': metrics_stats}
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to check if a point state can be used to warm start the model
+def check_model_state(point_state, values_params, values_time):
+
+    if point_state is None:
+        return False, 'state not available'
+    if 'metrics_stats' not in point_state:
+        return False, 'state format not supported'
+    if point_state['params_hash'] != define_params_hash(values_params):
+        return False, 'parameters changed'
+    if not np.isfinite(point_state['state_w']):
+        return False, 'state not defined'
+    if point_state['file_results'] is None or not os.path.exists(point_state['file_results']):
+        return False, 'previous results not available'
+    if point_state['time_last'] not in values_time:
+        return False, 'state time not included in the datasets'
+    return True, None
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to read the state store
+def read_model_state(file_name):
+    state_collections = None
+    if file_name is not None and os.path.exists(file_name):
+        state_collections = read_obj(file_name)
+    if state_collections is None:
+        state_collections = {}
+    return state_collections
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to write the state store
+def write_model_state(file_name, state_collections):
+    folder_name, _ = os.path.split(file_name)
+    make_folder(folder_name)
+    write_obj(file_name, state_collections)
+# ----------------------------------------------------------------------------------------------------------------------
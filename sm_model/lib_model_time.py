@@ -0,0 +1,175 @@
+"""
+Library Features:
+
+Name:          lib_model_time
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20241120'
+Version:       '1.0.0'
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import logging
+import numpy as np
+import pandas as pd
+import threading
+
+from collections import OrderedDict
+
+from lib_info_args import logger_name
+
+# logging
+log_stream = logging.getLogger(logger_name)
+
+# matlab datenum of the numpy epoch (1970-01-01)
+time_matlab_epoch = 719529
+# max number of time axis saved in the cache
+time_axis_cache_max = 32
+time_axis_cache = OrderedDict()
+time_axis_lock = threading.Lock()
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# class to define the time axis of the model (month and time step are computed once for each time grid)
+class TimeAxis:
+
+    def __init__(self, time_values, time_month, time_dt, time_stamp=None):
+
+        self.time = time_values
+        self.month = time_month
+        self.dt = time_dt
+        self.stamp = time_stamp
+        self.size = time_values.shape[0]
+
+        self.month.setflags(write=False)
+        self.month_table = {}
+
+    # method to get the monthly values of a table over the time axis (values are cached by table)
+    def get_month_values(self, table_month):
+
+        table_month = np.asarray(table_month, dtype=np.float64)
+        table_key = table_month.tobytes()
+        if table_key not in self.month_table:
+            values_month = table_month[self.month - 1]
+            values_month.setflags(write=False)
+            self.month_table[table_key] = values_month
+        return self.month_table[table_key]
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to convert matlab datenum(s) to numpy datetime(s) (microseconds resolution)
+def convert_matlab2time(time_matlab):
+
+    time_matlab = np.asarray(time_matlab, dtype=np.float64)
+    time_days = np.floor(time_matlab)
+    time_us = np.round((time_matlab - time_days) * 86400 * 1e6)
+
+    time_values = ((time_days - time_matlab_epoch).astype(np.int64) * 86400 * 1000000 +
+                   time_us.astype(np.int64)).astype('datetime64[us]')
+
+    return time_values
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to convert numpy datetime(s) to matlab datenum(s)
+def convert_time2matlab(time_values):
+
+    time_values = np.asarray(time_values, dtype='datetime64[us]')
+    time_matlab = time_values.astype(np.int64) / (86400 * 1e6) + time_matlab_epoch
+
+    return time_matlab
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to compute the month(s) of numpy datetime(s)
+def compute_time_month(time_values):
+    return time_values.astype('datetime64[M]').astype(np.int64) % 12 + 1
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to get a time axis from the cache (the least recently used time axis is removed when the cache is full)
+def get_time_axis(time_key, fx_time_axis, *fx_args):
+
+    with time_axis_lock:
+        time_axis = time_axis_cache.get(time_key, None)
+        if time_axis is not None:
+            time_axis_cache.move_to_end(time_key)
+            return time_axis
+
+    time_axis = fx_time_axis(*fx_args)
+
+    with time_axis_lock:
+        time_axis_cache[time_key] = time_axis
+        while len(time_axis_cache) > time_axis_cache_max:
+            time_axis_cache.popitem(last=False)
+    return time_axis
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to define the time axis of a datetime grid (dt in hours from the mean time step)
+def define_time_axis(time_grid):
+
+    if isinstance(time_grid, TimeAxis):
+        return time_grid
+
+    time_index = pd.DatetimeIndex(time_grid)
+    time_key = ('datetime', str(time_index.tz), time_index.asi8.tobytes())
+
+    return get_time_axis(time_key, compute_time_axis, time_index)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to compute the time step (hours) of a datetime grid (utc stamps in nanoseconds)
+def compute_time_dt(time_stamp):
+    time_delta = (time_stamp[-1] - time_stamp[0]) / 1e9 / time_stamp.shape[0]
+    return round(time_delta / 3600)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to compute the time axis of a datetime grid
+def compute_time_axis(time_index):
+
+    time_stamp = time_index.asi8.copy()
+    time_stamp.setflags(write=False)
+    time_dt = compute_time_dt(time_stamp)
+
+    # month is defined by the local time of the grid
+    if time_index.tz is not None:
+        time_index = time_index.tz_localize(None)
+    time_values = time_index.to_numpy(dtype='datetime64[ns]')
+
+    return TimeAxis(time_values, compute_time_month(time_values), time_dt, time_stamp)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to define the time axis of a matlab datenum grid (dt in hours from the mean time step)
+def define_time_axis_matlab(time_grid):
+
+    if isinstance(time_grid, TimeAxis):
+        return time_grid
+
+    time_grid = np.asarray(time_grid, dtype=np.float64)
+    time_key = ('matlab', time_grid.tobytes())
+
+    return get_time_axis(time_key, compute_time_axis_matlab, time_grid)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to compute the time axis of a matlab datenum grid
+def compute_time_axis_matlab(time_grid):
+
+    time_dt = round(np.nanmean(np.diff(time_grid)) * 24 * 10000) / 10000
+    time_values = convert_matlab2time(time_grid)
+
+    return TimeAxis(time_values, compute_time_month(time_values), time_dt)
+# ----------------------------------------------------------------------------------------------------------------------
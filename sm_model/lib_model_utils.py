@@ -17,12 +17,45 @@ import pandas as pd
 from lib_utils_generic import invert_dict
 from lib_info_args import logger_name
 
-import matplotlib.dates as mdates
-import matplotlib.pylab as plt
-
 # logging
 log_stream = logging.getLogger(logger_name)
-logging.getLogger('matplotlib').setLevel(logging.WARNING)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to fill the nan values by linear interpolation (same limit and direction rules of pandas interpolate)
+def fill_data_nan(values, limit=None, limit_direction='both'):
+
+    values_valid = ~np.isnan(values)
+    if values_valid.all() or not values_valid.any():
+        return values
+
+    values_n = values.shape[0]
+    if limit is None:
+        limit = values_n
+
+    # distance of the nan value(s) from the previous and the next valid value(s) (beyond the limit if not available)
+    pos_valid, pos_nan = np.flatnonzero(values_valid), np.flatnonzero(~values_valid)
+    idx_next = np.searchsorted(pos_valid, pos_nan)
+    dist_none = max(values_n, limit) + 1
+    dist_prev = np.where(idx_next > 0, pos_nan - pos_valid[np.maximum(idx_next - 1, 0)], dist_none)
+    dist_next = np.where(idx_next < pos_valid.shape[0],
+                         pos_valid[np.minimum(idx_next, pos_valid.shape[0] - 1)] - pos_nan, dist_none)
+
+    if limit_direction == 'forward':
+        pos_fill = pos_nan[dist_prev <= limit]
+    elif limit_direction == 'backward':
+        pos_fill = pos_nan[dist_next <= limit]
+    elif limit_direction == 'both':
+        pos_fill = pos_nan[(dist_prev <= limit) | (dist_next <= limit)]
+    else:
+        log_stream.error(' ===> Interpolation direction "' + str(limit_direction) + '" is not supported')
+        raise NotImplementedError('Case not implemented yet')
+
+    # linear interpolation over the positions (outer values are filled by the nearest valid value)
+    values[pos_fill] = np.interp(pos_fill, pos_valid, values[pos_valid])
+
+    return values
 # ----------------------------------------------------------------------------------------------------------------------
 
 
@@ -37,30 +70,25 @@ def filter_model_data(dframe_data, dframe_fields=None,
     # sort data by index
     dframe_data = dframe_data.sort_index()
 
-    # filter data null of rain
-    dframe_data[dframe_data[var_tag_rain] == var_no_data] = np.nan
-    # remove data null (based on rain values)
-    dframe_data = dframe_data.dropna(how='all')
+    # remove data null (based on rain values) and empty steps
+    mask_step = (dframe_data[var_tag_rain].to_numpy() != var_no_data) & dframe_data.notna().any(axis=1).to_numpy()
+    if not mask_step.all():
+        dframe_data = dframe_data[mask_step]
 
-    # filter data null of air temperature
-    mask_airt = (dframe_data[var_tag_airt] == var_no_data)
-    dframe_data[var_tag_airt][mask_airt] = np.nan
-    # filter data null of soil moisture
-    mask_sm = (dframe_data[var_tag_sm] == var_no_data)
-    dframe_data[var_tag_sm][mask_sm] = np.nan
-
-    # fill nans with interpolation (
-    dframe_data[var_tag_airt] = dframe_data[var_tag_airt].interpolate(
-        limit=interp_limit_airt, limit_direction=interp_direction_airt)
-    dframe_data[var_tag_sm] = dframe_data[var_tag_sm].interpolate(
-        limit=interp_limit_sm, limit_direction=interp_direction_sm)
+    # filter data null and fill nans with interpolation (air temperature and soil moisture)
+    for var_tag, interp_limit, interp_direction in [
+            (var_tag_airt, interp_limit_airt, interp_direction_airt),
+            (var_tag_sm, interp_limit_sm, interp_direction_sm)]:
+        var_values = dframe_data[var_tag].to_numpy(dtype=np.float64, copy=True)
+        var_values[var_values == var_no_data] = np.nan
+        dframe_data[var_tag] = fill_data_nan(var_values, limit=interp_limit, limit_direction=interp_direction)
 
     # dframe fields default
     if dframe_fields is None:
         dframe_fields = {}
     # organize file fields
     tmp_fields = invert_dict(dframe_fields)
-    dframe_data = dframe_data.rename(columns=tmp_fields)
+    dframe_data.columns = [tmp_fields.get(var_tag, var_tag) for var_tag in dframe_data.columns]
 
     return dframe_data
 # ----------------------------------------------------------------------------------------------------------------------
@@ -88,6 +116,29 @@ def organize_model_results(dframe_common,
 # ----------------------------------------------------------------------------------------------------------------------
 
 
+# ----------------------------------------------------------------------------------------------------------------------
+# method to merge the previous model results with the new steps (warm start)
+def merge_model_results(dframe_results_prev, dframe_results_new, var_tag_time='time', var_no_data=-9999.0):
+
+    # remove time column and no data values from the previous results
+    if var_tag_time in list(dframe_results_prev.columns):
+        dframe_results_prev = dframe_results_prev.drop(columns=[var_tag_time])
+    dframe_results_prev = dframe_results_prev.replace(var_no_data, np.nan)
+
+    if dframe_results_new is not None and not dframe_results_new.empty:
+        dframe_results_new = dframe_results_new[list(dframe_results_prev.columns)]
+        dframe_results_prev = dframe_results_prev[~dframe_results_prev.index.isin(dframe_results_new.index)]
+        dframe_results = pd.concat([dframe_results_prev, dframe_results_new])
+    else:
+        dframe_results = dframe_results_prev
+
+    dframe_results = dframe_results.sort_index()
+    dframe_results.index.name = var_tag_time
+
+    return dframe_results
+# ----------------------------------------------------------------------------------------------------------------------
+
+
 # ----------------------------------------------------------------------------------------------------------------------
 # method to organize model metrics
 def organize_model_metrics(data_metrics, data_registry, data_time=None, data_fields=None):
@@ -153,6 +204,38 @@ def organize_model_data(dframe_data, var_tag_rain='values_k1', var_tag_airt='val
 # ----------------------------------------------------------------------------------------------------------------------
 
 
+# ----------------------------------------------------------------------------------------------------------------------
+# method to organize model data for all the points over a common time grid (time x point x variable; the mask defines
+# the steps available for each point)
+def organize_model_batch(point_data, point_time):
+
+    if len(point_data) != len(point_time):
+        log_stream.error(' ===> Data and time collections have different length')
+        raise IOError('Check your collections obj')
+
+    # define common time grid (union of the point time grids)
+    values_time_common = None
+    for values_time in point_time:
+        if values_time_common is None:
+            values_time_common = pd.DatetimeIndex(values_time)
+        else:
+            values_time_common = values_time_common.union(pd.DatetimeIndex(values_time))
+    values_time_common = values_time_common.sort_values()
+
+    # stack point data over the common time grid (steps not available for a point are filled by nans)
+    values_data_common = np.full((values_time_common.shape[0], len(point_data), 3), np.nan)
+    values_mask_common = np.zeros((values_time_common.shape[0], len(point_data)), dtype=bool)
+    values_idx_common = []
+    for point_id, (values_data, values_time) in enumerate(zip(point_data, point_time)):
+        values_idx = values_time_common.get_indexer(values_time)
+        values_data_common[values_idx, point_id, :] = values_data
+        values_mask_common[values_idx, point_id] = True
+        values_idx_common.append(values_idx)
+
+    return values_data_common, values_time_common, values_idx_common, values_mask_common
+# ----------------------------------------------------------------------------------------------------------------------
+
+
 # ----------------------------------------------------------------------------------------------------------------------
 # method to organize model parameters
 def organize_model_parameters(params_dict, parameters_list=None, parameters_mandatory=True):
@@ -177,152 +260,3 @@ def organize_model_parameters(params_dict, parameters_list=None, parameters_mand
 
     return values_params
 # ----------------------------------------------------------------------------------------------------------------------
-
-
-# ----------------------------------------------------------------------------------------------------------------------
-# Method to configure time-series axes
-def configure_time_axes(time_data, time_format='%Y-%m-%d'):
-
-    tick_time_period = list(time_data)
-    tick_time_idx = time_data
-    tick_time_labels = [tick_label.strftime(time_format) for tick_label in time_data]
-
-    return tick_time_period, tick_time_idx, tick_time_labels
-# ----------------------------------------------------------------------------------------------------------------------
-
-
-# ----------------------------------------------------------------------------------------------------------------------
-# method to plot model results
-def plot_model_results(file_name, dframe_results, dframe_metrics,
-                       fig_spacing_x=None, fig_dpi=150, fig_show=True,
-                       no_data_rain=-9999.0, no_data_air_t=-9999.0,
-                       no_data_theta_obs=-9999.0, no_data_theta_sim=-9999.0,
-                       **kwargs):
-
-    # sort data by index (time)
-    dframe_results = dframe_results.sort_index()
-
-    # compute expected time period and data frame
-    time_index_start, time_index_end = dframe_results.index[0], dframe_results.index[-1]
-    time_index_resolution = dframe_results.index.resolution
-
-    if time_index_resolution == 'hour':
-        time_index_frequency = 'H'
-    else:
-        log_stream.error(' ===> Time resolution not expected in the dataframe obj')
-        raise NotImplemented('Case not implemented yet')
-    time_index_range = pd.date_range(start=time_index_start, end=time_index_end, freq=time_index_frequency)
-
-    dframe_expected = pd.DataFrame(index=time_index_range)
-    dframe_expected = dframe_expected.join(dframe_results)
-
-    # get ts values
-    values_time = dframe_expected.index
-    values_rain = dframe_expected['rain'].values
-    values_air_t = dframe_expected['air_temperature'].values
-    values_theta_obs = dframe_expected['theta_observed'].values
-    values_theta_sim = dframe_expected['theta_simulated'].values
-
-    # nullify no data values
-    values_rain[values_rain == no_data_rain] = np.nan
-    values_air_t[values_air_t == no_data_air_t] = np.nan
-    values_theta_obs[values_theta_obs == no_data_theta_obs] = np.nan
-    values_theta_sim[values_theta_sim == no_data_theta_sim] = np.nan
-
-    # get metrics values
-    metrics_ns = dframe_metrics['ns'].values[0]
-    metrics_ns_ln_q = dframe_metrics['ns_ln_q'].values[0]
-    metrics_ns_rad_q = dframe_metrics['ns_rad_q'].values[0]
-    metrics_kge = dframe_metrics['kge'].values[0]
-    metrics_rmse = dframe_metrics['rmse'].values[0]
-    metrics_rq = dframe_metrics['rq'].values[0]
-    # get registry values
-    registry_name = dframe_metrics['name'].values[0].strip()
-    registry_catchment = dframe_metrics['catchment'].values[0].strip()
-    registry_time = dframe_metrics['time'].values[0]
-
-    # filter ts values (remove no data values)
-    values_rain[values_rain == -9999] = np.nan
-    values_theta_obs[values_theta_obs == -9999] = np.nan
-    values_theta_sim[values_theta_sim == -9999] = np.nan
-
-    y_min_sm = -0.05
-    y_max_sm = 1.05
-    y_min_rain = 0
-    y_max_rain = np.nanmax([np.nanmax(values_rain[np.isfinite(values_rain)]), 25])
-    y_min_air_t = np.nanmin([np.nanmin(values_air_t[np.isfinite(values_air_t)]), -25])
-    y_max_air_t = np.nanmax([np.nanmax(values_air_t[np.isfinite(values_air_t)]), 50])
-
-    # select time start and time end
-    time_start_string, time_start_stamp = values_time[0].strftime('%Y-%m-%d %H:%M'), values_time[0]
-    time_end_string, time_end_stamp = values_time[-1].strftime('%Y-%m-%d %H:%M'), values_time[-1]
-
-    time_period_tick, time_idx_tick, time_labels_tick = configure_time_axes(values_time)
-
-    if fig_spacing_x is not None:
-
-        spacing_type = 'automatic'
-        if 'type' in list(fig_spacing_x.keys()):
-            spacing_type = fig_spacing_x['type']
-        spacing_offset = 0
-        if 'offset' in list(fig_spacing_x.keys()):
-            spacing_offset = fig_spacing_x['offset']
-
-        if spacing_type == 'days':
-            time_period_tick_start = time_period_tick[0]
-            time_period_tick_end = time_period_tick[-1] + pd.DateOffset(days=spacing_offset)
-        elif spacing_type == 'months':
-            time_period_tick_start = time_period_tick[0]
-            time_period_tick_end = time_period_tick[-1] + pd.DateOffset(months=spacing_offset)
-        else:
-            time_period_tick_start = time_period_tick[0]
-            time_period_tick_end = time_period_tick[-1]
-    else:
-        time_period_tick_start = time_period_tick[0]
-        time_period_tick_end = time_period_tick[-1]
-
-    # plot figure
-    fig = plt.figure(figsize=(10, 7))
-    fig.autofmt_xdate()
-
-    # title
-    s = ('Point -- Name: "' + registry_name + '" Catchment: "' + registry_catchment + '"\n'
-         ' Time Ref: "' + registry_time + ' Time Period Start: "' +
-         time_start_string + '" Time Period End: "' + time_end_string +
-         '" UTC \n'
-         f'NS: "{metrics_ns:.3f}" NS(lnSD): "{metrics_ns_ln_q:.3f}" NS(radSD): "{metrics_ns_rad_q:.3f}" '
-         f'RQ: "{metrics_rq:.3f}" RMSE: "{metrics_rmse:.3f}" KGE: "{metrics_kge:.3f}"')
-
-    # upper panel (soil moisture)
-    ax1 = plt.axes([0.1, 0.5, 0.8, 0.40])
-    ax1.set_title(s, fontsize=10, fontweight='bold')
-    ax1.plot(values_time, values_theta_obs, 'g', linewidth=2, label=r'$\theta_{obs}$')
-    ax1.plot(values_time, values_theta_sim, 'r', linewidth=1, label=r'$\theta_{sim}$')
-    ax1.legend()
-    ax1.set_ylabel('Relative Soil Moisture [-]')
-    ax1.set_xlim([time_period_tick_start, time_period_tick_end])
-    ax1.set_ylim([y_min_sm, y_max_sm])
-    ax1.tick_params(labelbottom=False)
-    ax1.grid(b=True)
-
-    # lower panel (rain)
-    ax2 = plt.axes([0.1, 0.1, 0.8, 0.40])
-    ax2.plot(values_time, values_rain, color=[.5, .5, .5], linewidth=1, label='rain')
-    ax2.set_ylabel('Rain (mm/h)')
-    ax2.set_ylim([y_min_rain, y_max_rain])
-    ax2.set_xlim(time_period_tick_start, time_period_tick_end)
-    ax2.tick_params(axis='x', labelrotation=45, labelsize=6)
-    ax2.grid(b=True)
-
-    ax3 = ax2.twinx()
-    ax3.plot(values_time, values_air_t, color='r', linewidth=0.2, label='air temperature')
-    ax3.set_ylabel('Air Temperature (C)')
-    ax3.set_ylim(y_min_air_t, y_max_air_t)
-    ax3.set_xlim(time_period_tick_start, time_period_tick_end)
-
-    # save figure
-    plt.savefig(file_name, format='png', dpi=fig_dpi)
-
-    if fig_show:
-        plt.show()
-# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,139 @@
+"""
+Library Features:
+
+Name:          lib_utils_fingerprint
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20241120'
+Version:       '1.0.0'
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import logging
+import hashlib
+import json
+import os
+
+from lib_utils_generic import make_folder
+from lib_info_args import logger_name
+
+# logging
+log_stream = logging.getLogger(logger_name)
+
+# fingerprint version (increase it to invalidate the cached object(s) when the organization changes)
+fingerprint_version = 1
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to define the hash of a file (read by blocks)
+def define_file_hash(file_name, file_block=1 << 20):
+    file_hash = hashlib.md5()
+    with open(file_name, 'rb') as file_handle:
+        for file_data in iter(lambda: file_handle.read(file_block), b''):
+            file_hash.update(file_data)
+    return file_hash.hexdigest()
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to define the fingerprint of a file (mtime, size and hash)
+def define_file_fingerprint(file_name):
+    file_stat = os.stat(file_name)
+    return {'file_name': file_name, 'mtime': file_stat.st_mtime_ns, 'size': file_stat.st_size,
+            'hash': define_file_hash(file_name)}
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to define the hash of the settings (filters, fields, format ...)
+def define_settings_hash(settings_obj):
+    settings_string = json.dumps(settings_obj, sort_keys=True, default=str)
+    return hashlib.md5(settings_string.encode('utf-8')).hexdigest()
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to define the fingerprint of a collection of source file(s) and settings
+def define_fingerprint(file_list, settings_obj=None):
+    return {'version': fingerprint_version, 'settings': define_settings_hash(settings_obj),
+            'files': [define_file_fingerprint(file_name) for file_name in file_list]}
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to check a fingerprint (file hash is computed only if mtime or size are changed)
+def check_fingerprint(fingerprint_cache, file_list, settings_obj=None):
+
+    if fingerprint_cache is None:
+        return False, 'fingerprint not available', None
+    if fingerprint_cache.get('version', None) != fingerprint_version:
+        return False, 'fingerprint format not supported', None
+    if fingerprint_cache['settings'] != define_settings_hash(settings_obj):
+        return False, 'settings changed', None
+
+    files_cache = fingerprint_cache['files']
+    if [file_cache['file_name'] for file_cache in files_cache] != list(file_list):
+        return False, 'source files changed', None
+
+    files_check = []
+    for file_cache in files_cache:
+        file_name = file_cache['file_name']
+        if not os.path.exists(file_name):
+            return False, 'file "' + file_name + '" not available', None
+
+        file_stat = os.stat(file_name)
+        if file_stat.st_mtime_ns == file_cache['mtime'] and file_stat.st_size == file_cache['size']:
+            files_check.append(file_cache)
+        else:
+            # file touched (content is checked by hash)
+            file_check = define_file_fingerprint(file_name)
+            if file_check['hash'] != file_cache['hash']:
+                return False, 'file "' + file_name + '" changed', None
+            files_check.append(file_check)
+
+    fingerprint_check = dict(fingerprint_cache, files=files_check)
+
+    return True, None, fingerprint_check
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to define the fingerprint file name
+def define_fingerprint_file(file_name):
+    return file_name + '.fingerprint'
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to read a fingerprint file
+def read_fingerprint(file_name):
+    if not os.path.exists(file_name):
+        return None
+    try:
+        with open(file_name, 'r') as file_handle:
+            return json.load(file_handle)
+    except (ValueError, OSError) as exc:
+        log_stream.warning(' ===> File fingerprint "' + file_name + '" is not readable [' + str(exc) + ']')
+        return None
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to write a fingerprint file
+def write_fingerprint(file_name, fingerprint_obj):
+    folder_name, _ = os.path.split(file_name)
+    make_folder(folder_name)
+    file_name_tmp = file_name + '.tmp'
+    with open(file_name_tmp, 'w') as file_handle:
+        json.dump(fingerprint_obj, file_handle, indent=2)
+    os.replace(file_name_tmp, file_name)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to remove a fingerprint file
+def remove_fingerprint(file_name):
+    if os.path.exists(file_name):
+        os.remove(file_name)
+# ----------------------------------------------------------------------------------------------------------------------
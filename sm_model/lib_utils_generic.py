@@ -13,6 +13,18 @@ import os
 import shutil
 
 from datetime import datetime
+from functools import lru_cache
+from importlib.util import find_spec
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to check if an optional library is installed (the library is not imported)
+def check_library(library_name):
+    try:
+        return find_spec(library_name) is not None
+    except (ImportError, ValueError):
+        return False
 # ----------------------------------------------------------------------------------------------------------------------
 
 
@@ -25,99 +37,167 @@ def invert_dict(dict_src):
 
 
 # ----------------------------------------------------------------------------------------------------------------------
-# method to add format(s) string (path or filename)
-def fill_tags2string(string_raw, tags_format=None, tags_filling=None, tags_template='[TMPL_TAG_{:}]'):
+# class to fill a string template (tags are parsed once and the template is filled by calling the object)
+class StringTemplate:
+
+    def __init__(self, string_raw, tags_format=None, tags_template='[TMPL_TAG_{:}]'):
+
+        self.string_raw = string_raw
+
+        self.apply_tags = False
+        if string_raw is not None:
+            for tag in list(tags_format.keys()):
+                if tag in string_raw:
+                    self.apply_tags = True
+                    break
+
+        # tags are replaced by placeholder(s) (the filling step(s) are saved in the tags order)
+        self.string_filled, self.tags_step = None, []
+        if self.apply_tags:
+            for tag_id, (tag_key, tag_value) in enumerate(tags_format.items()):
+                tag_key_tmp = '{' + tag_key + '}'
+                if tag_value is not None:
+                    tag_id = tags_template.format(tag_id)
+                    if tag_key_tmp in string_raw:
+                        self.string_filled = string_raw = string_raw.replace(tag_key_tmp, tag_id)
+                        self.tags_step.append((tag_id, tag_key, tag_value))
+        self.tags_name = [tag_key for _, tag_key, _ in self.tags_step]
+
+    # method to fill the template (filled string(s) are cached by tags values)
+    def __call__(self, tags_filling=None):
+
+        if not self.apply_tags:
+            return self.string_raw
+
+        dim_max = max([len(tags_filling_values_tmp) for tags_filling_values_tmp in tags_filling.values()
+                       if isinstance(tags_filling_values_tmp, list)] + [1])
+
+        tags_key = (dim_max, tuple(
+            (tag_key, define_tag_key(tags_filling[tag_key]))
+            for tag_key in self.tags_name if tag_key in tags_filling))
+        try:
+            hash(tags_key)
+        except TypeError:
+            # unhashable value(s) are filled without cache
+            return self.fill_template(tags_filling, dim_max)
+
+        string_filled_out = fill_string_template(self, tags_key)
+
+        if isinstance(string_filled_out, tuple):
+            return list(string_filled_out)
+        return string_filled_out
+
+    # method to fill the template with tags values
+    def fill_template(self, tags_filling, dim_max=1):
 
-    apply_tags = False
-    if string_raw is not None:
-        for tag in list(tags_format.keys()):
-            if tag in string_raw:
-                apply_tags = True
-                break
+        if self.string_filled is None:
+            logging.error(' ===> String "' + self.string_raw + '" has no tag(s) to fill')
+            raise ValueError('String template is not defined by the tags format')
 
-    if apply_tags:
+        string_filled_def = []
+        for string_id in range(dim_max):
+            string_filled_step = self.string_filled
+            for tag_dict_template, tag_dict_key, tag_dict_value in self.tags_step:
+
+                if tag_dict_template in string_filled_step:
+                    if tag_dict_key in tags_filling:
+
+                        value_filling_obj = tags_filling[tag_dict_key]
 
-        string_filled = None
-        tag_dictionary = {}
-        for tag_id, (tag_key, tag_value) in enumerate(tags_format.items()):
-            tag_key_tmp = '{' + tag_key + '}'
-            if tag_value is not None:
+                        if isinstance(value_filling_obj, list):
+                            value_filling = value_filling_obj[string_id]
+                        else:
+                            value_filling = value_filling_obj
 
-                tag_id = tags_template.format(tag_id)
-                tag_dictionary[tag_id] = {'key': None, 'value': None}
+                        string_filled_step = string_filled_step.replace(tag_dict_template, tag_dict_key)
 
-                if tag_key_tmp in string_raw:
-                    tag_dictionary[tag_id] = {'key': tag_key, 'value': tag_value}
-                    string_filled = string_raw.replace(tag_key_tmp, tag_id)
-                    string_raw = string_filled
-                else:
-                    tag_dictionary[tag_id] = {'key': tag_key, 'value': None}
+                        if isinstance(value_filling, datetime):
+                            tag_dict_filled = value_filling.strftime(tag_dict_value)
+                        elif isinstance(value_filling, (float, int)):
+                            tag_dict_filled = tag_dict_key.format(value_filling)
+                        else:
+                            tag_dict_filled = value_filling
 
-        dim_max = 1
-        for tags_filling_values_tmp in tags_filling.values():
-            if isinstance(tags_filling_values_tmp, list):
-                dim_tmp = tags_filling_values_tmp.__len__()
-                if dim_tmp > dim_max:
-                    dim_max = dim_tmp
+                        string_filled_step = string_filled_step.replace(tag_dict_key, tag_dict_filled)
 
-        string_filled_list = [string_filled] * dim_max
+                    else:
 
-        string_filled_def = []
-        for string_id, string_filled_step in enumerate(string_filled_list):
+                        # reverse the tag if not filled
+                        string_filled_step = string_filled_step.replace(
+                            tag_dict_template, '{' + tag_dict_key + '}')
 
-            for tag_dict_template, tag_dict_fields in tag_dictionary.items():
-                tag_dict_key = tag_dict_fields['key']
-                tag_dict_value = tag_dict_fields['value']
+            string_filled_def.append(string_filled_step.replace('//', '/'))
 
-                if tag_dict_template in string_filled_step:
-                    if tag_dict_value is not None:
+        if dim_max == 1:
+            return string_filled_def[0]
+        return string_filled_def
 
-                        if tag_dict_key in list(tags_filling.keys()):
+# ----------------------------------------------------------------------------------------------------------------------
 
-                            value_filling_obj = tags_filling[tag_dict_key]
 
-                            if isinstance(value_filling_obj, list):
-                                value_filling = value_filling_obj[string_id]
-                            else:
-                                value_filling = value_filling_obj
+# ----------------------------------------------------------------------------------------------------------------------
+# method to define the cache key of a tag value (types and time zones are kept to avoid 1 == 1.0 hits)
+def define_tag_key(tag_value):
+    if isinstance(tag_value, list):
+        return list, tuple(define_tag_key(tag_step) for tag_step in tag_value), None
+    if isinstance(tag_value, datetime):
+        return type(tag_value), tag_value, tag_value.tzinfo
+    return type(tag_value), tag_value, None
+# ----------------------------------------------------------------------------------------------------------------------
 
-                            string_filled_step = string_filled_step.replace(tag_dict_template, tag_dict_key)
 
-                            if isinstance(value_filling, datetime):
-                                tag_dict_value = value_filling.strftime(tag_dict_value)
-                            elif isinstance(value_filling, (float, int)):
-                                tag_dict_value = tag_dict_key.format(value_filling)
-                            else:
-                                tag_dict_value = value_filling
+# ----------------------------------------------------------------------------------------------------------------------
+# method to fill a string template by cache key (multiple strings are returned as tuple)
+@lru_cache(maxsize=4096)
+def fill_string_template(string_template, tags_key):
+
+    dim_max, tags_values = tags_key
+
+    tags_filling = {}
+    for tag_key, (tag_type, tag_value, _) in tags_values:
+        if tag_type is list:
+            tag_value = [tag_step for _, tag_step, _ in tag_value]
+        tags_filling[tag_key] = tag_value
+
+    string_filled_out = string_template.fill_template(tags_filling, dim_max)
+    if isinstance(string_filled_out, list):
+        return tuple(string_filled_out)
+    return string_filled_out
+# ----------------------------------------------------------------------------------------------------------------------
 
-                            string_filled_step = string_filled_step.replace(tag_dict_key, tag_dict_value)
 
-                        else:
+# ----------------------------------------------------------------------------------------------------------------------
+# method to compile a string template (templates are cached by string, tags format and tags template)
+def compile_tags2string(string_raw, tags_format=None, tags_template='[TMPL_TAG_{:}]'):
+    tags_format_key = tuple(tags_format.items()) if tags_format is not None else None
+    try:
+        hash(tags_format_key)
+    except TypeError:
+        return StringTemplate(string_raw, tags_format, tags_template)
+    return compile_string_template(string_raw, tags_format_key, tags_template)
+# ----------------------------------------------------------------------------------------------------------------------
 
-                            # reverse the tag if not filled
-                            tag_dict_key = '{' + tag_dict_key + '}'
-                            string_filled_step = string_filled_step.replace(tag_dict_template, tag_dict_key)
 
-            string_filled_def.append(string_filled_step)
+# ----------------------------------------------------------------------------------------------------------------------
+# method to compile a string template by cache key
+@lru_cache(maxsize=256)
+def compile_string_template(string_raw, tags_format_key, tags_template='[TMPL_TAG_{:}]'):
+    return StringTemplate(
+        string_raw, dict(tags_format_key) if tags_format_key is not None else None, tags_template)
+# ----------------------------------------------------------------------------------------------------------------------
 
-        if dim_max == 1:
-            string_filled_out = string_filled_def[0].replace('//', '/')
-        else:
-            string_filled_out = []
-            for string_filled_tmp in string_filled_def:
-                string_filled_out.append(string_filled_tmp.replace('//', '/'))
 
-        return string_filled_out
-    else:
-        return string_raw
+# ----------------------------------------------------------------------------------------------------------------------
+# method to add format(s) string (path or filename)
+def fill_tags2string(string_raw, tags_format=None, tags_filling=None, tags_template='[TMPL_TAG_{:}]'):
+    return compile_tags2string(string_raw, tags_format, tags_template)(tags_filling)
 # ----------------------------------------------------------------------------------------------------------------------
 
 
 # ----------------------------------------------------------------------------------------------------------------------
-# method to make folder
+# method to make folder (safe if the folder is created concurrently by other worker(s))
 def make_folder(path):
-    if not os.path.exists(path):
-        os.makedirs(path)
+    os.makedirs(path, exist_ok=True)
 # ----------------------------------------------------------------------------------------------------------------------
 
 
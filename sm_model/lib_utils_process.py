@@ -0,0 +1,223 @@
+"""
+Library Features:
+
+Name:          lib_utils_process
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20241120'
+Version:       '1.0.0'
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import logging
+import multiprocessing
+import os
+import threading
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from logging.handlers import QueueHandler, QueueListener
+
+from lib_info_args import logger_name
+
+# logging
+log_stream = logging.getLogger(logger_name)
+
+# process context (point tag running in the current worker)
+process_context = threading.local()
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# class to attribute the log records to the point running in the worker
+class PointFilter(logging.Filter):
+
+    def filter(self, record):
+        point_tag = getattr(process_context, 'tag', None)
+        if point_tag is not None:
+            record.msg = '[' + str(point_tag) + ']' + str(record.msg)
+        return True
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to define the number of process(es)
+def define_process_n(process_n=None, process_max=None):
+
+    if process_n is None or process_n <= 0:
+        process_n = os.cpu_count() or 1
+    if process_max is not None:
+        process_n = min(process_n, process_max)
+    return max(int(process_n), 1)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to initialize logging in the worker(s) (records are forwarded to the main process)
+def init_process_logging(log_queue):
+
+    logger_root = logging.getLogger()
+    for logger_handler in list(logger_root.handlers):
+        logger_root.removeHandler(logger_handler)
+
+    # remove the point filter(s) inherited from the main process (the point is attributed by the queue handler)
+    for logger_filter in list(log_stream.filters):
+        if isinstance(logger_filter, PointFilter):
+            log_stream.removeFilter(logger_filter)
+
+    logger_handler = QueueHandler(log_queue)
+    logger_handler.addFilter(PointFilter())
+    logger_root.addHandler(logger_handler)
+    logger_root.setLevel(logging.DEBUG)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to execute a point function in the worker(s)
+def exec_process_point(fx_point, point_tag, *fx_args):
+
+    process_context.tag = point_tag
+    try:
+        point_obj = fx_point(*fx_args)
+        return point_tag, True, None, point_obj
+    except Exception as exc:
+        log_stream.error(' ===> Point "' + str(point_tag) + '" failed: ' + repr(exc))
+        return point_tag, False, repr(exc), None
+    finally:
+        process_context.tag = None
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to execute a point function over a process pool
+def exec_process_pool(fx_point, point_args, process_n=None):
+
+    # point_args: {point_tag: (arg_1, arg_2, ...)}
+    process_n = define_process_n(process_n, process_max=len(point_args))
+
+    # forward the worker(s) log records to the handler(s) of the main process
+    log_queue = multiprocessing.Queue()
+    log_listener = QueueListener(log_queue, *logging.getLogger().handlers, respect_handler_level=True)
+    log_listener.start()
+
+    point_results = {}
+    try:
+        with ProcessPoolExecutor(max_workers=process_n,
+                                 initializer=init_process_logging, initargs=(log_queue,)) as process_pool:
+
+            process_futures = [
+                process_pool.submit(exec_process_point, fx_point, point_tag, *fx_args)
+                for point_tag, fx_args in point_args.items()]
+
+            for process_future in as_completed(process_futures):
+                point_tag, point_status, point_error, point_obj = process_future.result()
+                point_results[point_tag] = {'status': point_status, 'error': point_error, 'result': point_obj}
+    finally:
+        log_listener.stop()
+
+    # keep the point order of the input object
+    point_results = {point_tag: point_results[point_tag] for point_tag in point_args.keys()
+                     if point_tag in point_results}
+
+    return point_results
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to execute a point function over a thread pool (i/o bound tasks)
+def exec_thread_pool(fx_point, point_args, thread_n=None):
+
+    # point_args: {point_tag: (arg_1, arg_2, ...)}
+    thread_n = define_process_n(thread_n, process_max=len(point_args))
+
+    # attribute the log records to the point running in the thread
+    point_filter = PointFilter()
+    log_stream.addFilter(point_filter)
+
+    point_results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=thread_n) as thread_pool:
+
+            thread_futures = [
+                thread_pool.submit(exec_process_point, fx_point, point_tag, *fx_args)
+                for point_tag, fx_args in point_args.items()]
+
+            for thread_future in as_completed(thread_futures):
+                point_tag, point_status, point_error, point_obj = thread_future.result()
+                point_results[point_tag] = {'status': point_status, 'error': point_error, 'result': point_obj}
+    finally:
+        log_stream.removeFilter(point_filter)
+
+    # keep the point order of the input object
+    point_results = {point_tag: point_results[point_tag] for point_tag in point_args.keys()
+                     if point_tag in point_results}
+
+    return point_results
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to execute a producer and a consumer function over the point(s) (the producer runs in a thread or process
+# pool ahead of the consumer, executed in the calling process in the point order; the producer result is the last
+# consumer argument)
+def exec_pipeline_pool(fx_producer, fx_consumer, point_args, worker_n=None, worker_type='thread', queue_n=None):
+
+    # point_args: {point_tag: (arg_1, arg_2, ...)}
+    worker_n = define_process_n(worker_n, process_max=len(point_args))
+    # max number of point(s) produced ahead of the consumer (limit the memory of the in-flight datasets)
+    if queue_n is None or queue_n <= 0:
+        queue_n = worker_n + 1
+
+    # attribute the log records to the point running in the thread or in the calling process
+    point_filter = PointFilter()
+    log_stream.addFilter(point_filter)
+
+    # forward the worker(s) log records to the handler(s) of the main process
+    log_listener = None
+    if worker_type == 'process':
+        log_queue = multiprocessing.Queue()
+        log_listener = QueueListener(log_queue, *logging.getLogger().handlers, respect_handler_level=True)
+        log_listener.start()
+        worker_pool = ProcessPoolExecutor(
+            max_workers=worker_n, initializer=init_process_logging, initargs=(log_queue,))
+    elif worker_type == 'thread':
+        worker_pool = ThreadPoolExecutor(max_workers=worker_n)
+    else:
+        log_stream.removeFilter(point_filter)
+        log_stream.error(' ===> Worker type "' + str(worker_type) + '" is not supported')
+        raise NotImplementedError('Case not implemented yet')
+
+    point_results = {}
+    try:
+        with worker_pool:
+
+            point_iter, point_queue = iter(point_args.items()), deque()
+            while True:
+
+                # submit the producer of the next point(s)
+                while len(point_queue) < queue_n:
+                    point_next = next(point_iter, None)
+                    if point_next is None:
+                        break
+                    point_tag, fx_args = point_next
+                    point_queue.append((point_tag, fx_args, worker_pool.submit(
+                        exec_process_point, fx_producer, point_tag, *fx_args)))
+
+                if not point_queue:
+                    break
+
+                # consume the first point (while the next point(s) are produced)
+                point_tag, fx_args, point_future = point_queue.popleft()
+                _, point_status, point_error, point_obj = point_future.result()
+                if point_status:
+                    _, point_status, point_error, point_obj = exec_process_point(
+                        fx_consumer, point_tag, *fx_args, point_obj)
+
+                point_results[point_tag] = {'status': point_status, 'error': point_error, 'result': point_obj}
+    finally:
+        log_stream.removeFilter(point_filter)
+        if log_listener is not None:
+            log_listener.stop()
+
+    return point_results
+# ----------------------------------------------------------------------------------------------------------------------
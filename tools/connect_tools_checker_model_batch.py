@@ -0,0 +1,175 @@
+#!/usr/bin/python3
+
+"""
+CONNECTORS TOOLS - Checker Model Batch
+
+__date__ = '20241120'
+__version__ = '1.0.0'
+__author__ = 'Fabio Delogu (fabio.delogu@cimafoundation.org'
+__library__ = 'connectors'
+
+General command line:
+python3 connect_tools_checker_model_batch.py -steps 2000 -seed 1
+
+The soil moisture model is executed in point mode (one station at a time over its own time grid) and in batch mode
+(all the stations over the common time grid) using synthetic datasets with gaps (steps dropped by the filter),
+missing values and stations with a coarser time step. The check fails (exit code 1) if the simulated soil moisture, the
+metrics or the model state (storage and time step at the end of the run) of a station differ between the two modes.
+"""
+
+# -------------------------------------------------------------------------------------
+# Libraries
+import logging
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+folder_name_model = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sm_model')
+sys.path.insert(0, folder_name_model)
+
+from lib_model_core import SMestim_IE_03, SMestim_IE_03_batch
+from lib_model_utils import organize_model_batch
+
+logger_format = "[%(filename)s:%(lineno)s - %(funcName)20s() ] %(message)s"
+logging.basicConfig(level=logging.INFO, format=logger_format, handlers=[logging.StreamHandler()])
+# -------------------------------------------------------------------------------------
+
+# -------------------------------------------------------------------------------------
+# Script settings
+file_name_params = os.path.join(folder_name_model, 'parametri_modello.csv')
+fields_params = ['W_p', 'W_max', 'alpha', 'm2', 'Ks', 'Kc', 'Theta_min', 'Theta_max']
+
+# station case(s): steps dropped (gap start, gap length), missing values and time step (hours)
+station_cases = [
+    {'name': 'complete', 'gaps': [], 'nans': 0, 'step': 1},
+    {'name': 'gap_short', 'gaps': [(500, 10)], 'nans': 0, 'step': 1},
+    {'name': 'gap_multiple', 'gaps': [(100, 3), (700, 48), (1500, 200)], 'nans': 0, 'step': 1},
+    {'name': 'gap_start_end', 'gaps': [(0, 24), (-36, 36)], 'nans': 0, 'step': 1},
+    {'name': 'missing_values', 'gaps': [(300, 5)], 'nans': 20, 'step': 1},
+    {'name': 'step_coarse', 'gaps': [], 'nans': 0, 'step': 2},
+]
+
+# tolerance of theta, metrics and state (vectorized power and reductions over a column of the batch array may differ from
+# the point mode in the last bits)
+theta_atol = 1e-12
+metrics_rtol = 1e-10
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to check the batch mode against the point mode
+def main():
+
+    # Get algorithm arguments
+    time_steps, random_seed = get_args()
+
+    logging.info(' ============================================================================ ')
+    logging.info(' ==> Checker model batch (steps ' + str(time_steps) + '; seed ' + str(random_seed) + ') ... ')
+
+    # Organize station datasets and parameters
+    point_data, point_time, point_params = define_datasets(time_steps, random_seed)
+
+    # Run point mode
+    point_results = []
+    for values_data, values_time, values_params in zip(point_data, point_time, point_params):
+        point_results.append(SMestim_IE_03(values_time, values_data, values_params, return_state=True))
+
+    # Run batch mode
+    values_data_batch, values_time_batch, values_idx_batch, values_mask_batch = organize_model_batch(
+        point_data, point_time)
+    batch_results = SMestim_IE_03_batch(
+        values_time_batch, values_data_batch, np.vstack(point_params), MASK=values_mask_batch, return_state=True)
+
+    # Compare the results of each station
+    station_failed = []
+    for point_id, station_case in enumerate(station_cases):
+
+        theta_point = point_results[point_id][0]
+        theta_batch = batch_results[0][values_idx_batch[point_id], point_id]
+        metrics_point = np.array(point_results[point_id][1:7])
+        metrics_batch = np.array([batch_metric[point_id] for batch_metric in batch_results[1:7]])
+        state_point = np.array(point_results[point_id][7:])
+        state_batch = np.array([batch_state[point_id] for batch_state in batch_results[7:]])
+
+        theta_diff = np.nanmax(np.abs(theta_point - theta_batch))
+        theta_check = np.allclose(theta_point, theta_batch, rtol=0, atol=theta_atol, equal_nan=True)
+        metrics_check = np.allclose(metrics_point, metrics_batch, rtol=metrics_rtol, atol=0, equal_nan=True)
+        state_check = np.allclose(state_point, state_batch, rtol=metrics_rtol, atol=0, equal_nan=True)
+
+        station_info = (' ===> Station "' + station_case['name'] + '": theta max diff ' +
+                        '{:.3e}'.format(theta_diff) + ' :: metrics ' + str(np.round(metrics_point, 4).tolist()))
+        if theta_check and metrics_check and state_check:
+            logging.info(station_info + ' ... PASSED')
+        else:
+            logging.error(station_info + ' ... FAILED')
+            station_failed.append(station_case['name'])
+
+    if station_failed:
+        logging.info(' ==> Checker model batch ... FAILED')
+        logging.info(' ============================================================================ ')
+        sys.exit(1)
+
+    logging.info(' ==> Checker model batch ... DONE')
+    logging.info(' ============================================================================ ')
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to define the synthetic datasets of the station(s) (rain, air temperature, soil moisture)
+def define_datasets(time_steps, random_seed):
+
+    random_obj = np.random.default_rng(random_seed)
+
+    dframe_params = pd.read_csv(file_name_params)
+    time_grid = pd.date_range(start='2023-01-01 00:00', periods=time_steps, freq='H')
+    time_hours = np.arange(time_steps)
+
+    point_data, point_time, point_params = [], [], []
+    for point_id, station_case in enumerate(station_cases):
+
+        values_rain = random_obj.gamma(0.3, 4.0, time_steps) * (random_obj.random(time_steps) < 0.1)
+        values_air_t = (10 + 12 * np.sin(2 * np.pi * time_hours / 8760) + 6 * np.sin(2 * np.pi * time_hours / 24) +
+                        random_obj.normal(0, 1, time_steps))
+        values_sm = np.clip(0.3 + 0.1 * np.sin(2 * np.pi * time_hours / 2000) +
+                            random_obj.normal(0, 0.02, time_steps), 0.05, 0.6)
+        values_data = np.column_stack((values_rain, values_air_t, values_sm))
+
+        if station_case['nans'] > 0:
+            values_idx = random_obj.choice(time_steps, station_case['nans'], replace=False)
+            values_data[values_idx, random_obj.integers(0, 3, station_case['nans'])] = np.nan
+
+        mask_step = np.zeros(time_steps, dtype=bool)
+        mask_step[::station_case['step']] = True
+        for gap_start, gap_length in station_case['gaps']:
+            gap_start = gap_start % time_steps
+            mask_step[gap_start:gap_start + gap_length] = False
+
+        point_data.append(values_data[mask_step])
+        point_time.append(time_grid[mask_step])
+        point_params.append(
+            dframe_params[fields_params].values[point_id % dframe_params.shape[0]].astype(np.float64))
+
+    return point_data, point_time, point_params
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to get script argument(s)
+def get_args():
+    parser_handle = argparse.ArgumentParser()
+    parser_handle.add_argument('-steps', action="store", dest="time_steps", type=int, default=2000)
+    parser_handle.add_argument('-seed', action="store", dest="random_seed", type=int, default=1)
+    parser_values = parser_handle.parse_args()
+
+    return parser_values.time_steps, parser_values.random_seed
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Call script from external library
+if __name__ == "__main__":
+    main()
+# -------------------------------------------------------------------------------------
@@ -0,0 +1,159 @@
+#!/usr/bin/python3
+
+"""
+CONNECTORS TOOLS - Profiler Import Time
+
+__date__ = '20241120'
+__version__ = '1.0.0'
+__author__ = 'Fabio Delogu (fabio.delogu@cimafoundation.org'
+__library__ = 'connectors'
+
+General command line:
+python3 connect_tools_profiler_import_time.py -repeat 5 -budget 0.1
+
+The import time of each entry point is measured in a new interpreter (best of "repeat" runs) after the mandatory
+libraries (numpy and pandas) are imported, so the overhead of the entry point is not hidden by the time spent by the
+mandatory libraries. The check fails (exit code 1) if the overhead of an entry point is greater than the budget
+(seconds) or if a deferred library is imported at startup.
+"""
+
+# -------------------------------------------------------------------------------------
+# Libraries
+import logging
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+logger_format = "[%(filename)s:%(lineno)s - %(funcName)20s() ] %(message)s"
+logging.basicConfig(level=logging.INFO, format=logger_format, handlers=[logging.StreamHandler()])
+# -------------------------------------------------------------------------------------
+
+# -------------------------------------------------------------------------------------
+# Script settings
+folder_name_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+modules_base = ['numpy', 'pandas']
+entry_points = [
+    {'name': 'sm_model [main]', 'folder_name': os.path.join(folder_name_root, 'sm_model'),
+     'module': 'app_model_sm_main', 'deferred': ['matplotlib', 'xarray', 'numba']},
+    {'name': 'sm_model [calibration]', 'folder_name': os.path.join(folder_name_root, 'sm_model'),
+     'module': 'app_model_sm_calibration', 'deferred': ['matplotlib', 'xarray', 'numba']},
+    {'name': 'ground_network [odbc ws]', 'folder_name': folder_name_root,
+     'module': 'ground_network.odbc.connect_downloader_odbc_ws', 'deferred': ['geopandas', 'rasterio', 'pyodbc']},
+    {'name': 'ground_network [odbc rs]', 'folder_name': folder_name_root,
+     'module': 'ground_network.odbc.connect_downloader_odbc_rs', 'deferred': ['geopandas', 'rasterio', 'pyodbc']},
+    {'name': 'ground_network [mysql dams]', 'folder_name': folder_name_root,
+     'module': 'ground_network.mysql.connect_downloader_mysql_dams',
+     'deferred': ['geopandas', 'rasterio', 'mysql.connector']},
+]
+
+code_import = (
+    "import importlib, json, sys, time\n"
+    "sys.path.insert(0, {folder_name!r})\n"
+    "for module_name in {modules_preload!r}:\n"
+    "    importlib.import_module(module_name)\n"
+    "time_start = time.perf_counter()\n"
+    "for module_name in {modules!r}:\n"
+    "    importlib.import_module(module_name)\n"
+    "time_elapsed = time.perf_counter() - time_start\n"
+    "print(json.dumps({{'time': time_elapsed, 'loaded': [m for m in {deferred!r} if m in sys.modules]}}))\n"
+)
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to profile the import time of the entry points
+def main():
+
+    # Get algorithm arguments
+    import_repeat, import_budget = get_args()
+
+    logging.info(' ============================================================================ ')
+    logging.info(' ==> Profiler import time (best of ' + str(import_repeat) + ' runs; budget ' +
+                 '{:.3f}'.format(import_budget) + ' s over the mandatory libraries) ... ')
+
+    # Import time of the mandatory libraries
+    time_base, _ = measure_import(folder_name_root, modules_base, [], import_repeat, modules_preload=[])
+    if time_base is None:
+        logging.error(' ===> Mandatory libraries ' + str(modules_base) + ' are not available')
+        raise ImportError('Check your environment')
+    logging.info(' ===> Mandatory libraries ' + str(modules_base) + ': ' + '{:.3f}'.format(time_base) + ' s')
+
+    # Import time of the entry points
+    entry_failed = []
+    for entry_point in entry_points:
+
+        time_overhead, modules_loaded = measure_import(
+            entry_point['folder_name'], [entry_point['module']], entry_point['deferred'], import_repeat,
+            modules_preload=modules_base)
+        if time_overhead is None:
+            logging.error(' ===> Entry point ' + entry_point['name'] + ' ... FAILED. Import error')
+            entry_failed.append(entry_point['name'])
+            continue
+
+        entry_info = (' ===> Entry point ' + entry_point['name'] + ': ' + '{:.3f}'.format(time_base + time_overhead) +
+                      ' s (overhead ' + '{:.3f}'.format(time_overhead) + ' s)')
+        if time_overhead > import_budget:
+            logging.error(entry_info + ' ... FAILED. Budget exceeded')
+            entry_failed.append(entry_point['name'])
+        elif modules_loaded:
+            logging.error(entry_info + ' ... FAILED. Deferred libraries imported at startup ' + str(modules_loaded))
+            entry_failed.append(entry_point['name'])
+        else:
+            logging.info(entry_info + ' ... PASSED')
+
+    if entry_failed:
+        logging.info(' ==> Profiler import time ... FAILED')
+        logging.info(' ============================================================================ ')
+        sys.exit(1)
+
+    logging.info(' ==> Profiler import time ... DONE')
+    logging.info(' ============================================================================ ')
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to measure the import time of module(s) in a new interpreter (none if the import fails)
+def measure_import(folder_name, modules, deferred, import_repeat=5, modules_preload=None):
+
+    if modules_preload is None:
+        modules_preload = modules_base
+
+    code_run = code_import.format(
+        folder_name=folder_name, modules=modules, deferred=deferred, modules_preload=modules_preload)
+
+    time_best, modules_loaded = None, []
+    for run_id in range(import_repeat):
+        run_obj = subprocess.run([sys.executable, '-c', code_run], capture_output=True, text=True, cwd=folder_name)
+        if run_obj.returncode != 0:
+            logging.error(' ===> Import of ' + str(modules) + ' failed: ' + run_obj.stderr.strip().split('\n')[-1])
+            return None, []
+
+        run_info = json.loads(run_obj.stdout.strip().split('\n')[-1])
+        if time_best is None or run_info['time'] < time_best:
+            time_best = run_info['time']
+        modules_loaded = run_info['loaded']
+
+    return time_best, modules_loaded
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Method to get script argument(s)
+def get_args():
+    parser_handle = argparse.ArgumentParser()
+    parser_handle.add_argument('-repeat', action="store", dest="import_repeat", type=int, default=5)
+    parser_handle.add_argument('-budget', action="store", dest="import_budget", type=float, default=0.1)
+    parser_values = parser_handle.parse_args()
+
+    return parser_values.import_repeat, parser_values.import_budget
+# -------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------
+# Call script from external library
+if __name__ == "__main__":
+    main()
+# -------------------------------------------------------------------------------------